@@ -491,49 +491,73 @@ class ContentGenerator:
         
         print(f"Script Markdown sauvegardé dans: {md_path}")
     
-    def format_script_for_tts(self, script_data):
+    def format_script_sections_for_tts(self, script_data):
         """
-        Formate le script pour la synthèse vocale
+        Formate le script pour la synthèse vocale, découpé selon les cinq sections de la vidéo
+        
+        Synthétisées séparément (TTSEngine.batch_generate_speech puis assemble_sections), les
+        sections donnent la position exacte de chaque section dans la narration.
         
         Args:
             script_data (dict): Données du script
-            
+        
         Returns:
-            str: Texte formaté pour la synthèse vocale
+            dict: Texte de chaque section (introduction, section1 à section3, conclusion), dans l'ordre de lecture
         """
-        # Construire le texte pour la synthèse vocale
-        tts_parts = [
+        sections = {
             # Introduction
-            script_data['hook'],
-            script_data['topic_intro'],
-            script_data['learning_points'],
+            "introduction": [
+                script_data['hook'],
+                script_data['topic_intro'],
+                script_data['learning_points']
+            ],
             
             # Section 1
-            f"Let's start with {script_data['section1_title']}.",
-            script_data['section1_point1'],
-            script_data['section1_point2'],
-            script_data['section1_example'],
+            "section1": [
+                f"Let's start with {script_data['section1_title']}.",
+                script_data['section1_point1'],
+                script_data['section1_point2'],
+                script_data['section1_example']
+            ],
             
             # Section 2
-            f"Now, let's move on to {script_data['section2_title']}.",
-            script_data['section2_point1'],
-            script_data['section2_point2'],
-            script_data['section2_example'],
+            "section2": [
+                f"Now, let's move on to {script_data['section2_title']}.",
+                script_data['section2_point1'],
+                script_data['section2_point2'],
+                script_data['section2_example']
+            ],
             
             # Section 3
-            f"Finally, let's talk about {script_data['section3_title']}.",
-            script_data['section3_point1'],
-            script_data['section3_point2'],
-            script_data['section3_example'],
+            "section3": [
+                f"Finally, let's talk about {script_data['section3_title']}.",
+                script_data['section3_point1'],
+                script_data['section3_point2'],
+                script_data['section3_example']
+            ],
             
             # Conclusion
-            "To summarize,",
-            script_data['recap'],
-            script_data['call_to_action'],
-            script_data['engagement_question']
-        ]
+            "conclusion": [
+                "To summarize,",
+                script_data['recap'],
+                script_data['call_to_action'],
+                script_data['engagement_question']
+            ]
+        }
+        
+        return {name: " ".join(parts) for name, parts in sections.items()}
+    
+    def format_script_for_tts(self, script_data):
+        """
+        Formate le script pour la synthèse vocale
         
-        # Joindre les parties avec des pauses
-        tts_text = " ".join(tts_parts)
+        Args:
+            script_data (dict): Données du script
+            
+        Returns:
+            str: Texte formaté pour la synthèse vocale
+        """
+        # Joindre les sections avec des pauses
+        tts_text = " ".join(self.format_script_sections_for_tts(script_data).values())
         
         return tts_text
@@ -3,5 +3,10 @@ Module d'initialisation pour le package de synthèse vocale
 """
 
 from .tts_engine import TTSEngine
+from .duration_estimator import DurationEstimator
+from .alignment import AlignmentTrack
+from .metadata_log import SpeechMetadataLog
+from .voice_registry import VoiceRegistry
+from .audio_postprocess import AudioPostProcessor
 
-__all__ = ['TTSEngine']
+__all__ = ['TTSEngine', 'DurationEstimator', 'AlignmentTrack', 'SpeechMetadataLog', 'VoiceRegistry', 'AudioPostProcessor']
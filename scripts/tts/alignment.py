@@ -0,0 +1,225 @@
+"""
+Module d'alignement mot à mot pour AutoTubeCPM
+Ce module produit la piste de synchronisation (début et fin de chaque mot) d'un fichier audio
+et l'exporte en sous-titres SRT ou WebVTT
+"""
+
+import json
+
+# Version du format des fichiers d'alignement (.align.jsonl)
+ALIGNMENT_FORMAT_VERSION = 1
+
+# Extension ajoutée au chemin du fichier audio pour le fichier d'alignement
+ALIGNMENT_SUFFIX = ".align.jsonl"
+
+# Contraintes de lisibilité des sous-titres
+DEFAULT_MAX_CUE_CHARS = 42
+DEFAULT_MAX_CUE_DURATION = 6.0
+
+
+def format_timestamp(seconds, decimal_separator=","):
+    """
+    Formate une position temporelle pour les sous-titres (HH:MM:SS,mmm)
+    
+    Args:
+        seconds (float): Position en secondes
+        decimal_separator (str, optional): Séparateur des millisecondes ("," pour SRT, "." pour VTT)
+    
+    Returns:
+        str: Horodatage formaté
+    """
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_separator}{milliseconds:03d}"
+
+
+class AlignmentTrack:
+    """Classe représentant la synchronisation mot à mot d'un fichier audio"""
+    
+    def __init__(self, words=None, duration=0.0, audio_path=None):
+        """
+        Initialise une piste d'alignement
+        
+        Args:
+            words (list, optional): Mots horodatés sous forme de dictionnaires (w, s, e, sent)
+            duration (float, optional): Durée totale de l'audio en secondes
+            audio_path (str, optional): Chemin du fichier audio associé
+        """
+        self.words = words or []
+        self.duration = duration
+        self.audio_path = audio_path
+    
+    @classmethod
+    def from_text(cls, text, estimator, voice_id="male_professional", audio_duration=None, audio_path=None,
+                  lead_pause=0.0, trail_pause=0.0):
+        """
+        Construit la piste d'alignement à partir du texte synthétisé
+        
+        Les horodatages proviennent du modèle de durée, puis sont mis à l'échelle pour
+        correspondre exactement à la parole de l'audio, entre les silences ajoutés au début
+        et à la fin par le post-traitement.
+        
+        Args:
+            text (str): Texte envoyé au moteur TTS
+            estimator (DurationEstimator): Estimateur de durée
+            voice_id (str, optional): Identifiant de la voix. Par défaut "male_professional"
+            audio_duration (float, optional): Durée réelle de l'audio. Si None, la durée estimée est conservée
+            audio_path (str, optional): Chemin du fichier audio associé
+            lead_pause (float, optional): Silence au début de l'audio en secondes. Par défaut 0
+            trail_pause (float, optional): Silence à la fin de l'audio en secondes. Par défaut 0
+        
+        Returns:
+            AlignmentTrack: Piste d'alignement
+        """
+        words = []
+        sentence_index = 0
+        end = 0.0
+        
+        for kind, token, start, end in estimator.iter_timed_tokens(text, voice_id):
+            if kind == "word":
+                words.append({"w": token, "s": start, "e": end, "sent": sentence_index})
+            elif kind == "sentence_end" and words and words[-1]["sent"] == sentence_index:
+                # Rattacher la ponctuation finale au dernier mot de la phrase
+                words[-1]["w"] += token
+                sentence_index += 1
+        
+        # Recaler les horodatages sur la parole, entre les silences de début et de fin
+        speech_duration = audio_duration - lead_pause - trail_pause if audio_duration else None
+        scale = speech_duration / end if speech_duration and speech_duration > 0 and end else 1.0
+        for word in words:
+            word["s"] = round(lead_pause + word["s"] * scale, 3)
+            word["e"] = round(lead_pause + word["e"] * scale, 3)
+        
+        return cls(words, duration=audio_duration or end, audio_path=audio_path)
+    
+    def save(self, path):
+        """
+        Sauvegarde la piste au format JSON Lines (un en-tête puis un mot par ligne)
+        
+        Args:
+            path (str): Chemin du fichier d'alignement
+        """
+        header = {
+            "version": ALIGNMENT_FORMAT_VERSION,
+            "audio_path": self.audio_path,
+            "duration": self.duration,
+            "words": len(self.words)
+        }
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for word in self.words:
+                f.write(json.dumps(word, ensure_ascii=False, separators=(',', ':')) + "\n")
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Charge une piste d'alignement depuis un fichier JSON Lines
+        
+        Args:
+            path (str): Chemin du fichier d'alignement
+        
+        Returns:
+            AlignmentTrack: Piste d'alignement
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            words = [json.loads(line) for line in f if line.strip()]
+        
+        return cls(words, duration=header.get("duration", 0.0), audio_path=header.get("audio_path"))
+    
+    def offset(self, seconds):
+        """
+        Renvoie une copie de la piste décalée dans le temps
+        
+        Args:
+            seconds (float): Décalage en secondes
+        
+        Returns:
+            AlignmentTrack: Piste décalée
+        """
+        words = [dict(word, s=word["s"] + seconds, e=word["e"] + seconds) for word in self.words]
+        return AlignmentTrack(words, duration=self.duration + seconds, audio_path=self.audio_path)
+    
+    def sentences(self):
+        """
+        Regroupe les mots par phrase
+        
+        Returns:
+            list: Liste de dictionnaires (text, start, end) par phrase
+        """
+        sentences = []
+        for word in self.words:
+            if sentences and sentences[-1]["sent"] == word["sent"]:
+                sentences[-1]["text"] += " " + word["w"]
+                sentences[-1]["end"] = word["e"]
+            else:
+                sentences.append({"sent": word["sent"], "text": word["w"], "start": word["s"], "end": word["e"]})
+        
+        return [{"text": s["text"], "start": s["start"], "end": s["end"]} for s in sentences]
+    
+    def to_cues(self, max_chars=DEFAULT_MAX_CUE_CHARS, max_duration=DEFAULT_MAX_CUE_DURATION):
+        """
+        Découpe la piste en blocs de sous-titres en un seul passage
+        
+        Un nouveau bloc commence à chaque nouvelle phrase, ou lorsque le bloc courant
+        dépasserait la longueur ou la durée maximale.
+        
+        Args:
+            max_chars (int, optional): Nombre maximal de caractères par bloc. Par défaut 42
+            max_duration (float, optional): Durée maximale d'un bloc en secondes. Par défaut 6.0
+        
+        Returns:
+            list: Liste de dictionnaires (text, start, end)
+        """
+        cues = []
+        current = None
+        
+        for word in self.words:
+            if current is not None:
+                fits = (len(current["text"]) + 1 + len(word["w"]) <= max_chars
+                        and word["e"] - current["start"] <= max_duration)
+                if fits and current["sent"] == word["sent"]:
+                    current["text"] += " " + word["w"]
+                    current["end"] = word["e"]
+                    continue
+                cues.append(current)
+            
+            current = {"text": word["w"], "start": word["s"], "end": word["e"], "sent": word["sent"]}
+        
+        if current is not None:
+            cues.append(current)
+        
+        return [{"text": cue["text"], "start": cue["start"], "end": cue["end"]} for cue in cues]
+    
+    def to_srt(self, **cue_options):
+        """
+        Exporte la piste au format SRT
+        
+        Args:
+            **cue_options: Options de découpage transmises à to_cues
+        
+        Returns:
+            str: Contenu SRT
+        """
+        blocks = []
+        for index, cue in enumerate(self.to_cues(**cue_options), start=1):
+            blocks.append(f"{index}\n{format_timestamp(cue['start'])} --> {format_timestamp(cue['end'])}\n{cue['text']}\n")
+        return "\n".join(blocks)
+    
+    def to_vtt(self, **cue_options):
+        """
+        Exporte la piste au format WebVTT
+        
+        Args:
+            **cue_options: Options de découpage transmises à to_cues
+        
+        Returns:
+            str: Contenu WebVTT
+        """
+        blocks = ["WEBVTT\n"]
+        for cue in self.to_cues(**cue_options):
+            blocks.append(f"{format_timestamp(cue['start'], '.')} --> {format_timestamp(cue['end'], '.')}\n{cue['text']}\n")
+        return "\n".join(blocks)
@@ -0,0 +1,434 @@
+"""
+Module de post-traitement audio pour AutoTubeCPM
+Ce module normalise le volume des voix off, supprime les silences de début et de fin
+et insère des pauses de durée exacte, par blocs pour garder une mémoire constante
+"""
+
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Formats WAV pris en charge
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Nombre d'échantillons (par canal) traités à la fois
+DEFAULT_CHUNK_FRAMES = 65536
+
+# Seuil absolu sous lequel un bloc est ignoré pour la mesure du volume (comme la porte LUFS à -70)
+ABSOLUTE_GATE_DB = -70.0
+
+# Porte relative: les blocs plus faibles que le volume moyen moins 10 dB sont ignorés
+RELATIVE_GATE_DB = -10.0
+
+
+def db_to_gain(db):
+    """
+    Args:
+        db (float): Niveau en décibels
+    
+    Returns:
+        float: Gain linéaire correspondant
+    """
+    return 10.0 ** (db / 20.0)
+
+
+def energy_to_db(energy):
+    """
+    Args:
+        energy (float or numpy.ndarray): Énergie moyenne (carré moyen des échantillons)
+    
+    Returns:
+        float or numpy.ndarray: Niveau en dBFS
+    """
+    return 10.0 * np.log10(np.maximum(energy, 1e-12))
+
+
+def frame_energies(samples, frame_size):
+    """
+    Calcule l'énergie moyenne de chaque trame, de façon vectorisée
+    
+    Args:
+        samples (numpy.ndarray): Échantillons (frames, canaux) en flottants
+        frame_size (int): Nombre d'échantillons par trame
+    
+    Returns:
+        numpy.ndarray: Énergie moyenne par trame complète (les échantillons restants sont ignorés)
+    """
+    num_frames = len(samples) // frame_size
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.float64)
+    
+    trimmed = samples[:num_frames * frame_size]
+    squared = np.square(trimmed, dtype=np.float64).mean(axis=1)
+    return squared.reshape(num_frames, frame_size).mean(axis=1)
+
+
+class WavReader:
+    """Classe pour lire un fichier WAV (PCM 16 bits ou flottant 32 bits) par blocs"""
+    
+    def __init__(self, path):
+        """
+        Lit l'en-tête du fichier WAV
+        
+        Args:
+            path (str): Chemin du fichier WAV
+        """
+        self.path = path
+        
+        with open(path, 'rb') as f:
+            riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave_id != b'WAVE':
+                raise ValueError(f"Fichier WAV invalide: {path}")
+            
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"Données audio introuvables dans: {path}")
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+                
+                if chunk_id == b'fmt ':
+                    fmt = f.read(chunk_size)
+                elif chunk_id == b'data':
+                    self.data_offset = f.tell()
+                    self.data_size = chunk_size
+                    break
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+        
+        if fmt is None:
+            raise ValueError(f"En-tête de format introuvable dans: {path}")
+        
+        format_tag, self.channels, self.sample_rate, _, _, self.bits_per_sample = struct.unpack('<HHIIHH', fmt[:16])
+        if format_tag == WAVE_FORMAT_EXTENSIBLE:
+            # Le vrai format est dans les deux premiers octets du sous-format
+            format_tag = struct.unpack('<H', fmt[24:26])[0]
+        
+        if format_tag == WAVE_FORMAT_PCM and self.bits_per_sample == 16:
+            self.dtype = np.dtype('<i2')
+            self.format_tag = WAVE_FORMAT_PCM
+        elif format_tag == WAVE_FORMAT_IEEE_FLOAT and self.bits_per_sample == 32:
+            self.dtype = np.dtype('<f4')
+            self.format_tag = WAVE_FORMAT_IEEE_FLOAT
+        else:
+            raise ValueError(f"Format WAV non pris en charge ({format_tag}, {self.bits_per_sample} bits): {path}")
+        
+        self.frame_bytes = self.channels * self.dtype.itemsize
+        self.num_frames = self.data_size // self.frame_bytes
+    
+    @property
+    def duration(self):
+        """
+        Returns:
+            float: Durée en secondes
+        """
+        return self.num_frames / self.sample_rate
+    
+    def read_chunks(self, chunk_frames=DEFAULT_CHUNK_FRAMES, start=0, stop=None):
+        """
+        Lit les échantillons par blocs, convertis en flottants dans [-1, 1]
+        
+        Args:
+            chunk_frames (int, optional): Nombre d'échantillons par canal et par bloc
+            start (int, optional): Premier échantillon à lire. Par défaut 0
+            stop (int, optional): Échantillon de fin (exclu). Par défaut la fin du fichier
+        
+        Yields:
+            numpy.ndarray: Bloc de forme (frames, canaux) en float32
+        """
+        stop = self.num_frames if stop is None else min(stop, self.num_frames)
+        
+        with open(self.path, 'rb') as f:
+            f.seek(self.data_offset + start * self.frame_bytes)
+            position = start
+            
+            while position < stop:
+                count = min(chunk_frames, stop - position)
+                raw = f.read(count * self.frame_bytes)
+                if not raw:
+                    break
+                
+                samples = np.frombuffer(raw, dtype=self.dtype).reshape(-1, self.channels)
+                if self.format_tag == WAVE_FORMAT_PCM:
+                    samples = samples.astype(np.float32) / 32768.0
+                else:
+                    samples = samples.astype(np.float32)
+                
+                position += len(samples)
+                yield samples
+
+
+class WavWriter:
+    """Classe pour écrire un fichier WAV par blocs, dans le même format qu'un fichier source"""
+    
+    def __init__(self, path, sample_rate, channels, format_tag=WAVE_FORMAT_PCM):
+        """
+        Ouvre le fichier et réserve l'en-tête, complété à la fermeture
+        
+        Args:
+            path (str): Chemin du fichier WAV à écrire
+            sample_rate (int): Fréquence d'échantillonnage
+            channels (int): Nombre de canaux
+            format_tag (int, optional): WAVE_FORMAT_PCM (16 bits) ou WAVE_FORMAT_IEEE_FLOAT (32 bits)
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.format_tag = format_tag
+        self.dtype = np.dtype('<i2') if format_tag == WAVE_FORMAT_PCM else np.dtype('<f4')
+        self.frames_written = 0
+        
+        self._file = open(path, 'wb')
+        self._file.write(b'\0' * 44)
+    
+    def write(self, samples):
+        """
+        Écrit un bloc d'échantillons flottants
+        
+        Args:
+            samples (numpy.ndarray): Bloc de forme (frames, canaux) dans [-1, 1]
+        """
+        samples = np.clip(samples, -1.0, 1.0)
+        if self.format_tag == WAVE_FORMAT_PCM:
+            data = (samples * 32767.0).round().astype(self.dtype)
+        else:
+            data = samples.astype(self.dtype)
+        
+        self._file.write(data.tobytes())
+        self.frames_written += len(samples)
+    
+    def write_silence(self, num_frames, chunk_frames=DEFAULT_CHUNK_FRAMES):
+        """
+        Écrit un silence d'un nombre exact d'échantillons
+        
+        Args:
+            num_frames (int): Nombre d'échantillons par canal
+            chunk_frames (int, optional): Taille maximale d'un bloc
+        """
+        silence = np.zeros((min(num_frames, chunk_frames), self.channels), dtype=np.float32)
+        remaining = num_frames
+        while remaining > 0:
+            count = min(remaining, len(silence))
+            self.write(silence[:count])
+            remaining -= count
+    
+    def close(self):
+        """
+        Complète l'en-tête RIFF avec la taille des données et ferme le fichier
+        """
+        block_align = self.channels * self.dtype.itemsize
+        data_size = self.frames_written * block_align
+        
+        self._file.seek(0)
+        self._file.write(struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, self.format_tag, self.channels, self.sample_rate,
+            self.sample_rate * block_align, block_align, self.dtype.itemsize * 8,
+            b'data', data_size
+        ))
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AudioPostProcessor:
+    """Classe pour normaliser le volume et ajuster les silences des voix off"""
+    
+    def __init__(self, target_db=-20.0, silence_threshold_db=-50.0, frame_ms=20, block_ms=400,
+                 lead_pause=0.25, trail_pause=0.5, max_gain_db=20.0, chunk_frames=DEFAULT_CHUNK_FRAMES):
+        """
+        Initialise le post-traitement audio
+        
+        Args:
+            target_db (float, optional): Volume cible en dBFS (mesure RMS avec portes). Par défaut -20
+            silence_threshold_db (float, optional): Énergie de trame sous laquelle on considère un silence. Par défaut -50
+            frame_ms (int, optional): Durée d'une trame pour la détection de silence. Par défaut 20
+            block_ms (int, optional): Durée d'un bloc pour la mesure du volume. Par défaut 400
+            lead_pause (float, optional): Silence exact conservé au début en secondes. Par défaut 0.25
+            trail_pause (float, optional): Silence exact conservé à la fin en secondes. Par défaut 0.5
+            max_gain_db (float, optional): Gain maximal appliqué. Par défaut 20
+            chunk_frames (int, optional): Nombre d'échantillons traités à la fois
+        """
+        self.target_db = target_db
+        self.silence_threshold_db = silence_threshold_db
+        self.frame_ms = frame_ms
+        self.block_ms = block_ms
+        self.lead_pause = lead_pause
+        self.trail_pause = trail_pause
+        self.max_gain_db = max_gain_db
+        self.chunk_frames = chunk_frames
+    
+    def analyze(self, input_path):
+        """
+        Mesure le volume et repère la zone non silencieuse en un seul passage par blocs
+        
+        Args:
+            input_path (str): Chemin du fichier WAV
+        
+        Returns:
+            dict: loudness_db, start_frame, end_frame (échantillons) et duration
+        """
+        reader = WavReader(input_path)
+        frame_size = max(1, int(reader.sample_rate * self.frame_ms / 1000))
+        frames_per_block = max(1, self.block_ms // self.frame_ms)
+        
+        # Arrondir la taille des blocs lus à un multiple de la trame
+        chunk_frames = max(frame_size, self.chunk_frames // frame_size * frame_size)
+        
+        # Une valeur d'énergie par trame: négligeable devant le signal lui-même
+        energies = []
+        for samples in reader.read_chunks(chunk_frames):
+            energies.append(frame_energies(samples, frame_size))
+        energies = np.concatenate(energies) if energies else np.zeros(0)
+        
+        voiced = np.flatnonzero(energy_to_db(energies) > self.silence_threshold_db)
+        if len(voiced) == 0:
+            return {
+                "loudness_db": None,
+                "start_frame": 0,
+                "end_frame": reader.num_frames,
+                "duration": reader.duration
+            }
+        
+        # Volume mesuré par blocs sur la zone non silencieuse, avec porte absolue puis relative
+        # (approche inspirée de LUFS)
+        speech = energies[voiced[0]:voiced[-1] + 1]
+        num_blocks = len(speech) // frames_per_block
+        if num_blocks > 0:
+            blocks = speech[:num_blocks * frames_per_block].reshape(num_blocks, frames_per_block).mean(axis=1)
+        else:
+            blocks = speech
+        blocks = blocks[energy_to_db(blocks) > ABSOLUTE_GATE_DB]
+        relative_gate = energy_to_db(blocks.mean()) + RELATIVE_GATE_DB
+        gated = blocks[energy_to_db(blocks) > relative_gate]
+        loudness_db = float(energy_to_db(gated.mean() if len(gated) else blocks.mean()))
+        
+        return {
+            "loudness_db": loudness_db,
+            "start_frame": int(voiced[0] * frame_size),
+            "end_frame": int(min(reader.num_frames, (voiced[-1] + 1) * frame_size)),
+            "duration": reader.duration
+        }
+    
+    def process_file(self, input_path, output_path=None):
+        """
+        Normalise le volume, supprime les silences superflus et pose des pauses exactes
+        
+        Le fichier est lu deux fois par blocs (analyse puis écriture), sans jamais être
+        chargé entièrement en mémoire.
+        
+        Args:
+            input_path (str): Chemin du fichier WAV source
+            output_path (str, optional): Chemin de sortie. Si None, le fichier source est remplacé
+        
+        Returns:
+            dict: Statistiques (gain_db, durées avant et après, pauses réellement posées, chemin de sortie)
+        """
+        analysis = self.analyze(input_path)
+        reader = WavReader(input_path)
+        
+        if analysis["loudness_db"] is None:
+            # Fichier entièrement silencieux: rien à normaliser ni à couper
+            gain_db = 0.0
+            start_frame, end_frame = 0, reader.num_frames
+            lead_frames = trail_frames = 0
+        else:
+            gain_db = min(self.max_gain_db, self.target_db - analysis["loudness_db"])
+            start_frame, end_frame = analysis["start_frame"], analysis["end_frame"]
+            lead_frames = int(round(self.lead_pause * reader.sample_rate))
+            trail_frames = int(round(self.trail_pause * reader.sample_rate))
+        
+        gain = np.float32(db_to_gain(gain_db))
+        final_path = output_path or input_path
+        temp_path = final_path + ".tmp.wav"
+        
+        with WavWriter(temp_path, reader.sample_rate, reader.channels, reader.format_tag) as writer:
+            writer.write_silence(lead_frames, self.chunk_frames)
+            for samples in reader.read_chunks(self.chunk_frames, start_frame, end_frame):
+                writer.write(samples * gain)
+            writer.write_silence(trail_frames, self.chunk_frames)
+            frames_written = writer.frames_written
+        
+        os.replace(temp_path, final_path)
+        
+        return {
+            "output_path": final_path,
+            "gain_db": gain_db,
+            "duration_before": reader.duration,
+            "duration_after": frames_written / reader.sample_rate,
+            "lead_pause": lead_frames / reader.sample_rate,
+            "trail_pause": trail_frames / reader.sample_rate
+        }
+    
+    def concatenate(self, input_paths, output_path, pause_seconds=0.5):
+        """
+        Assemble plusieurs fichiers WAV en insérant des pauses de durée exacte
+        
+        Args:
+            input_paths (list): Fichiers WAV à assembler, dans l'ordre (même format)
+            output_path (str): Chemin du fichier de sortie
+            pause_seconds (float, optional): Pause entre deux fichiers. Par défaut 0.5
+        
+        Returns:
+            list: Position de départ (en secondes) de chaque fichier dans le résultat
+        """
+        readers = [WavReader(path) for path in input_paths]
+        if not readers:
+            raise ValueError("Aucun fichier à assembler")
+        
+        first = readers[0]
+        pause_frames = int(round(pause_seconds * first.sample_rate))
+        offsets = []
+        
+        with WavWriter(output_path, first.sample_rate, first.channels, first.format_tag) as writer:
+            for index, reader in enumerate(readers):
+                if reader.sample_rate != first.sample_rate or reader.channels != first.channels:
+                    raise ValueError(f"Format incompatible pour l'assemblage: {reader.path}")
+                if index > 0:
+                    writer.write_silence(pause_frames, self.chunk_frames)
+                
+                offsets.append(writer.frames_written / first.sample_rate)
+                for samples in reader.read_chunks(self.chunk_frames):
+                    writer.write(samples)
+        
+        return offsets
+    
+    def process_directory(self, directory, workers=None, extension=".wav"):
+        """
+        Applique le post-traitement à tous les fichiers audio d'un répertoire en parallèle
+        
+        Args:
+            directory (str): Répertoire contenant les fichiers audio
+            workers (int, optional): Nombre de processus. Par défaut le nombre de cœurs
+            extension (str, optional): Extension des fichiers à traiter. Par défaut ".wav"
+        
+        Returns:
+            dict: Statistiques par fichier (ou message d'erreur)
+        """
+        paths = [
+            os.path.join(directory, filename)
+            for filename in sorted(os.listdir(directory))
+            if filename.endswith(extension) and not filename.endswith(".tmp" + extension)
+        ]
+        
+        results = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {path: executor.submit(self.process_file, path) for path in paths}
+            for path, future in futures.items():
+                try:
+                    results[path] = future.result()
+                except (OSError, ValueError) as e:
+                    print(f"Erreur lors du post-traitement de {path}: {e}")
+                    results[path] = {"error": str(e)}
+        
+        print(f"{len(paths)} fichiers audio post-traités dans {directory}")
+        return results
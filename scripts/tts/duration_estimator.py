@@ -0,0 +1,256 @@
+"""
+Module d'estimation de durée de parole pour AutoTubeCPM
+Ce module prédit la durée audio d'un texte sans lancer la synthèse vocale
+"""
+
+import re
+
+# Débit par défaut d'une voix off (mots par minute)
+DEFAULT_WORDS_PER_MINUTE = 150
+
+# Nombre moyen de syllabes par mot en anglais, utilisé pour convertir le débit en secondes par syllabe
+AVERAGE_SYLLABLES_PER_WORD = 1.4
+
+# Pauses naturelles (en secondes) marquées par la ponctuation
+PUNCTUATION_PAUSES = {
+    ",": 0.15,
+    ";": 0.25,
+    ":": 0.25,
+    ".": 0.4,
+    "!": 0.4,
+    "?": 0.4,
+    "\n": 0.3
+}
+
+# Ponctuation qui termine une phrase
+SENTENCE_END = {".", "!", "?"}
+
+# Bornes du facteur de calibration pour éviter qu'un fichier aberrant ne fausse les estimations
+MIN_CALIBRATION_FACTOR = 0.5
+MAX_CALIBRATION_FACTOR = 2.0
+
+_TOKEN_PATTERN = re.compile(
+    r"<break\s+time=['\"]([\d.]+)(ms|s)['\"]\s*/>"  # Balise SSML de pause
+    r"|([^\W_]+(?:['’\-][^\W_]+)*)"                # Mot (avec apostrophes et traits d'union)
+    r"|([.,;:!?])"                                  # Ponctuation
+    r"|(\n)"                                        # Saut de ligne
+)
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+
+def count_syllables(word):
+    """
+    Estime le nombre de syllabes d'un mot
+    
+    Args:
+        word (str): Mot à analyser
+    
+    Returns:
+        int: Nombre de syllabes estimé (au moins 1)
+    """
+    word = word.lower()
+    
+    # Les nombres sont prononcés chiffre par chiffre dans le pire des cas
+    if word.isdigit():
+        return max(1, len(word))
+    
+    syllables = len(_VOWEL_GROUPS.findall(word))
+    
+    # Le "e" muet final ne compte pas comme une syllabe
+    if word.endswith("e") and not word.endswith("le") and syllables > 1:
+        syllables -= 1
+    
+    return max(1, syllables)
+
+
+class DurationEstimator:
+    """Classe pour estimer la durée de la parole à partir du texte et de la voix"""
+    
+    def __init__(self, voices=None, default_wpm=DEFAULT_WORDS_PER_MINUTE):
+        """
+        Initialise l'estimateur de durée
+        
+        Args:
+            voices (dict, optional): Voix disponibles, pouvant définir "words_per_minute"
+            default_wpm (int, optional): Débit par défaut en mots par minute. Par défaut 150
+        """
+        self.voices = voices or {}
+        self.default_wpm = default_wpm
+        
+        # Facteurs de correction par voix, appris à partir des synthèses passées
+        self.calibration = {}
+    
+    def _seconds_per_syllable(self, voice_id):
+        """
+        Calcule la durée d'une syllabe pour une voix
+        
+        Args:
+            voice_id (str): Identifiant de la voix
+        
+        Returns:
+            float: Durée d'une syllabe en secondes
+        """
+        voice = self.voices.get(voice_id, {})
+        wpm = voice.get("words_per_minute", self.default_wpm)
+        factor = self.calibration.get(voice_id, 1.0)
+        
+        return 60.0 / (wpm * AVERAGE_SYLLABLES_PER_WORD) * factor
+    
+    def iter_timed_tokens(self, text, voice_id="male_professional"):
+        """
+        Parcourt le texte et attribue un horodatage estimé à chaque élément
+        
+        Les mots sont chronométrés à partir de leur nombre de syllabes, la ponctuation
+        et les balises <break> ajoutent des pauses. Le parcours est linéaire.
+        
+        Args:
+            text (str): Texte à analyser
+            voice_id (str, optional): Identifiant de la voix. Par défaut "male_professional"
+        
+        Yields:
+            tuple: (type, texte, début, fin) où type vaut "word", "pause" ou "sentence_end"
+        """
+        seconds_per_syllable = self._seconds_per_syllable(voice_id)
+        factor = self.calibration.get(voice_id, 1.0)
+        position = 0.0
+        
+        for match in _TOKEN_PATTERN.finditer(text):
+            break_value, break_unit, word, punctuation, newline = match.groups()
+            
+            if break_value is not None:
+                # Les pauses explicites sont respectées telles quelles par le moteur TTS
+                pause = float(break_value) / (1000.0 if break_unit == "ms" else 1.0)
+                yield ("pause", match.group(0), position, position + pause)
+                position += pause
+            elif word is not None:
+                duration = count_syllables(word) * seconds_per_syllable
+                yield ("word", word, position, position + duration)
+                position += duration
+            else:
+                mark = punctuation or newline
+                pause = PUNCTUATION_PAUSES[mark] * factor
+                kind = "sentence_end" if mark in SENTENCE_END else "pause"
+                yield (kind, mark, position, position + pause)
+                position += pause
+    
+    def estimate(self, text, voice_id="male_professional"):
+        """
+        Estime la durée totale de la parole pour un texte
+        
+        Args:
+            text (str): Texte à convertir en voix
+            voice_id (str, optional): Identifiant de la voix. Par défaut "male_professional"
+        
+        Returns:
+            float: Durée estimée en secondes
+        """
+        end = 0.0
+        for _, _, _, end in self.iter_timed_tokens(text, voice_id):
+            pass
+        return end
+    
+    def estimate_sentences(self, text, voice_id="male_professional"):
+        """
+        Estime le découpage temporel d'un texte phrase par phrase
+        
+        Args:
+            text (str): Texte à analyser
+            voice_id (str, optional): Identifiant de la voix. Par défaut "male_professional"
+        
+        Returns:
+            list: Liste de dictionnaires (text, start, end, duration) par phrase
+        """
+        sentences = []
+        words = []
+        start = None
+        end = 0.0
+        
+        for kind, token, token_start, token_end in self.iter_timed_tokens(text, voice_id):
+            if kind == "word":
+                if start is None:
+                    start = token_start
+                words.append(token)
+                # La phrase se termine avec son dernier mot, la pause qui suit n'en fait pas partie
+                end = token_end
+            
+            if kind == "sentence_end" and words:
+                sentences.append({
+                    "text": " ".join(words) + token,
+                    "start": start,
+                    "end": end,
+                    "duration": end - start
+                })
+                words = []
+                start = None
+        
+        # Dernière phrase sans ponctuation finale
+        if words:
+            sentences.append({
+                "text": " ".join(words),
+                "start": start,
+                "end": end,
+                "duration": end - start
+            })
+        
+        return sentences
+    
+    def estimate_sections(self, sections, voice_id="male_professional"):
+        """
+        Estime la durée et la position de chaque section d'un script
+        
+        Args:
+            sections (dict): Textes des sections, dans l'ordre de lecture
+            voice_id (str, optional): Identifiant de la voix. Par défaut "male_professional"
+        
+        Returns:
+            dict: Durées ("durations"), positions de départ ("offsets") et durée totale ("total")
+        """
+        durations = {}
+        offsets = {}
+        position = 0.0
+        
+        for section_name, text in sections.items():
+            duration = self.estimate(text, voice_id)
+            offsets[section_name] = position
+            durations[section_name] = duration
+            position += duration
+        
+        return {
+            "durations": durations,
+            "offsets": offsets,
+            "total": position
+        }
+    
+    def calibrate(self, records):
+        """
+        Ajuste les facteurs de correction par voix à partir de synthèses passées
+        
+        Seuls les enregistrements contenant à la fois la durée estimée et la durée réelle
+        sont pris en compte.
+        
+        Args:
+            records (iterable): Métadonnées de synthèse (voice_id, estimated_duration_seconds, duration_seconds)
+        
+        Returns:
+            dict: Facteurs de correction par voix
+        """
+        totals = {}
+        
+        for record in records:
+            voice_id = record.get("voice_id")
+            estimated = record.get("estimated_duration_seconds")
+            actual = record.get("duration_seconds")
+            
+            if not voice_id or not estimated or not actual:
+                continue
+            
+            # L'estimation enregistrée a été produite avec le facteur de l'époque
+            base_factor = record.get("calibration_factor", 1.0)
+            estimated_total, actual_total = totals.get(voice_id, (0.0, 0.0))
+            totals[voice_id] = (estimated_total + estimated / base_factor, actual_total + actual)
+        
+        for voice_id, (estimated_total, actual_total) in totals.items():
+            factor = actual_total / estimated_total
+            self.calibration[voice_id] = min(MAX_CALIBRATION_FACTOR, max(MIN_CALIBRATION_FACTOR, factor))
+        
+        return dict(self.calibration)
@@ -0,0 +1,322 @@
+"""
+Module de journal des métadonnées de synthèse vocale pour AutoTubeCPM
+Ce module remplace les fichiers JSON individuels par un journal JSON Lines unique,
+indexé par chemin audio et par empreinte du texte
+"""
+
+import os
+import sys
+import json
+import weakref
+import hashlib
+import argparse
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou entre processus
+    fcntl = None
+
+# Nom du journal dans le répertoire audio
+DEFAULT_LOG_FILENAME = "speech_metadata.jsonl"
+
+# Nombre d'enregistrements gardés en mémoire avant écriture sur le disque
+DEFAULT_BUFFER_SIZE = 64
+
+# Extension des anciens fichiers de métadonnées individuels
+SIDECAR_SUFFIX = ".wav.json"
+
+# Verrou partagé par les processus qui écrivent dans un même journal
+LOCK_SUFFIX = ".lock"
+
+
+def hash_text(text):
+    """
+    Calcule l'empreinte d'un texte synthétisé
+    
+    Args:
+        text (str): Texte complet
+    
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def _log_lock(log_path):
+    """
+    Verrou exclusif sur le journal, le temps d'un ajout ou d'une compaction
+    
+    Args:
+        log_path (str): Chemin du journal
+    """
+    with open(log_path + LOCK_SUFFIX, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _append_records(log_path, records):
+    """
+    Écrit des enregistrements à la fin du journal puis vide la liste
+    
+    Fonction de module: appelée aussi par le finaliseur d'un journal, qui ne doit pas le référencer.
+    
+    Args:
+        log_path (str): Chemin du journal
+        records (list): Enregistrements en attente, vidés après écriture
+    """
+    if not records:
+        return
+    
+    lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    with _log_lock(log_path):
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+    
+    records.clear()
+
+
+class SpeechMetadataLog:
+    """Classe pour gérer le journal append-only des métadonnées de synthèse vocale"""
+    
+    def __init__(self, log_path, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Initialise le journal et reconstruit ses index
+        
+        Args:
+            log_path (str): Chemin du fichier journal (.jsonl)
+            buffer_size (int, optional): Nombre d'enregistrements avant écriture. Par défaut 64
+        """
+        self.log_path = log_path
+        self.buffer_size = buffer_size
+        
+        # Enregistrements en attente d'écriture
+        self._buffer = []
+        
+        # Index: chemin audio -> dernier enregistrement, empreinte -> chemins audio
+        self._by_audio_path = {}
+        self._by_text_hash = {}
+        
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        self._load()
+        
+        # Ne perdre aucun enregistrement à la fin du processus ni quand le journal est libéré, sans
+        # garder le journal en vie: le finaliseur ne référence que son chemin et son tampon
+        self._finalizer = weakref.finalize(self, _append_records, self.log_path, self._buffer)
+    
+    def _load(self):
+        """
+        Parcourt le journal une seule fois pour reconstruire les index en mémoire
+        """
+        if not os.path.exists(self.log_path):
+            return
+        
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    self._index(json.loads(line))
+                except ValueError:
+                    # Ligne tronquée par un arrêt brutal: on l'ignore
+                    continue
+    
+    def _index(self, record):
+        """
+        Ajoute un enregistrement aux index (le plus récent l'emporte)
+        
+        Args:
+            record (dict): Métadonnées de synthèse
+        """
+        audio_path = record.get("audio_path")
+        if not audio_path:
+            return
+        
+        previous = self._by_audio_path.get(audio_path)
+        if previous is not None and previous.get("text_hash"):
+            self._by_text_hash.get(previous["text_hash"], set()).discard(audio_path)
+        
+        self._by_audio_path[audio_path] = record
+        
+        text_hash = record.get("text_hash")
+        if text_hash:
+            self._by_text_hash.setdefault(text_hash, set()).add(audio_path)
+    
+    def append(self, record):
+        """
+        Ajoute un enregistrement au journal via le tampon d'écriture
+        
+        Args:
+            record (dict): Métadonnées de synthèse (doit contenir "audio_path")
+        """
+        self._index(record)
+        self._buffer.append(record)
+        
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        """
+        Écrit les enregistrements en attente à la fin du journal
+        """
+        _append_records(self.log_path, self._buffer)
+    
+    def get(self, audio_path):
+        """
+        Récupère les métadonnées d'un fichier audio
+        
+        Args:
+            audio_path (str): Chemin vers le fichier audio
+        
+        Returns:
+            dict: Métadonnées, ou None si le fichier est inconnu
+        """
+        return self._by_audio_path.get(audio_path)
+    
+    def find_by_text(self, text=None, text_hash=None):
+        """
+        Recherche les fichiers audio synthétisés à partir d'un même texte
+        
+        Args:
+            text (str, optional): Texte complet
+            text_hash (str, optional): Empreinte du texte, si déjà calculée
+        
+        Returns:
+            list: Métadonnées des fichiers audio correspondants
+        """
+        text_hash = text_hash or hash_text(text)
+        return [self._by_audio_path[path] for path in sorted(self._by_text_hash.get(text_hash, ()))]
+    
+    def records(self):
+        """
+        Renvoie le dernier enregistrement connu pour chaque fichier audio
+        
+        Returns:
+            list: Liste des métadonnées
+        """
+        return list(self._by_audio_path.values())
+    
+    def __len__(self):
+        """
+        Returns:
+            int: Nombre de fichiers audio référencés
+        """
+        return len(self._by_audio_path)
+    
+    def compact(self, drop_missing=False):
+        """
+        Réécrit le journal en ne gardant que le dernier enregistrement par fichier audio
+        
+        Le journal est relu sous verrou, pour conserver les lignes ajoutées par d'autres processus.
+        
+        Args:
+            drop_missing (bool, optional): Supprimer les entrées dont le fichier audio n'existe plus. Par défaut False
+        
+        Returns:
+            dict: Nombre de lignes avant et après compaction
+        """
+        self.flush()
+        
+        with _log_lock(self.log_path):
+            lines_before = 0
+            if os.path.exists(self.log_path):
+                with open(self.log_path, 'r', encoding='utf-8') as f:
+                    lines_before = sum(1 for line in f if line.strip())
+            
+            # Reconstruire les index à partir du journal, qui fait foi
+            self._by_audio_path = {}
+            self._by_text_hash = {}
+            self._load()
+            
+            if drop_missing:
+                for audio_path in [path for path in self._by_audio_path if not os.path.exists(path)]:
+                    record = self._by_audio_path.pop(audio_path)
+                    self._by_text_hash.get(record.get("text_hash"), set()).discard(audio_path)
+            
+            # Écriture dans un fichier temporaire puis remplacement atomique
+            temp_path = self.log_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for record in self._by_audio_path.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(temp_path, self.log_path)
+        
+        return {"lines_before": lines_before, "lines_after": len(self._by_audio_path)}
+    
+    def import_sidecars(self, directory, remove=False):
+        """
+        Importe les anciens fichiers de métadonnées individuels (*.wav.json) dans le journal
+        
+        Args:
+            directory (str): Répertoire contenant les fichiers audio et leurs métadonnées
+            remove (bool, optional): Supprimer les fichiers importés. Par défaut False
+        
+        Returns:
+            int: Nombre de fichiers importés
+        """
+        imported = 0
+        
+        if not os.path.isdir(directory):
+            return imported
+        
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(SIDECAR_SUFFIX):
+                continue
+            
+            sidecar_path = os.path.join(directory, filename)
+            try:
+                with open(sidecar_path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                print(f"Métadonnées illisibles ignorées: {sidecar_path}")
+                continue
+            
+            record.setdefault("audio_path", sidecar_path[:-len(".json")])
+            self.append(record)
+            imported += 1
+            
+            if remove:
+                os.remove(sidecar_path)
+        
+        self.flush()
+        return imported
+
+
+def main(argv=None):
+    """
+    Point d'entrée en ligne de commande: compaction du journal et migration des anciens fichiers
+    
+    Args:
+        argv (list, optional): Arguments de la ligne de commande
+    """
+    parser = argparse.ArgumentParser(description="Gestion du journal des métadonnées TTS")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    compact_parser = subparsers.add_parser("compact", help="Compacter le journal")
+    compact_parser.add_argument("log_path", help="Chemin du journal")
+    compact_parser.add_argument("--drop-missing", action="store_true",
+                                help="Supprimer les entrées dont le fichier audio n'existe plus")
+    
+    migrate_parser = subparsers.add_parser("migrate", help="Importer les fichiers *.wav.json")
+    migrate_parser.add_argument("audio_dir", help="Répertoire audio contenant les anciens fichiers")
+    migrate_parser.add_argument("--log-path", help="Chemin du journal (par défaut dans le répertoire audio)")
+    migrate_parser.add_argument("--remove", action="store_true", help="Supprimer les fichiers importés")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "compact":
+        stats = SpeechMetadataLog(args.log_path).compact(drop_missing=args.drop_missing)
+        print(f"Journal compacté: {stats['lines_before']} -> {stats['lines_after']} lignes")
+    else:
+        log_path = args.log_path or os.path.join(args.audio_dir, DEFAULT_LOG_FILENAME)
+        imported = SpeechMetadataLog(log_path).import_sidecars(args.audio_dir, remove=args.remove)
+        print(f"{imported} fichiers de métadonnées importés dans {log_path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -4,22 +4,28 @@ Ce module utilise Kokoro TTS pour convertir les scripts en voix off naturelles
 """
 
 import os
-import json
 import torch
 import torchaudio
 import time
 from datetime import datetime
 
+from .duration_estimator import DurationEstimator
+from .alignment import AlignmentTrack, ALIGNMENT_SUFFIX
+from .metadata_log import SpeechMetadataLog, DEFAULT_LOG_FILENAME, hash_text
+from .voice_registry import VoiceRegistry
+from .audio_postprocess import AudioPostProcessor
+
 class TTSEngine:
     """Classe pour la synthèse vocale utilisant Kokoro TTS"""
     
-    def __init__(self, models_dir=None, output_dir=None):
+    def __init__(self, models_dir=None, output_dir=None, post_process=True):
         """
         Initialise le moteur de synthèse vocale
         
         Args:
             models_dir (str, optional): Répertoire contenant les modèles TTS
             output_dir (str, optional): Répertoire de sortie pour les fichiers audio
+            post_process (bool, optional): Normaliser le volume et couper les silences après synthèse. Par défaut True
         """
         self.models_dir = models_dir or os.path.join(os.path.dirname(__file__), '../../models/tts_models')
         self.output_dir = output_dir or os.path.join(os.path.dirname(__file__), '../../data/audio')
@@ -30,48 +36,36 @@ class TTSEngine:
         
         # Initialiser le modèle TTS
         self.model = None
+        self.voice_registry = VoiceRegistry(self.models_dir)
         self.available_voices = self._get_available_voices()
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        # Journal unique des métadonnées de synthèse
+        self.metadata_log = SpeechMetadataLog(os.path.join(self.output_dir, DEFAULT_LOG_FILENAME))
+        
+        # Journal absent: reprendre une seule fois les anciens fichiers *.wav.json du répertoire
+        if not os.path.exists(self.metadata_log.log_path):
+            self.metadata_log.import_sidecars(self.output_dir)
+        
+        # Estimateur de durée, calibré à partir des synthèses précédentes
+        self.duration_estimator = DurationEstimator(self.available_voices)
+        self.duration_estimator.calibrate(self.metadata_log.records())
+        
+        # Normalisation du volume et suppression des silences
+        self.post_process = post_process
+        self.post_processor = AudioPostProcessor()
     
     def _get_available_voices(self):
         """
         Récupère la liste des voix disponibles
         
+        Le catalogue est lu depuis le cache du registre de voix; le répertoire des modèles
+        n'est rescanné que si un manifeste a été ajouté, modifié ou supprimé.
+        
         Returns:
             dict: Dictionnaire des voix disponibles
         """
-        # Dans une implémentation réelle, cette méthode scannerait le répertoire des modèles
-        # Pour cette démonstration, nous définissons des voix prédéfinies
-        return {
-            "male_professional": {
-                "name": "Male Professional",
-                "gender": "male",
-                "style": "professional",
-                "language": "en-US",
-                "description": "Voix masculine professionnelle, idéale pour les sujets business et technologie"
-            },
-            "female_professional": {
-                "name": "Female Professional",
-                "gender": "female",
-                "style": "professional",
-                "language": "en-US",
-                "description": "Voix féminine professionnelle, idéale pour les sujets business et éducation"
-            },
-            "male_casual": {
-                "name": "Male Casual",
-                "gender": "male",
-                "style": "casual",
-                "language": "en-US",
-                "description": "Voix masculine décontractée, idéale pour les sujets lifestyle et divertissement"
-            },
-            "female_casual": {
-                "name": "Female Casual",
-                "gender": "female",
-                "style": "casual",
-                "language": "en-US",
-                "description": "Voix féminine décontractée, idéale pour les sujets lifestyle et santé"
-            }
-        }
+        return self.voice_registry.get_voices()
     
     def _load_model(self):
         """
@@ -137,13 +131,24 @@ class TTSEngine:
         # audio = self.model.synthesize(text, voice=voice_id)
         # torchaudio.save(output_path, audio, 24000)
         
-        # Pour la démonstration, nous créons un fichier audio vide
-        self._create_dummy_audio_file(output_path, duration_seconds=len(text) * 0.05)
+        # Pour la démonstration, nous créons un fichier audio vide de la durée estimée
+        estimated_duration = self.estimate_duration(text, voice_id)
+        self._create_dummy_audio_file(output_path, duration_seconds=estimated_duration)
+        
+        # Uniformiser le volume et les silences avant le montage vidéo
+        post_stats = None
+        if self.post_process:
+            post_stats = self.post_processor.process_file(output_path)
         
         print(f"Voix off générée et sauvegardée dans: {output_path}")
         
+        # Sauvegarder la synchronisation mot à mot pour les sous-titres
+        # Dans une implémentation réelle, les durées par phonème renvoyées par Kokoro remplaceraient l'estimation
+        audio_duration = self._get_audio_duration(output_path)
+        alignment_path = self._save_alignment(text, voice_id, output_path, audio_duration, post_stats)
+        
         # Sauvegarder les métadonnées
-        self._save_speech_metadata(text, voice_id, output_path)
+        self._save_speech_metadata(text, voice_id, output_path, estimated_duration, audio_duration, alignment_path)
         
         return output_path
     
@@ -163,7 +168,58 @@ class TTSEngine:
         # Sauvegarder le fichier audio
         torchaudio.save(file_path, dummy_audio, sample_rate)
     
-    def _save_speech_metadata(self, text, voice_id, audio_path):
+    def _get_audio_duration(self, audio_path):
+        """
+        Lit la durée réelle d'un fichier audio dans son en-tête
+        
+        Args:
+            audio_path (str): Chemin vers le fichier audio
+            
+        Returns:
+            float: Durée en secondes
+        """
+        audio_info = torchaudio.info(audio_path)
+        return audio_info.num_frames / audio_info.sample_rate
+    
+    def _save_alignment(self, text, voice_id, audio_path, audio_duration, post_stats=None):
+        """
+        Sauvegarde la piste de synchronisation mot à mot à côté du fichier audio
+        
+        Args:
+            text (str): Texte utilisé pour la synthèse
+            voice_id (str): Identifiant de la voix utilisée
+            audio_path (str): Chemin vers le fichier audio généré
+            audio_duration (float): Durée réelle de l'audio en secondes
+            post_stats (dict, optional): Statistiques renvoyées par le post-traitement
+            
+        Returns:
+            str: Chemin vers le fichier d'alignement
+        """
+        # Seuls les silences réellement posés par le post-traitement sont exclus du recalage
+        post_stats = post_stats or {}
+        track = AlignmentTrack.from_text(text, self.duration_estimator, voice_id, audio_duration, audio_path,
+                                         post_stats.get("lead_pause", 0.0), post_stats.get("trail_pause", 0.0))
+        alignment_path = audio_path + ALIGNMENT_SUFFIX
+        track.save(alignment_path)
+        return alignment_path
+    
+    def get_alignment(self, audio_path):
+        """
+        Charge la piste de synchronisation mot à mot d'un fichier audio
+        
+        Args:
+            audio_path (str): Chemin vers le fichier audio
+            
+        Returns:
+            AlignmentTrack: Piste d'alignement, ou None si elle n'existe pas
+        """
+        alignment_path = audio_path + ALIGNMENT_SUFFIX
+        if not os.path.exists(alignment_path):
+            return None
+        return AlignmentTrack.load(alignment_path)
+    
+    def _save_speech_metadata(self, text, voice_id, audio_path, estimated_duration=None,
+                              audio_duration=None, alignment_path=None):
         """
         Sauvegarde les métadonnées de la synthèse vocale
         
@@ -171,22 +227,72 @@ class TTSEngine:
             text (str): Texte utilisé pour la synthèse
             voice_id (str): Identifiant de la voix utilisée
             audio_path (str): Chemin vers le fichier audio généré
+            estimated_duration (float, optional): Durée prédite avant la synthèse, utilisée pour la calibration
+            audio_duration (float, optional): Durée réelle de l'audio. Si None, elle est lue dans le fichier
+            alignment_path (str, optional): Chemin vers la piste de synchronisation mot à mot
         """
+        if audio_duration is None:
+            audio_duration = self._get_audio_duration(audio_path)
+        
         metadata = {
             "text": text[:100] + "..." if len(text) > 100 else text,  # Tronquer le texte pour la lisibilité
+            "text_hash": hash_text(text),
             "voice_id": voice_id,
             "voice_name": self.available_voices[voice_id]["name"],
             "audio_path": audio_path,
             "timestamp": datetime.now().isoformat(),
-            "duration_seconds": os.path.getsize(audio_path) / (24000 * 2)  # Estimation approximative
+            "duration_seconds": audio_duration,
+            "estimated_duration_seconds": estimated_duration,
+            "alignment_path": alignment_path,
+            "calibration_factor": self.duration_estimator.calibration.get(voice_id, 1.0)
         }
         
-        # Chemin du fichier de métadonnées
-        metadata_path = audio_path + ".json"
+        # Ajouter les métadonnées au journal (écriture tamponnée)
+        self.metadata_log.append(metadata)
+    
+    def get_speech_metadata(self, audio_path):
+        """
+        Récupère les métadonnées d'un fichier audio généré
         
-        # Sauvegarder les métadonnées
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+        Args:
+            audio_path (str): Chemin vers le fichier audio
+            
+        Returns:
+            dict: Métadonnées, ou None si le fichier est inconnu
+        """
+        return self.metadata_log.get(audio_path)
+    
+    def estimate_duration(self, text, voice_id="male_professional"):
+        """
+        Estime la durée de la voix off d'un texte sans lancer la synthèse
+        
+        Args:
+            text (str): Texte à convertir en voix
+            voice_id (str, optional): Identifiant de la voix. Par défaut "male_professional"
+            
+        Returns:
+            float: Durée estimée en secondes
+        """
+        return self.duration_estimator.estimate(text, voice_id)
+    
+    def estimate_script_durations(self, script_sections, voice_id="male_professional"):
+        """
+        Estime la durée de chaque section d'un script, après prétraitement TTS
+        
+        Permet de planifier la chronologie vidéo et la capacité de rendu avant la fin de la synthèse.
+        
+        Args:
+            script_sections (dict): Sections du script
+            voice_id (str, optional): Identifiant de la voix. Par défaut "male_professional"
+            
+        Returns:
+            dict: Durées ("durations"), positions de départ ("offsets") et durée totale ("total")
+        """
+        processed_sections = {
+            section_name: self.process_script_for_tts(text)
+            for section_name, text in script_sections.items()
+        }
+        return self.duration_estimator.estimate_sections(processed_sections, voice_id)
     
     def get_voice_recommendations(self, category, subcategory):
         """
@@ -199,17 +305,7 @@ class TTSEngine:
         Returns:
             list: Liste des voix recommandées
         """
-        # Recommandations par catégorie
-        recommendations = {
-            "finance": ["male_professional", "female_professional"],
-            "technology": ["male_professional", "male_casual"],
-            "health": ["female_professional", "female_casual"],
-            "business": ["male_professional", "female_professional"],
-            "education": ["female_professional", "male_professional"]
-        }
-        
-        # Retourner les recommandations pour la catégorie ou une liste par défaut
-        return recommendations.get(category, ["male_professional", "female_casual"])
+        return self.voice_registry.recommend(category, subcategory)
     
     def process_script_for_tts(self, script_text):
         """
@@ -248,6 +344,19 @@ class TTSEngine:
         
         return processed_text
     
+    def postprocess_directory(self, directory=None, workers=None):
+        """
+        Applique la normalisation du volume et la suppression des silences à tout un répertoire
+        
+        Args:
+            directory (str, optional): Répertoire audio. Par défaut le répertoire de sortie
+            workers (int, optional): Nombre de processus. Par défaut le nombre de cœurs
+            
+        Returns:
+            dict: Statistiques par fichier
+        """
+        return self.post_processor.process_directory(directory or self.output_dir, workers=workers)
+    
     def batch_generate_speech(self, script_sections, voice_id="male_professional"):
         """
         Génère des fichiers audio pour chaque section d'un script
@@ -276,4 +385,29 @@ class TTSEngine:
             # Stocker le chemin
             audio_paths[section_name] = audio_path
         
+        # Écrire les métadonnées du lot en une seule fois
+        self.metadata_log.flush()
+        
         return audio_paths
+    
+    def assemble_sections(self, audio_paths, output_filename=None, pause_seconds=0.5):
+        """
+        Assemble les fichiers audio des sections en une seule narration
+        
+        Les positions renvoyées sont celles des sections dans la narration: transmises à
+        VideoProducer.create_video (section_offsets), elles calent les sections de la vidéo sur la voix.
+        
+        Args:
+            audio_paths (dict): Chemins audio par section, dans l'ordre de lecture (batch_generate_speech)
+            output_filename (str, optional): Nom du fichier de la narration
+            pause_seconds (float, optional): Pause entre deux sections. Par défaut 0.5
+        
+        Returns:
+            dict: Chemin de la narration ("audio_path") et position de départ de chaque section ("offsets")
+        """
+        if output_filename is None:
+            output_filename = f"narration_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+        output_path = os.path.join(self.output_dir, output_filename)
+        
+        starts = self.post_processor.concatenate(list(audio_paths.values()), output_path, pause_seconds)
+        return {"audio_path": output_path, "offsets": dict(zip(audio_paths, starts))}
@@ -0,0 +1,282 @@
+"""
+Module de catalogue des voix pour AutoTubeCPM
+Ce module découvre les voix installées dans le répertoire des modèles et maintient
+un index en cache pour les recommandations
+"""
+
+import os
+import json
+import math
+
+# Nom du manifeste décrivant une voix dans son sous-répertoire
+VOICE_MANIFEST_FILENAME = "voice.json"
+
+# Emplacement du cache du catalogue, dans un sous-répertoire pour que son écriture
+# ne modifie pas la date du répertoire des modèles
+CATALOG_CACHE_PATH = os.path.join(".cache", "voice_catalog.json")
+
+# Version du format de cache (à incrémenter si la structure change)
+CATALOG_CACHE_VERSION = 2
+
+# Voix livrées avec le projet; les manifestes du répertoire des modèles les complètent ou les remplacent.
+# "categories" associe une catégorie de contenu à un score de pertinence utilisé pour les recommandations.
+DEFAULT_VOICES = {
+    "male_professional": {
+        "name": "Male Professional",
+        "gender": "male",
+        "style": "professional",
+        "language": "en-US",
+        "words_per_minute": 150,
+        "description": "Voix masculine professionnelle, idéale pour les sujets business et technologie",
+        "categories": {"finance": 1.0, "technology": 1.0, "business": 1.0, "education": 0.9, "default": 1.0}
+    },
+    "female_professional": {
+        "name": "Female Professional",
+        "gender": "female",
+        "style": "professional",
+        "language": "en-US",
+        "words_per_minute": 155,
+        "description": "Voix féminine professionnelle, idéale pour les sujets business et éducation",
+        "categories": {"finance": 0.9, "health": 1.0, "business": 0.9, "education": 1.0}
+    },
+    "male_casual": {
+        "name": "Male Casual",
+        "gender": "male",
+        "style": "casual",
+        "language": "en-US",
+        "words_per_minute": 165,
+        "description": "Voix masculine décontractée, idéale pour les sujets lifestyle et divertissement",
+        "categories": {"technology": 0.9}
+    },
+    "female_casual": {
+        "name": "Female Casual",
+        "gender": "female",
+        "style": "casual",
+        "language": "en-US",
+        "words_per_minute": 170,
+        "description": "Voix féminine décontractée, idéale pour les sujets lifestyle et santé",
+        "categories": {"health": 0.9, "default": 0.9}
+    }
+}
+
+
+class VoiceRegistry:
+    """Classe pour découvrir, indexer et recommander les voix disponibles"""
+    
+    def __init__(self, models_dir, cache_path=None):
+        """
+        Initialise le catalogue et le charge depuis le cache s'il est encore valide
+        
+        Args:
+            models_dir (str): Répertoire contenant les modèles et manifestes de voix
+            cache_path (str, optional): Chemin du cache. Par défaut dans le répertoire des modèles
+        """
+        self.models_dir = models_dir
+        self.cache_path = cache_path or os.path.join(models_dir, CATALOG_CACHE_PATH)
+        
+        self.voices = {}
+        self.category_index = {}
+        self._manifest_mtimes = {}
+        self._directory_mtimes = {}
+        self._unit_embeddings = {}
+        
+        if not self._load_cache():
+            self.refresh()
+    
+    def _models_dir_mtime(self):
+        """
+        Returns:
+            float: Date de modification du répertoire des modèles (0 s'il n'existe pas)
+        """
+        try:
+            return os.stat(self.models_dir).st_mtime
+        except OSError:
+            return 0.0
+    
+    def _load_cache(self):
+        """
+        Charge le catalogue depuis le cache si aucun manifeste n'a changé
+        
+        La validation ne fait qu'un appel à stat par manifeste connu et par sous-répertoire de
+        voix (qui change lorsqu'un manifeste y est ajouté), plus un pour le répertoire des
+        modèles (qui change lorsqu'un sous-répertoire est ajouté ou supprimé).
+        
+        Returns:
+            bool: True si le cache était valide et a été chargé
+        """
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        if cache.get("version") != CATALOG_CACHE_VERSION:
+            return False
+        if cache.get("models_dir_mtime") != self._models_dir_mtime():
+            return False
+        
+        for path, mtime in list(cache.get("manifests", {}).items()) + list(cache.get("directories", {}).items()):
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return False
+            except OSError:
+                return False
+        
+        self.voices = cache["voices"]
+        self.category_index = cache["category_index"]
+        self._manifest_mtimes = cache["manifests"]
+        self._directory_mtimes = cache["directories"]
+        self._build_embeddings()
+        return True
+    
+    def _save_cache(self):
+        """
+        Sauvegarde le catalogue et les dates de modification des manifestes
+        """
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        except OSError as e:
+            print(f"Impossible d'écrire le cache du catalogue de voix: {e}")
+            return
+        
+        cache = {
+            "version": CATALOG_CACHE_VERSION,
+            "models_dir_mtime": self._models_dir_mtime(),
+            "manifests": self._manifest_mtimes,
+            "directories": self._directory_mtimes,
+            "voices": self.voices,
+            "category_index": self.category_index
+        }
+        
+        temp_path = self.cache_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Impossible d'écrire le cache du catalogue de voix: {e}")
+    
+    def refresh(self):
+        """
+        Scanne le répertoire des modèles, lit les manifestes et reconstruit l'index
+        
+        Returns:
+            dict: Voix disponibles
+        """
+        voices = {voice_id: dict(voice) for voice_id, voice in DEFAULT_VOICES.items()}
+        manifest_mtimes = {}
+        directory_mtimes = {}
+        cache_dir = os.path.abspath(os.path.dirname(self.cache_path))
+        
+        if os.path.isdir(self.models_dir):
+            for entry in sorted(os.listdir(self.models_dir)):
+                directory = os.path.join(self.models_dir, entry)
+                # Le répertoire du cache change à chaque sauvegarde: il ne sert pas à la validation
+                if not os.path.isdir(directory) or os.path.abspath(directory) == cache_dir:
+                    continue
+                directory_mtimes[directory] = os.stat(directory).st_mtime
+                
+                manifest_path = os.path.join(directory, VOICE_MANIFEST_FILENAME)
+                if not os.path.isfile(manifest_path):
+                    continue
+                
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError):
+                    print(f"Manifeste de voix invalide ignoré: {manifest_path}")
+                    continue
+                
+                voice_id = manifest.pop("id", entry)
+                manifest["model_path"] = os.path.join(self.models_dir, entry)
+                voices[voice_id] = manifest
+                manifest_mtimes[manifest_path] = os.stat(manifest_path).st_mtime
+        
+        self.voices = voices
+        self._manifest_mtimes = manifest_mtimes
+        self._directory_mtimes = directory_mtimes
+        self.category_index = self._build_category_index(voices)
+        self._build_embeddings()
+        self._save_cache()
+        
+        return self.voices
+    
+    def _build_category_index(self, voices):
+        """
+        Construit l'index catégorie -> voix triées par pertinence
+        
+        Args:
+            voices (dict): Voix disponibles
+        
+        Returns:
+            dict: Identifiants de voix par catégorie, du plus au moins pertinent
+        """
+        scored = {}
+        for voice_id, voice in voices.items():
+            for category, score in voice.get("categories", {}).items():
+                scored.setdefault(category, []).append((score, voice_id))
+        
+        return {
+            category: [voice_id for _, voice_id in sorted(entries, key=lambda e: (-e[0], e[1]))]
+            for category, entries in scored.items()
+        }
+    
+    def _build_embeddings(self):
+        """
+        Normalise les vecteurs de voix fournis par les manifestes pour la recherche par similarité
+        """
+        self._unit_embeddings = {}
+        for voice_id, voice in self.voices.items():
+            embedding = voice.get("embedding")
+            if not embedding:
+                continue
+            norm = math.sqrt(sum(value * value for value in embedding))
+            if norm:
+                self._unit_embeddings[voice_id] = [value / norm for value in embedding]
+    
+    def get_voices(self):
+        """
+        Returns:
+            dict: Voix disponibles, indexées par identifiant
+        """
+        return self.voices
+    
+    def recommend(self, category, subcategory=None):
+        """
+        Recommande des voix pour une catégorie de contenu par simple lecture de l'index
+        
+        Args:
+            category (str): Catégorie principale
+            subcategory (str, optional): Sous-catégorie, prioritaire si elle est indexée
+        
+        Returns:
+            list: Identifiants des voix recommandées
+        """
+        for key in (subcategory, category, "default"):
+            if key and key in self.category_index:
+                return list(self.category_index[key])
+        return list(self.voices)[:2]
+    
+    def similar_voices(self, voice_id, count=3):
+        """
+        Trouve les voix les plus proches d'une voix donnée selon leurs vecteurs
+        
+        Args:
+            voice_id (str): Identifiant de la voix de référence
+            count (int, optional): Nombre de voix à renvoyer. Par défaut 3
+        
+        Returns:
+            list: Identifiants des voix les plus similaires (vide si aucun vecteur n'est disponible)
+        """
+        reference = self._unit_embeddings.get(voice_id)
+        if reference is None:
+            return []
+        
+        similarities = []
+        for other_id, embedding in self._unit_embeddings.items():
+            if other_id == voice_id or len(embedding) != len(reference):
+                continue
+            similarities.append((sum(a * b for a, b in zip(reference, embedding)), other_id))
+        
+        similarities.sort(key=lambda s: (-s[0], s[1]))
+        return [other_id for _, other_id in similarities[:count]]
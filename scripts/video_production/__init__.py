@@ -3,5 +3,27 @@ Module d'initialisation pour le package de production vidéo
 """
 
 from .video_producer import VideoProducer
+from .ffmpeg_backend import FFmpegRenderer
+from .text_cache import TextBitmapCache
+from .segment_cache import SegmentCache
+from .render_profiler import RenderProfiler
+from .render_profiles import RenderProfile, get_render_profile, benchmark_render_profiles
+from .stock_media import StockMediaLibrary
+from .asset_normalizer import AssetNormalizer
+from .timeline import Timeline, Track, TimelineItem
+from .chunked_render import ChunkedRenderer
+from .animation import SectionAnimator, benchmark_animation
+from .compositor import FrameWriter, TimelineCompositor
+from .subtitles import SubtitleTrack
+from .output_formats import OutputFormat, get_output_format
+from .thumbnail_generator import ThumbnailGenerator
+from .keyframe_index import KeyframeIndex
+from .audio_timing import detect_pauses, plan_section_starts
+from .render_queue import RenderBroker, SQLiteRenderBroker, RenderWorker, render_job
 
-__all__ = ['VideoProducer']
+__all__ = ['VideoProducer', 'FFmpegRenderer', 'TextBitmapCache', 'SegmentCache', 'RenderProfiler',
+           'RenderProfile', 'get_render_profile', 'benchmark_render_profiles', 'StockMediaLibrary',
+           'AssetNormalizer', 'Timeline', 'Track', 'TimelineItem', 'ChunkedRenderer',
+           'SectionAnimator', 'benchmark_animation', 'FrameWriter', 'TimelineCompositor',
+           'SubtitleTrack', 'OutputFormat', 'get_output_format', 'ThumbnailGenerator', 'KeyframeIndex',
+           'detect_pauses', 'plan_section_starts', 'RenderBroker', 'SQLiteRenderBroker', 'RenderWorker', 'render_job']
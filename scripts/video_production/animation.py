@@ -0,0 +1,349 @@
+"""
+Module d'animation vectorisée pour AutoTubeCPM
+Ce module précalcule avec NumPy les courbes de position, d'opacité et de luminosité de chaque
+calque d'une section, puis compose les images par copie de tranches dans un tampon préalloué,
+sans appeler de fonction Python par calque et par image comme le chemin générique de MoviePy
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+# Types d'éléments que l'animateur sait composer (les vidéos passent par MoviePy)
+ANIMATED_KINDS = ("color", "text", "image")
+
+
+def bounce_curve(times, base_y, amplitude, period):
+    """
+    Calcule le rebond parabolique d'un calque pour toutes les images
+    
+    Args:
+        times (numpy.ndarray): Instants locaux au calque, en secondes
+        base_y (float): Ordonnée de base
+        amplitude (float): Amplitude du rebond
+        period (float): Période en secondes
+    
+    Returns:
+        numpy.ndarray: Ordonnées, y = base + amplitude * ((t mod période) - période/2)^2
+    """
+    return base_y + amplitude * (np.mod(times, period) - period / 2) ** 2
+
+
+def fade_curves(effects, times, duration):
+    """
+    Calcule les courbes de fondu d'un calque pour toutes les images
+    
+    Comme les effets de MoviePy, "fadein"/"fadeout" assombrissent vers le noir (luminosité)
+    et "crossfadein"/"crossfadeout" jouent sur la transparence (opacité).
+    
+    Args:
+        effects (list): Effets du calque ({"name": ..., "duration": ...})
+        times (numpy.ndarray): Instants locaux au calque, en secondes
+        duration (float): Durée du calque en secondes
+    
+    Returns:
+        tuple: (opacité, luminosité), tableaux de même forme que times, entre 0 et 1
+    """
+    opacity = np.ones_like(times)
+    gain = np.ones_like(times)
+    for effect in effects or []:
+        fade_duration = min(effect["duration"], duration)
+        if effect["name"].endswith("in"):
+            ramp = np.clip(times / fade_duration, 0, 1)
+        else:
+            ramp = np.clip((duration - times) / fade_duration, 0, 1)
+        if effect["name"].startswith("crossfade"):
+            opacity *= ramp
+        else:
+            gain *= ramp
+    return opacity, gain
+
+
+class _LayerAnimation:
+    """Courbes précalculées et image d'un calque, prêtes à être copiées dans le tampon"""
+    
+    def __init__(self, item, origin, frame_count, resolution, fps, bitmap):
+        """
+        Précalcule les courbes du calque sur les images où il est visible
+        
+        Args:
+            item (TimelineItem): Élément de la chronologie
+            origin (float): Début de la section
+            frame_count (int): Nombre d'images de la section
+            resolution (tuple): Résolution de la vidéo
+            fps (int): Images par seconde
+            bitmap (numpy.ndarray): Image RGB ou RGBA du calque, None pour un aplat de couleur
+        """
+        width, height = resolution
+        start = item.start - origin
+        end = start + item.duration
+        fields = item.fields
+        
+        # Images où le calque est visible (début inclus, fin exclue, comme MoviePy)
+        self.first = max(0, int(np.ceil(start * fps - 1e-6)))
+        self.last = min(frame_count, int(np.ceil(end * fps - 1e-6)))
+        times = np.arange(self.first, self.last, dtype=np.float64) / fps - start
+        self.opacity, self.gain = fade_curves(fields.get("effects"), times, item.duration)
+        
+        if bitmap is None:
+            # Aplat: image pleine remplie une seule fois, pondérée à chaque image par
+            # le produit de la luminosité et de l'opacité, le fond étant conservé selon l'opacité
+            self.solid = np.empty((height, width, 3), dtype=np.float32)
+            self.solid[...] = np.asarray(fields["color"], dtype=np.float32)
+            self.weight = (self.opacity * self.gain).astype(np.float32)
+            self.keep = (1 - self.opacity).astype(np.float32)
+            self.rgb = None
+            return
+        
+        self.solid = None
+        self.rgb = bitmap[..., :3].astype(np.float32)
+        self.mask = bitmap[..., 3:4].astype(np.float32) / 255 if bitmap.shape[2] == 4 else None
+        layer_height, layer_width = self.rgb.shape[:2]
+        
+        x, y = fields.get("position", ["center", "center"])
+        x = (width - layer_width) / 2 if x == "center" else x
+        y = (height - layer_height) / 2 if y == "center" else y
+        motion = fields.get("motion")
+        if motion and motion["type"] == "bounce":
+            ys = bounce_curve(times + fields.get("offset", 0), motion["base_y"], motion["amplitude"], motion["period"])
+        else:
+            ys = np.full(times.shape, y, dtype=np.float64)
+        # Positions entières tronquées, comme le collage de MoviePy
+        xs = np.full(times.shape, int(x), dtype=np.int64)
+        ys = ys.astype(np.int64)
+        
+        # Zones de destination et de source, rognées au cadre, pour toutes les images
+        self.dst_x0 = np.clip(xs, 0, width)
+        self.dst_x1 = np.clip(xs + layer_width, 0, width)
+        self.dst_y0 = np.clip(ys, 0, height)
+        self.dst_y1 = np.clip(ys + layer_height, 0, height)
+        self.src_x0 = self.dst_x0 - xs
+        self.src_y0 = self.dst_y0 - ys
+        self.opaque = (self.opacity == 1) & (self.gain == 1)
+
+
+class SectionAnimator:
+    """Classe pour composer les images d'une section à partir de courbes précalculées"""
+    
+    def __init__(self, items, origin, duration, resolution, fps, text_cache):
+        """
+        Prépare les images et les courbes des calques d'une section
+        
+        Args:
+            items (list): Éléments visuels de la section, du fond au premier plan
+            origin (float): Début de la section dans la vidéo
+            duration (float): Durée de la section en secondes
+            resolution (tuple): Résolution de la vidéo
+            fps (int): Images par seconde
+            text_cache (TextBitmapCache): Cache des images de texte
+        """
+        self.resolution = tuple(resolution)
+        self.fps = fps
+        self.frame_count = max(1, int(np.ceil(duration * fps - 1e-6)))
+        width, height = self.resolution
+        
+        self.layers = []
+        for item in items:
+            if item.kind not in ANIMATED_KINDS:
+                raise ValueError(f"Type d'élément non pris en charge par l'animateur: {item.kind}")
+            if item.kind == "text":
+                bitmap = text_cache.get_array(item.fields["text"], item.fields["style"])
+            elif item.kind == "image":
+                with Image.open(item.fields["path"]) as image:
+                    bitmap = np.asarray(image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB"))
+            else:
+                bitmap = None
+            layer = _LayerAnimation(item, origin, self.frame_count, self.resolution, fps, bitmap)
+            if layer.last > layer.first:
+                self.layers.append(layer)
+        
+        # Tampons alloués une seule fois: composition en flottants, image livrée en octets,
+        # espace de travail à la taille du plus grand calque
+        self._canvas = np.zeros((height, width, 3), dtype=np.float32)
+        self._frame = np.zeros((height, width, 3), dtype=np.uint8)
+        scratch_height = max([layer.rgb.shape[0] for layer in self.layers if layer.rgb is not None] or [1])
+        scratch_width = max([layer.rgb.shape[1] for layer in self.layers if layer.rgb is not None] or [1])
+        self._scratch = np.zeros((scratch_height, scratch_width, 3), dtype=np.float32)
+        self._scratch_mask = np.zeros((scratch_height, scratch_width, 1), dtype=np.float32)
+    
+    def frame_index(self, t):
+        """
+        Args:
+            t (float): Instant local à la section, en secondes
+        
+        Returns:
+            int: Indice de l'image la plus proche
+        """
+        return min(self.frame_count - 1, max(0, int(t * self.fps + 0.5)))
+    
+    def render_frame(self, index):
+        """
+        Compose une image dans le tampon préalloué
+        
+        Comme MoviePy, le résultat est tronqué à l'octet après chaque calque composé avec
+        transparence, pour que les images des deux chemins soient identiques.
+        
+        Args:
+            index (int): Indice de l'image dans la section
+        
+        Returns:
+            numpy.ndarray: Image RGB (hauteur, largeur, 3), réécrite à l'appel suivant
+        """
+        canvas = self._canvas
+        # Fond noir, sauf si le premier calque visible est un aplat opaque qui le recouvre
+        first = next((layer for layer in self.layers if layer.first <= index < layer.last), None)
+        if first is None or first.rgb is not None or first.keep[index - first.first]:
+            canvas.fill(0)
+        for layer in self.layers:
+            if not layer.first <= index < layer.last:
+                continue
+            i = index - layer.first
+            
+            if layer.rgb is None:
+                # Aplat plein cadre: fond * conservation + couleur * poids, en opérations contiguës
+                keep, weight = layer.keep[i], layer.weight[i]
+                if not keep and weight == 1:
+                    np.copyto(canvas, layer.solid)
+                    continue
+                if not keep:
+                    np.multiply(layer.solid, weight, out=canvas)
+                elif weight:
+                    canvas *= keep / weight
+                    canvas += layer.solid
+                    canvas *= weight
+                else:
+                    canvas *= keep
+                np.trunc(canvas, out=canvas)
+                continue
+            
+            y0, y1 = layer.dst_y0[i], layer.dst_y1[i]
+            x0, x1 = layer.dst_x0[i], layer.dst_x1[i]
+            if y1 <= y0 or x1 <= x0:
+                continue
+            sy0, sx0 = layer.src_y0[i], layer.src_x0[i]
+            h, w = y1 - y0, x1 - x0
+            dst = canvas[y0:y1, x0:x1]
+            src = layer.rgb[sy0:sy0 + h, sx0:sx0 + w]
+            
+            if layer.mask is None and layer.opaque[i]:
+                dst[...] = src
+                continue
+            
+            # dst += (src * luminosité - dst) * masque * opacité, sans tableau intermédiaire
+            scratch = self._scratch[:h, :w]
+            np.multiply(src, layer.gain[i], out=scratch)
+            np.subtract(scratch, dst, out=scratch)
+            if layer.mask is not None:
+                mask = self._scratch_mask[:h, :w]
+                np.multiply(layer.mask[sy0:sy0 + h, sx0:sx0 + w], layer.opacity[i], out=mask)
+                np.multiply(scratch, mask, out=scratch)
+            else:
+                scratch *= layer.opacity[i]
+            dst += scratch
+            np.trunc(dst, out=dst)
+        
+        np.copyto(self._frame, canvas, casting='unsafe')
+        return self._frame
+    
+    def make_frame(self, t):
+        """
+        Fonction d'image pour un VideoClip MoviePy
+        
+        Args:
+            t (float): Instant local à la section, en secondes
+        
+        Returns:
+            numpy.ndarray: Image RGB
+        """
+        return self.render_frame(self.frame_index(t))
+
+
+def benchmark_animation(resolution=(1920, 1080), fps=30, duration=5, work_dir=None):
+    """
+    Compare la vitesse de composition du chemin MoviePy générique et de l'animateur vectorisé
+    
+    La section mesurée est celle du banc d'essai des profils: fond, titre en rebond et
+    sous-titre avec fondus. Seule la composition des images est chronométrée, sans encodage.
+    
+    Args:
+        resolution (tuple, optional): Résolution. Par défaut (1920, 1080)
+        fps (int, optional): Images par seconde. Par défaut 30
+        duration (float, optional): Durée de la section en secondes. Par défaut 5
+        work_dir (str, optional): Répertoire de travail. Par défaut un répertoire temporaire
+    
+    Returns:
+        dict: Images composées, images par seconde de chaque chemin, accélération et écart maximal entre les images
+    """
+    from moviepy.editor import CompositeVideoClip
+    from .render_profiles import _benchmark_plan
+    from .timeline import TimelineItem
+    from .video_producer import VideoProducer
+    
+    temp_dir = work_dir or tempfile.mkdtemp(prefix='autotubecpm_animation_')
+    try:
+        producer = VideoProducer(assets_dir=temp_dir, output_dir=temp_dir)
+        segment = _benchmark_plan(resolution, fps, duration)["segments"][0]
+        items = [TimelineItem.from_dict(layer) for layer in segment["layers"]]
+        frames = int(round(duration * fps))
+        
+        clips = [producer._materialize_item(item, 0.0, resolution) for item in items]
+        composite = CompositeVideoClip(clips, size=resolution).set_duration(duration)
+        samples = range(0, frames, max(1, frames // 10))
+        reference = [composite.get_frame(index / fps) for index in samples]
+        start = time.perf_counter()
+        for index in range(frames):
+            composite.get_frame(index / fps)
+        moviepy_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        animator = SectionAnimator(items, 0.0, duration, resolution, fps, producer.text_cache)
+        for index in range(frames):
+            animator.render_frame(index)
+        numpy_seconds = time.perf_counter() - start
+        
+        max_diff = 0
+        for sample, index in zip(reference, samples):
+            diff = np.abs(animator.render_frame(index).astype(np.int16) - sample.astype(np.int16)).max()
+            max_diff = max(max_diff, int(diff))
+    finally:
+        if work_dir is None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    result = {
+        "resolution": list(resolution),
+        "frames": frames,
+        "moviepy_fps": round(frames / moviepy_seconds, 1),
+        "numpy_fps": round(frames / numpy_seconds, 1),
+        "speedup": round(moviepy_seconds / numpy_seconds, 1),
+        "max_pixel_diff": max_diff
+    }
+    print(f"Composition {resolution[0]}x{resolution[1]}: MoviePy {result['moviepy_fps']} images/s, "
+          f"NumPy {result['numpy_fps']} images/s (x{result['speedup']}, écart max {max_diff})")
+    return result
+
+
+def main(argv=None):
+    """
+    Point d'entrée en ligne de commande: mesure de la vitesse de composition
+    
+    Args:
+        argv (list, optional): Arguments de la ligne de commande
+    """
+    parser = argparse.ArgumentParser(description="Mesure de l'animateur vectorisé")
+    parser.add_argument("--resolution", default="1920x1080", help="Résolution (ex: 1920x1080)")
+    parser.add_argument("--fps", type=int, default=30, help="Images par seconde")
+    parser.add_argument("--duration", type=float, default=5, help="Durée de la section en secondes")
+    
+    args = parser.parse_args(argv)
+    
+    width, height = (int(value) for value in args.resolution.lower().split("x"))
+    benchmark_animation((width, height), args.fps, args.duration)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
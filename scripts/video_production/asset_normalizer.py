@@ -0,0 +1,325 @@
+"""
+Module de normalisation des éléments visuels pour AutoTubeCPM
+Ce module prépare une fois pour toutes les images et vidéos d'assets/visual à la résolution,
+à la cadence et au format de pixels du rendu, pour qu'elles soient lues sans mise à l'échelle
+"""
+
+import os
+import sys
+import json
+import zlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .ffmpeg_utils import run_ffmpeg
+
+# Extensions reconnues dans le répertoire des éléments visuels
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm", ".avi")
+
+# Format de pixels des vidéos normalisées (celui de l'encodage final)
+DEFAULT_PIX_FMT = "yuv420p"
+
+# Nom de l'index des variantes dans le répertoire de sortie
+INDEX_FILENAME = "index.json"
+
+
+def normalize_args(source_path, output_path, resolution, fps=None, pix_fmt=DEFAULT_PIX_FMT):
+    """
+    Construit la commande ffmpeg qui adapte un élément visuel au cadre du rendu
+    
+    L'élément est mis à l'échelle pour couvrir le cadre puis recadré au centre. Une image reste
+    une image (PNG RGB); une vidéo est réencodée à la cadence et au format de pixels demandés, sans son.
+    
+    Args:
+        source_path (str): Élément source
+        output_path (str): Élément normalisé (.png pour une image, .mp4 pour une vidéo)
+        resolution (tuple): Résolution cible (largeur, hauteur)
+        fps (int, optional): Images par seconde, pour une vidéo
+        pix_fmt (str, optional): Format de pixels d'une vidéo. Par défaut "yuv420p"
+    
+    Returns:
+        list: Arguments ffmpeg (sans l'exécutable)
+    """
+    width, height = resolution
+    filters = [f"scale={width}:{height}:force_original_aspect_ratio=increase", f"crop={width}:{height}"]
+    
+    if output_path.endswith(".png"):
+        return ["-i", source_path, "-vf", ",".join(filters + ["format=rgb24", "setsar=1"]),
+                "-frames:v", "1", output_path]
+    
+    if fps:
+        filters.append(f"fps={fps}")
+    filters += [f"format={pix_fmt}", "setsar=1"]
+    return ["-i", source_path, "-vf", ",".join(filters), "-an",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-g", str(fps or 30), output_path]
+
+
+def _normalize_asset(args, description):
+    """
+    Normalise un élément dans un processus du pool (fonction de module pour être sérialisable)
+    
+    La sortie est écrite sous un nom temporaire puis renommée, pour ne jamais publier un fichier incomplet.
+    
+    Args:
+        args (list): Arguments ffmpeg, le dernier étant le chemin de sortie
+        description (str): Description de l'opération pour les messages d'erreur
+    
+    Returns:
+        str: Chemin de l'élément normalisé
+    """
+    output_path = args[-1]
+    root, extension = os.path.splitext(output_path)
+    temp_path = f"{root}.{os.getpid()}.tmp{extension}"
+    try:
+        run_ffmpeg(args[:-1] + [temp_path], description=description)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return output_path
+
+
+class AssetNormalizer:
+    """Classe pour normaliser les éléments visuels en parallèle et indexer leurs variantes"""
+    
+    def __init__(self, source_dir, variants_dir=None, workers=None):
+        """
+        Initialise le normaliseur et charge l'index des variantes
+        
+        Args:
+            source_dir (str): Répertoire des éléments visuels (assets/visual)
+            variants_dir (str, optional): Répertoire des variantes normalisées. Par défaut "normalized" dans source_dir
+            workers (int, optional): Nombre de processus ffmpeg simultanés. Par défaut le nombre de cœurs
+        """
+        self.source_dir = source_dir
+        self.variants_dir = variants_dir or os.path.join(source_dir, "normalized")
+        self.workers = workers or os.cpu_count() or 1
+        self.index_path = os.path.join(self.variants_dir, INDEX_FILENAME)
+        os.makedirs(self.variants_dir, exist_ok=True)
+        
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+    
+    def _save_index(self):
+        """
+        Écrit l'index des variantes de façon atomique
+        """
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.index_path)
+    
+    def list_sources(self, kind=None):
+        """
+        Liste les éléments visuels sources, hors répertoire des variantes
+        
+        Args:
+            kind (str, optional): "image" ou "video". Par défaut les deux
+        
+        Returns:
+            list: Chemins relatifs au répertoire source, triés
+        """
+        sources = []
+        variants_dir = os.path.abspath(self.variants_dir)
+        for root, dirs, filenames in os.walk(self.source_dir):
+            dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != variants_dir]
+            for filename in filenames:
+                asset_kind = self._kind(filename)
+                if asset_kind and (kind is None or asset_kind == kind):
+                    sources.append(os.path.relpath(os.path.join(root, filename), self.source_dir))
+        return sorted(sources)
+    
+    def _kind(self, filename):
+        """
+        Args:
+            filename (str): Nom du fichier
+        
+        Returns:
+            str: "image", "video" ou None si l'extension n'est pas reconnue
+        """
+        extension = os.path.splitext(filename)[1].lower()
+        if extension in IMAGE_EXTENSIONS:
+            return "image"
+        if extension in VIDEO_EXTENSIONS:
+            return "video"
+        return None
+    
+    def variant_key(self, source, resolution, fps, pix_fmt=DEFAULT_PIX_FMT):
+        """
+        Args:
+            source (str): Chemin relatif de l'élément source
+            resolution (tuple): Résolution cible
+            fps (int): Images par seconde
+            pix_fmt (str, optional): Format de pixels
+        
+        Returns:
+            str: Clé de la variante (la cadence et le format de pixels ne concernent que les vidéos)
+        """
+        width, height = resolution
+        if self._kind(source) == "image":
+            return f"{width}x{height}"
+        return f"{width}x{height}_{fps}_{pix_fmt}"
+    
+    def _signature(self, source):
+        """
+        Args:
+            source (str): Chemin relatif de l'élément source
+        
+        Returns:
+            list: Taille et date de modification, pour détecter un élément remplacé
+        """
+        stat = os.stat(os.path.join(self.source_dir, source))
+        return [stat.st_size, int(stat.st_mtime)]
+    
+    def get(self, source, resolution, fps, pix_fmt=DEFAULT_PIX_FMT):
+        """
+        Cherche la variante normalisée d'un élément
+        
+        Args:
+            source (str): Chemin relatif de l'élément source
+            resolution (tuple): Résolution cible
+            fps (int): Images par seconde
+            pix_fmt (str, optional): Format de pixels
+        
+        Returns:
+            str: Chemin de la variante, ou None si elle n'existe pas ou n'est plus à jour
+        """
+        entry = self.index.get(source)
+        if not entry or entry["signature"] != self._signature(source):
+            return None
+        
+        filename = entry["variants"].get(self.variant_key(source, resolution, fps, pix_fmt))
+        if not filename:
+            return None
+        path = os.path.join(self.variants_dir, filename)
+        return path if os.path.exists(path) else None
+    
+    def variants(self, resolution, fps, kind=None, pix_fmt=DEFAULT_PIX_FMT):
+        """
+        Liste les variantes disponibles pour une résolution et une cadence
+        
+        Args:
+            resolution (tuple): Résolution cible
+            fps (int): Images par seconde
+            kind (str, optional): "image" ou "video". Par défaut les deux
+            pix_fmt (str, optional): Format de pixels
+        
+        Returns:
+            list: Chemins des variantes, dans l'ordre des éléments sources
+        """
+        paths = []
+        for source in self.list_sources(kind):
+            path = self.get(source, resolution, fps, pix_fmt)
+            if path:
+                paths.append(path)
+        return paths
+    
+    def normalize(self, resolution, fps, pix_fmt=DEFAULT_PIX_FMT, workers=None):
+        """
+        Normalise les éléments qui n'ont pas encore de variante pour cette résolution et cette cadence
+        
+        Les conversions sont réparties sur plusieurs processus ffmpeg; un élément modifié depuis
+        sa dernière normalisation voit ses anciennes variantes remplacées. Un élément illisible est
+        signalé et ignoré (il sera retenté à la prochaine normalisation), sans interrompre les autres.
+        
+        Args:
+            resolution (tuple): Résolution cible (largeur, hauteur)
+            fps (int): Images par seconde
+            pix_fmt (str, optional): Format de pixels des vidéos. Par défaut "yuv420p"
+            workers (int, optional): Nombre de processus. Par défaut celui du normaliseur
+        
+        Returns:
+            dict: Chemin de la variante de chaque élément normalisé, par chemin relatif de la source
+        """
+        pending = {}
+        for source in self.list_sources():
+            signature = self._signature(source)
+            entry = self.index.get(source)
+            if not entry or entry["signature"] != signature:
+                self._drop_variants(entry)
+                entry = self.index[source] = {"kind": self._kind(source), "signature": signature, "variants": {}}
+            
+            if self.get(source, resolution, fps, pix_fmt) is None:
+                key = self.variant_key(source, resolution, fps, pix_fmt)
+                # Nom court et stable, indépendant des caractères du nom source
+                stem = f"{zlib.crc32(source.encode('utf-8')):08x}_{key}"
+                filename = stem + (".png" if entry["kind"] == "image" else ".mp4")
+                pending[source] = (key, filename, normalize_args(
+                    os.path.join(self.source_dir, source), os.path.join(self.variants_dir, filename),
+                    resolution, fps if entry["kind"] == "video" else None, pix_fmt
+                ))
+        
+        # Retirer de l'index les éléments supprimés
+        for source in set(self.index) - set(self.list_sources()):
+            self._drop_variants(self.index.pop(source))
+        
+        normalized = {}
+        try:
+            if pending:
+                workers = min(workers or self.workers, len(pending))
+                print(f"Normalisation de {len(pending)} éléments visuels en {resolution[0]}x{resolution[1]} "
+                      f"avec {workers} processus")
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = {executor.submit(_normalize_asset, args, f"normalisation de {source}"): source
+                               for source, (_, _, args) in pending.items()}
+                    for future in as_completed(futures):
+                        source = futures[future]
+                        try:
+                            path = future.result()
+                        except (RuntimeError, OSError) as e:
+                            print(f"Élément visuel ignoré: {e}")
+                            continue
+                        key, filename, _ = pending[source]
+                        self.index[source]["variants"][key] = filename
+                        normalized[source] = path
+        finally:
+            # Conserver les variantes déjà converties, même si la normalisation est interrompue
+            self._save_index()
+        return normalized
+    
+    def _drop_variants(self, entry):
+        """
+        Supprime les fichiers des variantes d'un élément
+        
+        Args:
+            entry (dict): Entrée de l'index, ou None
+        """
+        if not entry:
+            return
+        for filename in entry["variants"].values():
+            try:
+                os.remove(os.path.join(self.variants_dir, filename))
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    """
+    Point d'entrée en ligne de commande: normalisation des éléments d'un répertoire
+    
+    Args:
+        argv (list, optional): Arguments de la ligne de commande
+    """
+    parser = argparse.ArgumentParser(description="Normalisation des éléments visuels")
+    parser.add_argument("source_dir", help="Répertoire des éléments visuels (ex: assets/visual)")
+    parser.add_argument("--resolution", nargs="+", default=["1920x1080"], help="Résolutions cibles (ex: 1920x1080 960x540)")
+    parser.add_argument("--fps", type=int, default=30, help="Images par seconde")
+    parser.add_argument("--pix-fmt", default=DEFAULT_PIX_FMT, help="Format de pixels des vidéos")
+    parser.add_argument("--workers", type=int, help="Nombre de processus ffmpeg")
+    
+    args = parser.parse_args(argv)
+    
+    normalizer = AssetNormalizer(args.source_dir, workers=args.workers)
+    for resolution in args.resolution:
+        width, height = (int(value) for value in resolution.lower().split("x"))
+        normalized = normalizer.normalize((width, height), args.fps, args.pix_fmt)
+        print(f"{resolution}: {len(normalized)} éléments normalisés, "
+              f"{len(normalizer.variants((width, height), args.fps, pix_fmt=args.pix_fmt))} disponibles")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,149 @@
+"""
+Module de minutage des sections pour AutoTubeCPM
+Ce module place les limites des sections de la vidéo sur la narration: positions exactes issues de
+la synthèse par sections, ou estimation d'après le texte recalée sur les pauses détectées dans l'audio
+"""
+
+import tempfile
+import subprocess
+
+import numpy as np
+
+from .ffmpeg_utils import FFMPEG_BINARY
+
+# Analyse: audio mono rééchantillonné, énergie par trames de 20 ms, lu par blocs de 10 secondes
+ANALYSIS_SAMPLE_RATE = 16000
+ANALYSIS_FRAME_MS = 20
+ANALYSIS_CHUNK_SECONDS = 10
+
+# Une trame est silencieuse sous ce niveau (la narration post-traitée est normalisée vers -20 dBFS)
+DEFAULT_SILENCE_DB = -45.0
+
+# Durée minimale d'une pause prise en compte
+DEFAULT_MIN_PAUSE = 0.25
+
+# Écart maximal entre la limite estimée d'une section et la pause retenue
+DEFAULT_MAX_SNAP_SECONDS = 6.0
+
+# Durée minimale d'une section après recalage
+MIN_SECTION_SECONDS = 1.0
+
+# Pénalité de distance: une pause plus éloignée n'est retenue que si elle est nettement plus longue
+# (en secondes de pause par seconde d'écart)
+SNAP_DISTANCE_PENALTY = 0.05
+
+
+def detect_pauses(audio_path, silence_db=DEFAULT_SILENCE_DB, min_pause=DEFAULT_MIN_PAUSE):
+    """
+    Repère les pauses de la narration d'après l'énergie du signal, par blocs et sans charger l'audio
+    
+    ffmpeg décode l'audio (tout format) en flottants mono transmis par un tube; seule une valeur
+    par trame de 20 ms est conservée.
+    
+    Args:
+        audio_path (str): Chemin du fichier audio
+        silence_db (float, optional): Niveau sous lequel une trame est silencieuse. Par défaut -45 dBFS
+        min_pause (float, optional): Durée minimale d'une pause en secondes. Par défaut 0.25
+    
+    Returns:
+        list: Pauses (début, fin) en secondes, dans l'ordre
+    """
+    frame_size = ANALYSIS_SAMPLE_RATE * ANALYSIS_FRAME_MS // 1000
+    chunk_bytes = frame_size * 4 * (ANALYSIS_CHUNK_SECONDS * 1000 // ANALYSIS_FRAME_MS)
+    threshold = 10.0 ** (silence_db / 10.0)
+    
+    command = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-i", audio_path, "-vn",
+               "-ac", "1", "-ar", str(ANALYSIS_SAMPLE_RATE), "-f", "f32le", "-"]
+    silent = []
+    remainder = b""
+    # Les erreurs vont dans un fichier: un tube non lu pourrait bloquer ffmpeg
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        with process.stdout:
+            while True:
+                data = process.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                data = remainder + data
+                usable = len(data) // (frame_size * 4) * frame_size * 4
+                remainder = data[usable:]
+                samples = np.frombuffer(data[:usable], dtype='<f4').astype(np.float64)
+                energies = np.square(samples).reshape(-1, frame_size).mean(axis=1)
+                silent.append(energies < threshold)
+        if process.wait() != 0:
+            stderr.seek(0)
+            error = stderr.read().decode('utf-8', errors='replace').strip()[-2000:]
+            raise RuntimeError(f"Échec de l'analyse des pauses de {audio_path} (code {process.returncode}): {error}")
+    
+    if not silent:
+        return []
+    # Débuts et fins des suites de trames silencieuses
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], np.concatenate(silent).astype(np.int8), [0]))))
+    frame_seconds = ANALYSIS_FRAME_MS / 1000
+    return [(round(start * frame_seconds, 3), round(end * frame_seconds, 3))
+            for start, end in zip(edges[0::2], edges[1::2]) if (end - start) * frame_seconds >= min_pause]
+
+
+def snap_to_pauses(boundaries, pauses, max_shift=DEFAULT_MAX_SNAP_SECONDS, min_section=MIN_SECTION_SECONDS):
+    """
+    Recale chaque limite de section au milieu d'une pause proche
+    
+    Parmi les pauses à moins de max_shift, la plus longue est retenue (la pause entre deux sections
+    est en général plus longue qu'entre deux phrases), à distance égale près.
+    
+    Args:
+        boundaries (list): Limites estimées en secondes, croissantes
+        pauses (list): Pauses (début, fin) en secondes
+        max_shift (float, optional): Déplacement maximal d'une limite. Par défaut 6 secondes
+        min_section (float, optional): Durée minimale entre deux limites. Par défaut 1 seconde
+    
+    Returns:
+        list: Limites recalées (inchangées sans pause assez proche)
+    """
+    snapped = []
+    previous = 0.0
+    for boundary in boundaries:
+        candidates = []
+        for start, end in pauses:
+            middle = (start + end) / 2
+            if abs(middle - boundary) <= max_shift and middle - previous >= min_section:
+                candidates.append((end - start - SNAP_DISTANCE_PENALTY * abs(middle - boundary), middle))
+        position = max(candidates)[1] if candidates else max(boundary, previous + min_section)
+        snapped.append(round(position, 3))
+        previous = position
+    return snapped
+
+
+def plan_section_starts(audio_duration, weights, offsets=None, pauses=None, max_shift=DEFAULT_MAX_SNAP_SECONDS):
+    """
+    Calcule le début de chaque section dans la narration
+    
+    Args:
+        audio_duration (float): Durée de la narration en secondes
+        weights (list): Poids de chaque section (longueur de son texte) pour l'estimation
+        offsets (list, optional): Débuts exacts des sections (synthèse par sections), prioritaires
+        pauses (list, optional): Pauses détectées, sur lesquelles recaler les limites estimées
+        max_shift (float, optional): Déplacement maximal d'une limite. Par défaut 6 secondes
+    
+    Returns:
+        list: Début de chaque section en secondes, le premier à 0
+    """
+    if offsets is not None:
+        if len(offsets) != len(weights):
+            raise ValueError(f"{len(offsets)} positions de sections pour {len(weights)} sections")
+        starts = [0.0] + [float(offset) for offset in offsets[1:]]
+        if any(end <= start for start, end in zip(starts, starts[1:] + [audio_duration])):
+            raise ValueError("Les positions des sections doivent être croissantes et dans la narration")
+        return starts
+    
+    total = float(sum(weights))
+    if total <= 0:
+        weights, total = [1] * len(weights), float(len(weights))
+    boundaries = list(np.cumsum(weights[:-1]) / total * audio_duration)
+    if pauses:
+        snapped = snap_to_pauses(boundaries, pauses, max_shift)
+        # Le recalage est abandonné s'il laisse une section trop courte (narration très brève)
+        limits = [0.0] + snapped + [audio_duration]
+        if all(end - start >= MIN_SECTION_SECONDS for start, end in zip(limits, limits[1:])):
+            boundaries = snapped
+    return [0.0] + [round(float(boundary), 3) for boundary in boundaries]
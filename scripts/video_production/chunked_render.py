@@ -0,0 +1,312 @@
+"""
+Module de rendu par tronçons pour AutoTubeCPM
+Ce module découpe une chronologie en tronçons de durée fixe, encodés séparément et inscrits
+dans un manifeste: un rendu interrompu reprend en n'encodant que les tronçons manquants
+"""
+
+import os
+import json
+import math
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .ffmpeg_backend import FFmpegRenderer
+from .timeline import NARRATION_TRACK, CAPTION_TRACK, NON_VISUAL_TRACKS
+
+# Durée nominale d'un tronçon en secondes
+DEFAULT_CHUNK_SECONDS = 30
+
+# Nom du manifeste dans le répertoire des tronçons d'un rendu
+MANIFEST_FILENAME = "manifest.json"
+
+# Version du format du manifeste
+MANIFEST_FORMAT_VERSION = 1
+
+
+def _file_sha256(path):
+    """
+    Args:
+        path (str): Chemin du fichier
+    
+    Returns:
+        str: Empreinte SHA-256 du contenu
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _json_key(data):
+    """
+    Args:
+        data: Données sérialisables en JSON
+    
+    Returns:
+        str: Empreinte SHA-1 de leur forme canonique
+    """
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ChunkedRenderer:
+    """Classe pour rendre une chronologie par tronçons reprenables, assemblés sans réencodage"""
+    
+    def __init__(self, checkpoint_dir, chunk_seconds=DEFAULT_CHUNK_SECONDS, renderer=None):
+        """
+        Initialise le rendu par tronçons
+        
+        Args:
+            checkpoint_dir (str): Répertoire des tronçons et des manifestes
+            chunk_seconds (float, optional): Durée nominale d'un tronçon. Par défaut 30 secondes
+            renderer (FFmpegRenderer, optional): Moteur ffmpeg des tronçons et de l'assemblage
+        """
+        if chunk_seconds <= 0:
+            raise ValueError("La durée des tronçons doit être positive")
+        self.checkpoint_dir = checkpoint_dir
+        self.chunk_seconds = chunk_seconds
+        self.renderer = renderer or FFmpegRenderer()
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+    
+    def boundaries(self, timeline):
+        """
+        Calcule les limites des tronçons
+        
+        Les coupes sont placées toutes les chunk_seconds secondes, alignées sur une image, et
+        repoussées hors des fondus pour qu'aucun fondu ne soit partagé entre deux tronçons.
+        
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+        
+        Returns:
+            list: Instants des limites, de 0 à la durée de la vidéo
+        """
+        fps = timeline.fps
+        duration = timeline.duration
+        fades = []
+        for name, track in timeline.tracks.items():
+            if name in NON_VISUAL_TRACKS:
+                continue
+            for item in track.items:
+                for effect in item.fields.get("effects") or []:
+                    if effect["name"].endswith("in"):
+                        fades.append((item.start, item.start + effect["duration"]))
+                    elif effect["name"].endswith("out"):
+                        fades.append((item.end - effect["duration"], item.end))
+        
+        cuts = [0.0]
+        target = self.chunk_seconds
+        while target < duration:
+            cut = round(target * fps) / fps
+            moved = True
+            while moved:
+                moved = False
+                for fade_start, fade_end in fades:
+                    if fade_start < cut < fade_end:
+                        cut = math.ceil(fade_end * fps - 1e-6) / fps
+                        moved = True
+            # Un dernier tronçon de moins d'une seconde est rattaché au précédent
+            if cut >= duration - 1:
+                break
+            if cut > cuts[-1]:
+                cuts.append(cut)
+            target = cut + self.chunk_seconds
+        cuts.append(duration)
+        return cuts
+    
+    def chunks(self, timeline, encoder):
+        """
+        Découpe la chronologie en tronçons sans narration ni sous-titres en flux séparé
+        
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            encoder: Paramètres d'encodage sérialisables, inclus dans la clé des tronçons
+        
+        Returns:
+            list: Dictionnaires {"index", "start", "end", "key", "timeline"}
+        """
+        cuts = self.boundaries(timeline)
+        chunks = []
+        for index, (start, end) in enumerate(zip(cuts, cuts[1:])):
+            part = timeline.cut(start, end)
+            part.track(NARRATION_TRACK).items = []
+            if part.caption_mode == "soft":
+                # Ajoutés à l'assemblage, comme la narration
+                part.track(CAPTION_TRACK).items = []
+            chunks.append({
+                "index": index,
+                "start": start,
+                "end": end,
+                "key": _json_key({"timeline": part.to_dict(), "encoder": encoder}),
+                "timeline": part
+            })
+        return chunks
+    
+    def render_dir(self, timeline, encoder):
+        """
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            encoder: Paramètres d'encodage sérialisables
+        
+        Returns:
+            str: Répertoire des tronçons de ce rendu, identique d'une tentative à l'autre
+        """
+        key = _json_key({"timeline": timeline.to_dict(), "encoder": encoder, "chunk_seconds": self.chunk_seconds})
+        return os.path.join(self.checkpoint_dir, key[:16])
+    
+    def load_manifest(self, render_dir):
+        """
+        Args:
+            render_dir (str): Répertoire des tronçons du rendu
+        
+        Returns:
+            dict: Manifeste, vide si absent ou illisible
+        """
+        try:
+            with open(os.path.join(render_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"version": MANIFEST_FORMAT_VERSION, "chunks": {}}
+        if manifest.get("version") != MANIFEST_FORMAT_VERSION:
+            return {"version": MANIFEST_FORMAT_VERSION, "chunks": {}}
+        return manifest
+    
+    def _save_manifest(self, render_dir, manifest):
+        """
+        Écrit le manifeste de façon atomique
+        
+        Args:
+            render_dir (str): Répertoire des tronçons du rendu
+            manifest (dict): Manifeste
+        """
+        path = os.path.join(render_dir, MANIFEST_FILENAME)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    
+    def _is_complete(self, render_dir, manifest, chunk):
+        """
+        Vérifie qu'un tronçon figure au manifeste et que son fichier est intact
+        
+        Args:
+            render_dir (str): Répertoire des tronçons du rendu
+            manifest (dict): Manifeste
+            chunk (dict): Tronçon
+        
+        Returns:
+            bool: True si le tronçon peut être repris
+        """
+        entry = manifest["chunks"].get(str(chunk["index"]))
+        if not entry or entry["key"] != chunk["key"]:
+            return False
+        path = os.path.join(render_dir, entry["filename"])
+        try:
+            if os.path.getsize(path) != entry["size"]:
+                return False
+        except OSError:
+            return False
+        return _file_sha256(path) == entry["sha256"]
+    
+    def render(self, timeline, output_path, profile=None, workers=1, render_chunk=None, encoder=None,
+               keep_chunks=False):
+        """
+        Rend la chronologie par tronçons, en reprenant ceux d'une tentative précédente
+        
+        Chaque tronçon est encodé sous un nom temporaire, renommé, puis inscrit au manifeste avec
+        l'empreinte de son contenu. Les tronçons déjà inscrits et intacts ne sont pas réencodés.
+        La narration et les sous-titres en flux séparé sont ajoutés à l'assemblage, en copie de flux pour la vidéo.
+        
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            output_path (str): Chemin de la vidéo de sortie
+            profile (RenderProfile, optional): Profil d'encodage
+            workers (int, optional): Nombre de tronçons encodés simultanément. Par défaut 1
+            render_chunk (callable, optional): Fonction (chronologie du tronçon, chemin) qui encode un tronçon.
+                Par défaut le moteur ffmpeg
+            encoder (optional): Paramètres d'encodage de render_chunk, inclus dans les clés. Par défaut
+                les paramètres vidéo ffmpeg du profil
+            keep_chunks (bool, optional): Conserver les tronçons après l'assemblage. Par défaut False
+        
+        Returns:
+            str: Chemin de la vidéo générée
+        """
+        plan = timeline.to_render_plan()
+        video_args, audio_args, _ = self.renderer._profile_args(plan, profile)
+        if render_chunk is None:
+            render_chunk = lambda part, path: self.renderer.render(part.to_render_plan(), path, profile=profile,
+                                                                   include_audio=False)
+            encoder = {"backend": "ffmpeg", "video_args": video_args,
+                       "two_pass": bool(profile and profile.two_pass)}
+        
+        chunks = self.chunks(timeline, encoder)
+        render_dir = self.render_dir(timeline, encoder)
+        os.makedirs(render_dir, exist_ok=True)
+        manifest = self.load_manifest(render_dir)
+        manifest["chunks"] = {str(chunk["index"]): manifest["chunks"][str(chunk["index"])]
+                              for chunk in chunks if self._is_complete(render_dir, manifest, chunk)}
+        self._save_manifest(render_dir, manifest)
+        
+        pending = [chunk for chunk in chunks if str(chunk["index"]) not in manifest["chunks"]]
+        print(f"Rendu par tronçons: {len(chunks) - len(pending)}/{len(chunks)} déjà encodés dans {render_dir}")
+        
+        def encode(chunk):
+            filename = f"chunk_{chunk['index']:04d}_{chunk['key'][:12]}.mp4"
+            path = os.path.join(render_dir, filename)
+            temp_path = os.path.join(render_dir, f"{filename}.{os.getpid()}.tmp.mp4")
+            try:
+                render_chunk(chunk["timeline"], temp_path)
+                os.replace(temp_path, path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            return filename
+        
+        if pending:
+            # Les images de texte sont générées ici, avant la répartition, pour éviter les écritures concurrentes
+            for segment in plan["segments"]:
+                for layer in segment["layers"]:
+                    if layer["type"] == "text":
+                        self.renderer.text_cache.get_path(layer["text"], layer["style"])
+            
+            with ThreadPoolExecutor(max_workers=max(1, min(workers or 1, len(pending)))) as executor:
+                futures = {executor.submit(encode, chunk): chunk for chunk in pending}
+                # Le manifeste est mis à jour au fil des tronçons terminés, depuis ce seul thread
+                failure = None
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    if future.cancelled():
+                        continue
+                    try:
+                        filename = future.result()
+                    except Exception as e:
+                        # Les tronçons non commencés sont abandonnés, ceux en cours sont inscrits à leur fin
+                        if failure is None:
+                            failure = e
+                            for other in futures:
+                                other.cancel()
+                        continue
+                    
+                    path = os.path.join(render_dir, filename)
+                    manifest["chunks"][str(chunk["index"])] = {
+                        "key": chunk["key"],
+                        "start": chunk["start"],
+                        "end": chunk["end"],
+                        "filename": filename,
+                        "size": os.path.getsize(path),
+                        "sha256": _file_sha256(path)
+                    }
+                    self._save_manifest(render_dir, manifest)
+                    print(f"Tronçon {chunk['index'] + 1}/{len(chunks)} encodé")
+            
+            if failure is not None:
+                raise failure
+        
+        segment_paths = [os.path.join(render_dir, manifest["chunks"][str(chunk["index"])]["filename"])
+                         for chunk in chunks]
+        self.renderer.concat(plan, segment_paths, output_path, audio_args, list_dir=render_dir)
+        
+        if not keep_chunks:
+            shutil.rmtree(render_dir, ignore_errors=True)
+        return output_path
@@ -0,0 +1,216 @@
+"""
+Module de composition image par image pour AutoTubeCPM
+Ce module compose les images d'une chronologie dans des tampons préalloués et les transmet
+brutes (rgb24) à un unique processus ffmpeg, qui les encode et ajoute la narration et les sous-titres
+"""
+
+import os
+import math
+import tempfile
+import subprocess
+
+import numpy as np
+
+from .animation import SectionAnimator, ANIMATED_KINDS
+from .ffmpeg_backend import FFmpegRenderer
+from .ffmpeg_utils import FFMPEG_BINARY
+from .output_formats import OutputFormat
+from .render_profiler import RenderProfiler, FRAME_STAGE_PREFIX
+
+
+class FrameWriter:
+    """Classe pour encoder des images brutes avec un seul processus ffmpeg de longue durée"""
+    
+    def __init__(self, args, resolution, fps):
+        """
+        Initialise l'encodeur (le processus est lancé par open ou par le gestionnaire de contexte)
+        
+        Args:
+            args (list): Arguments ffmpeg qui suivent l'entrée des images (entrées supplémentaires,
+                filtres, puis paramètres de chaque sortie terminés par son chemin)
+            resolution (tuple): Résolution des images (largeur, hauteur)
+            fps (int): Images par seconde
+        """
+        self.args = list(args)
+        self.output_path = self.args[-1]
+        self.resolution = tuple(resolution)
+        self.fps = fps
+        self.frames = 0
+        self._process = None
+        self._stderr = None
+    
+    def open(self):
+        """
+        Lance le processus ffmpeg, qui lit les images sur son entrée standard
+        """
+        width, height = self.resolution
+        command = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+                   "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-"]
+        command += self.args
+        # Les erreurs vont dans un fichier: un tube non lu pourrait bloquer ffmpeg
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                         stderr=self._stderr)
+    
+    def write(self, frame):
+        """
+        Transmet une image sans la copier
+        
+        Args:
+            frame (numpy.ndarray): Image RGB uint8 contiguë (hauteur, largeur, 3)
+        """
+        try:
+            self._process.stdin.write(frame.data)
+        except BrokenPipeError:
+            self._process.wait()
+            raise RuntimeError(f"Échec de l'encodage de {os.path.basename(self.output_path)}: {self._error()}")
+        self.frames += 1
+    
+    def close(self):
+        """
+        Termine l'encodage et vérifie le code de retour de ffmpeg
+        """
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            returncode = self._process.wait()
+            if returncode != 0:
+                raise RuntimeError(f"Échec de l'encodage de {os.path.basename(self.output_path)} "
+                                   f"(code {returncode}): {self._error()}")
+        finally:
+            self._stderr.close()
+            self._process = None
+    
+    def abort(self):
+        """
+        Interrompt l'encodage après une erreur de composition
+        """
+        if self._process is None:
+            return
+        self._process.kill()
+        self._process.wait()
+        self._stderr.close()
+        self._process = None
+    
+    def _error(self):
+        """
+        Returns:
+            str: Fin de la sortie d'erreur de ffmpeg
+        """
+        self._stderr.seek(0)
+        return self._stderr.read().decode('utf-8', errors='replace').strip()[-2000:]
+    
+    def __enter__(self):
+        """
+        Returns:
+            FrameWriter: Encodeur lancé
+        """
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Termine l'encodage, ou l'interrompt si la composition a échoué
+        """
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class TimelineCompositor:
+    """Classe pour composer une chronologie image par image et l'encoder en un seul passage"""
+    
+    def __init__(self, text_cache, section_clip=None):
+        """
+        Initialise le compositeur
+        
+        Args:
+            text_cache (TextBitmapCache): Cache des images de texte
+            section_clip (callable, optional): Fonction (chronologie, indice de section) qui renvoie
+                le clip MoviePy d'une section que l'animateur ne sait pas composer (vidéos)
+        """
+        self.text_cache = text_cache
+        self.section_clip = section_clip
+    
+    def render(self, timeline, output_path, profile=None, profiler=None, outputs=None):
+        """
+        Compose et encode la chronologie
+        
+        Les sections de couleurs, textes et images sont composées par l'animateur dans ses
+        tampons; une section fixe n'est composée qu'une fois puis réémise telle quelle. Les
+        images sont celles de la grille de la vidéo complète (instant n / fps).
+        
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            output_path (str): Chemin de la vidéo
+            profile (RenderProfile, optional): Profil d'encodage
+            profiler (RenderProfiler, optional): Profileur du coût des images
+            outputs (list, optional): Couples (OutputFormat, chemin) des formats à dériver des mêmes
+                images, à la place de output_path
+        
+        Returns:
+            str: Chemin vers la vidéo générée (le premier format si outputs est fourni)
+        """
+        profiler = profiler or RenderProfiler(enabled=False)
+        fps = timeline.fps
+        plan = timeline.to_render_plan()
+        renderer = FFmpegRenderer(text_cache=self.text_cache)
+        if outputs is None:
+            outputs = [(OutputFormat("native", timeline.resolution), output_path)]
+        
+        # L'entrée 0 est celle des images: la narration et les sous-titres sont numérotés à sa suite
+        inputs = ["-i", "-"]
+        filters = []
+        output_args = renderer._compile_outputs(plan, outputs, "0:v", inputs, filters, profile)
+        args = inputs[2:] + ["-filter_complex", ";".join(filters)] + output_args
+        
+        frame_count = max(1, math.ceil(timeline.duration * fps - 1e-6))
+        # Dernière image (exclue) de chaque section sur la grille de la vidéo; la dernière section va jusqu'au bout
+        section_ends = [min(frame_count, math.ceil((section["start"] + section["duration"]) * fps - 1e-6))
+                        for section in timeline.sections]
+        section_ends[-1] = frame_count
+        
+        with FrameWriter(args, timeline.resolution, fps) as writer:
+            index = 0
+            for section_index, section in enumerate(timeline.sections):
+                last = section_ends[section_index]
+                if last <= index:
+                    continue
+                source, clip_type = self._section_source(timeline, section_index)
+                
+                if section.get("static"):
+                    with profiler.stage(FRAME_STAGE_PREFIX + "static"):
+                        still = np.ascontiguousarray(source(0.0), dtype=np.uint8).copy()
+                    for _ in range(index, last):
+                        writer.write(still)
+                    index = last
+                    continue
+                
+                while index < last:
+                    with profiler.stage(FRAME_STAGE_PREFIX + clip_type):
+                        frame = source(index / fps - section["start"])
+                    writer.write(np.ascontiguousarray(frame, dtype=np.uint8))
+                    index += 1
+        
+        return outputs[0][1]
+    
+    def _section_source(self, timeline, index):
+        """
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            index (int): Indice de la section
+        
+        Returns:
+            tuple: (fonction instant local -> image, type de la source pour le profileur)
+        """
+        section = timeline.sections[index]
+        items = [item for _, item in timeline.section_items(index)]
+        if all(item.kind in ANIMATED_KINDS for item in items):
+            animator = SectionAnimator(items, section["start"], section["duration"], timeline.resolution,
+                                       timeline.fps, self.text_cache)
+            return animator.make_frame, "animated"
+        if self.section_clip is None:
+            raise ValueError(f"Section {section['name']}: éléments non pris en charge par le compositeur")
+        return self.section_clip(timeline, index).get_frame, "composite"
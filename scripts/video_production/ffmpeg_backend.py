@@ -0,0 +1,716 @@
+"""
+Module de rendu ffmpeg pour AutoTubeCPM
+Ce module compile le plan de rendu d'une vidéo (segments, calques, effets) en un unique
+filter_complex ffmpeg, pour que la composition soit faite nativement et non image par image en Python
+"""
+
+import os
+import glob
+import math
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from .ffmpeg_utils import run_ffmpeg, ffmpeg_color, format_seconds, escape_filter_value
+from .text_cache import TextBitmapCache
+from .subtitles import SubtitleTrack
+
+# Paramètres d'encodage par défaut
+DEFAULT_VIDEO_ARGS = ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+DEFAULT_AUDIO_ARGS = ["-c:a", "aac", "-b:a", "192k"]
+
+# Codec des sous-titres en flux séparé dans un conteneur MP4
+SOFT_SUBTITLE_ARGS = ["-c:s", "mov_text"]
+
+
+def _fade_filters(effects, duration):
+    """
+    Traduit les effets de fondu d'un calque en filtres ffmpeg (temps locaux au calque)
+    
+    "fadein"/"fadeout" assombrissent vers le noir comme vfx.fadein/fadeout de MoviePy,
+    "crossfadein"/"crossfadeout" jouent sur la transparence comme crossfadein/crossfadeout.
+    
+    Args:
+        effects (list): Effets du calque ({"name": ..., "duration": ...})
+        duration (float): Durée du calque en secondes
+    
+    Returns:
+        list: Filtres ffmpeg
+    """
+    filters = []
+    for effect in effects or []:
+        name = effect["name"]
+        fade_duration = min(effect["duration"], duration)
+        fade_type = "in" if name.endswith("in") else "out"
+        start = 0.0 if fade_type == "in" else duration - fade_duration
+        alpha = 1 if name.startswith("crossfade") else 0
+        filters.append(
+            f"fade=t={fade_type}:st={format_seconds(start)}:d={format_seconds(fade_duration)}:alpha={alpha}"
+        )
+    return filters
+
+
+def _position_expressions(layer):
+    """
+    Calcule les expressions de position d'un calque pour le filtre overlay
+    
+    Args:
+        layer (dict): Calque (position et éventuel mouvement)
+    
+    Returns:
+        tuple: (expression x, expression y)
+    """
+    position = layer.get("position", ["center", "center"])
+    x = "(main_w-overlay_w)/2" if position[0] == "center" else str(int(position[0]))
+    y = "(main_h-overlay_h)/2" if position[1] == "center" else str(int(position[1]))
+    
+    motion = layer.get("motion")
+    if motion and motion["type"] == "bounce":
+        # Rebond parabolique: y = base + amplitude * ((t_local mod période) - période/2)^2
+        period = motion["period"]
+        # Un calque coupé à son début ("offset") reprend le mouvement là où il en était
+        origin = layer["start"] - layer.get("offset", 0)
+        y = (f"{motion['base_y']}+{motion['amplitude']}*"
+             f"pow(mod(t-({format_seconds(origin)}),{period})-{period / 2},2)")
+    
+    return x, y
+
+
+def _render_segment(passes, description):
+    """
+    Rend un segment dans un processus du pool (fonction de module pour être sérialisable)
+    
+    Args:
+        passes (list): Arguments ffmpeg de chaque passe d'encodage du segment
+        description (str): Description de l'opération pour les messages d'erreur
+    
+    Returns:
+        str: Chemin du fichier intermédiaire
+    """
+    for args in passes:
+        run_ffmpeg(args, description=description)
+    return passes[-1][-1]
+
+
+class FFmpegRenderer:
+    """Classe pour rendre un plan vidéo avec un seul graphe de filtres ffmpeg"""
+    
+    def __init__(self, work_dir=None, text_cache=None, segment_cache=None):
+        """
+        Initialise le moteur de rendu ffmpeg
+        
+        Args:
+            work_dir (str, optional): Répertoire des fichiers intermédiaires
+            text_cache (TextBitmapCache, optional): Cache des images de texte. Par défaut dans work_dir
+            segment_cache (SegmentCache, optional): Cache des segments encodés réutilisables (intro, outro)
+        """
+        self.work_dir = work_dir or os.path.join(tempfile.gettempdir(), 'autotubecpm_render')
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.text_cache = text_cache or TextBitmapCache(os.path.join(self.work_dir, 'text'))
+        self.segment_cache = segment_cache
+    
+    def _text_input(self, layer):
+        """
+        Renvoie le PNG du texte d'un calque, rendu une seule fois grâce au cache
+        
+        Args:
+            layer (dict): Calque de type "text"
+        
+        Returns:
+            str: Chemin du PNG
+        """
+        return self.text_cache.get_path(layer["text"], layer["style"])
+    
+    def _compile_segment(self, segment, resolution, fps, inputs, filters, prefix):
+        """
+        Compile un segment en une chaîne de filtres
+        
+        Le premier calque de couleur couvrant tout le segment sert de fond; les autres calques
+        sont superposés avec overlay, chacun décalé à son instant de départ. Un segment "static"
+        est composé pour une seule image, répétée en mémoire par le filtre loop.
+        
+        Args:
+            segment (dict): Segment du plan (duration, layers)
+            resolution (tuple): Résolution (largeur, hauteur)
+            fps (int): Images par seconde
+            inputs (list): Arguments d'entrée ffmpeg, complétés par cette méthode
+            filters (list): Chaînes de filtres, complétées par cette méthode
+            prefix (str): Préfixe unique des étiquettes du segment
+        
+        Returns:
+            str: Étiquette de sortie du segment
+        """
+        width, height = resolution
+        duration = segment["duration"]
+        layers = list(segment["layers"])
+        
+        still_frames = None
+        if segment.get("static"):
+            # Autant d'images qu'une source de cette durée; une demi-image suffit pour n'en composer qu'une
+            still_frames = max(1, math.ceil(duration * fps - 1e-6))
+            duration = 0.5 / fps
+            layers = [dict(layer, start=0.0, duration=duration) for layer in layers]
+        
+        # Fond du segment
+        first = layers[0] if layers else None
+        if (first and first["type"] == "color" and first["start"] <= 0
+                and first["start"] + first["duration"] >= duration):
+            layers = layers[1:]
+            background_color = ffmpeg_color(first["color"])
+            background_effects = _fade_filters(first.get("effects"), duration)
+        else:
+            background_color = "black"
+            background_effects = []
+        
+        current = f"{prefix}bg"
+        filters.append(",".join(
+            [f"color=c={background_color}:s={width}x{height}:r={fps}:d={format_seconds(duration)}"]
+            + background_effects
+        ) + f"[{current}]")
+        
+        for index, layer in enumerate(layers):
+            start = max(0.0, layer["start"])
+            layer_duration = min(layer["duration"], duration - start)
+            if layer_duration <= 0:
+                continue
+            
+            frames = max(1, int(round(layer_duration * fps)))
+            effects = _fade_filters(layer.get("effects"), layer_duration)
+            layer_label = f"{prefix}l{index}"
+            
+            if layer["type"] == "color":
+                source = f"color=c={ffmpeg_color(layer['color'])}:s={width}x{height}:r={fps}:d={format_seconds(layer_duration)}"
+                chain = [source, "format=rgba"] + effects
+            elif layer["type"] in ("text", "image"):
+                # L'image est décodée une seule fois puis répétée en mémoire par le filtre loop
+                inputs.extend(["-i", self._text_input(layer) if layer["type"] == "text" else layer["path"]])
+                input_index = sum(1 for arg in inputs if arg == "-i") - 1
+                chain = [
+                    f"[{input_index}:v]loop=loop={frames - 1}:size=1:start=0",
+                    # Base de temps fine: en 1/25 (celle de l'image), N/fps serait arrondi et décalerait les fondus
+                    "settb=AVTB",
+                    f"setpts=N/({fps}*TB)",
+                    "format=rgba"
+                ] + effects
+            elif layer["type"] == "video":
+                # Vidéo déjà préparée à la résolution et à la cadence du rendu: bouclée puis coupée, sans mise à l'échelle
+                inputs.extend(["-stream_loop", "-1", "-i", layer["path"]])
+                input_index = sum(1 for arg in inputs if arg == "-i") - 1
+                chain = [
+                    f"[{input_index}:v]trim=start={format_seconds(layer.get('offset', 0))}"
+                    f":duration={format_seconds(layer_duration)}",
+                    "setpts=PTS-STARTPTS",
+                    "format=rgba"
+                ] + effects
+            else:
+                raise ValueError(f"Type de calque non pris en charge par le rendu ffmpeg: {layer['type']}")
+            
+            chain.append(f"setpts=PTS+{format_seconds(start)}/TB")
+            filters.append(",".join(chain) + f"[{layer_label}]")
+            
+            x, y = _position_expressions(layer)
+            next_label = f"{prefix}c{index}"
+            filters.append(f"[{current}][{layer_label}]overlay=x='{x}':y='{y}':eof_action=pass:format=auto[{next_label}]")
+            current = next_label
+        
+        output_label = f"{prefix}out"
+        chain = [f"[{current}]format=yuv420p", "setsar=1"]
+        if still_frames:
+            chain += [f"loop=loop={still_frames - 1}:size=1:start=0", f"setpts=N/({fps}*TB)"]
+        filters.append(",".join(chain) + f"[{output_label}]")
+        return output_label
+    
+    def build_command(self, plan, output_path, segments=None, include_audio=True,
+                      video_args=None, audio_args=None):
+        """
+        Construit la ligne de commande ffmpeg d'un plan de rendu
+        
+        Args:
+            plan (dict): Plan de rendu (resolution, fps, segments, audio, captions)
+            output_path (str): Chemin de la vidéo de sortie
+            segments (list, optional): Indices des segments à rendre. Par défaut tous
+            include_audio (bool, optional): Ajouter la narration et les sous-titres en flux séparé.
+                Par défaut True (les sous-titres incrustés le sont toujours)
+            video_args (list, optional): Paramètres d'encodage vidéo
+            audio_args (list, optional): Paramètres d'encodage audio
+        
+        Returns:
+            list: Arguments ffmpeg (sans l'exécutable)
+        """
+        resolution = tuple(plan["resolution"])
+        fps = plan["fps"]
+        indices = list(range(len(plan["segments"]))) if segments is None else list(segments)
+        
+        inputs = []
+        filters = []
+        labels = []
+        for index in indices:
+            labels.append(self._compile_segment(plan["segments"][index], resolution, fps, inputs, filters, f"s{index}"))
+        
+        total_duration = sum(plan["segments"][index]["duration"] for index in indices)
+        range_start = self.segment_starts(plan)[indices[0]]
+        
+        # Sous-titres incrustés dans le même passage, aux temps de la plage rendue
+        burned_path = self._captions_file(plan, "burn", range_start, range_start + total_duration)
+        video_label = "vcat" if burned_path else "vout"
+        if len(labels) > 1:
+            filters.append("".join(f"[{label}]" for label in labels) + f"concat=n={len(labels)}:v=1:a=0[{video_label}]")
+        else:
+            filters.append(f"[{labels[0]}]null[{video_label}]")
+        if burned_path:
+            filters.append(f"[vcat]subtitles=filename={escape_filter_value(burned_path)}[vout]")
+        
+        args = inputs[:]
+        output_args = ["-map", "[vout]"]
+        
+        if include_audio:
+            caption_args = self._compile_soft_captions(plan, args, range_start, range_start + total_duration)
+            if plan.get("audio"):
+                audio_label = self._compile_audio(plan, args, filters, range_start)
+                output_args += ["-map", f"[{audio_label}]"] + (audio_args or DEFAULT_AUDIO_ARGS)
+            output_args += caption_args
+        
+        args += ["-filter_complex", ";".join(filters)]
+        args += output_args + (video_args or DEFAULT_VIDEO_ARGS)
+        args += ["-r", str(fps), "-t", format_seconds(total_duration), output_path]
+        return args
+    
+    def _compile_audio(self, plan, inputs, filters, range_start):
+        """
+        Compile les pistes audio du plan, décalées par rapport au début de la plage rendue
+        
+        Args:
+            plan (dict): Plan de rendu
+            inputs (list): Arguments d'entrée ffmpeg, complétés par cette méthode
+            filters (list): Chaînes de filtres, complétées par cette méthode
+            range_start (float): Instant de la vidéo finale correspondant au début du rendu
+        
+        Returns:
+            str: Étiquette de sortie audio
+        """
+        for audio_index, audio in enumerate(plan["audio"]):
+            inputs.extend(["-i", audio["path"]])
+            input_index = sum(1 for arg in inputs if arg == "-i") - 1
+            delay_ms = int(round((audio["start"] - range_start) * 1000))
+            chain = f"[{input_index}:a]"
+            if delay_ms > 0:
+                chain += f"adelay=delays={delay_ms}:all=1,"
+            elif delay_ms < 0:
+                chain += f"atrim=start={format_seconds(-delay_ms / 1000)},asetpts=PTS-STARTPTS,"
+            filters.append(chain + f"apad[a{audio_index}]")
+        
+        if len(plan["audio"]) > 1:
+            filters.append("".join(f"[a{i}]" for i in range(len(plan["audio"])))
+                           + f"amix=inputs={len(plan['audio'])}:normalize=0[aout]")
+        else:
+            filters.append("[a0]anull[aout]")
+        
+        return "aout"
+    
+    def _caption_track(self, plan, mode, range_start, range_end):
+        """
+        Args:
+            plan (dict): Plan de rendu
+            mode (str): Rendu des sous-titres recherché ("burn" ou "soft")
+            range_start (float): Début de la plage rendue dans la vidéo finale
+            range_end (float): Fin de la plage rendue
+        
+        Returns:
+            SubtitleTrack: Sous-titres de la plage aux temps locaux, ou None si le plan n'en a pas à rendre ainsi
+        """
+        captions = plan.get("captions")
+        if not captions or captions["mode"] != mode:
+            return None
+        track = SubtitleTrack(captions["cues"]).between(range_start, range_end)
+        return track if track.cues else None
+    
+    def _captions_file(self, plan, mode, range_start, range_end, resolution=None):
+        """
+        Écrit les sous-titres d'une plage dans le répertoire de travail (ASS à incruster, SRT sinon)
+        
+        Le nom du fichier dérive de son contenu: les processus du rendu parallèle peuvent
+        l'écrire en même temps sans conflit, et il est réutilisé d'un rendu à l'autre.
+        
+        Args:
+            plan (dict): Plan de rendu
+            mode (str): Rendu des sous-titres ("burn" ou "soft")
+            range_start (float): Début de la plage rendue dans la vidéo finale
+            range_end (float): Fin de la plage rendue
+            resolution (tuple, optional): Résolution de la sortie où incruster les sous-titres.
+                Par défaut celle du plan
+        
+        Returns:
+            str: Chemin du fichier, ou None si la plage n'a pas de sous-titres à rendre ainsi
+        """
+        track = self._caption_track(plan, mode, range_start, range_end)
+        if track is None:
+            return None
+        
+        content = track.to_ass(tuple(resolution or plan["resolution"])) if mode == "burn" else track.to_srt()
+        caption_dir = os.path.join(self.work_dir, 'captions')
+        os.makedirs(caption_dir, exist_ok=True)
+        key = hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(caption_dir, f"{key}.{'ass' if mode == 'burn' else 'srt'}")
+        if not os.path.exists(path):
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        return path
+    
+    def _compile_soft_captions(self, plan, inputs, range_start, range_end):
+        """
+        Ajoute les sous-titres en flux séparé de la plage rendue comme entrée SRT
+        
+        Args:
+            plan (dict): Plan de rendu
+            inputs (list): Arguments d'entrée ffmpeg, complétés par cette méthode
+            range_start (float): Début de la plage rendue dans la vidéo finale
+            range_end (float): Fin de la plage rendue
+        
+        Returns:
+            list: Paramètres de sortie du flux de sous-titres (vide sans sous-titres en flux séparé)
+        """
+        captions_path = self._captions_file(plan, "soft", range_start, range_end)
+        if captions_path is None:
+            return []
+        inputs.extend(["-i", captions_path])
+        input_index = sum(1 for arg in inputs if arg == "-i") - 1
+        return ["-map", f"{input_index}:s"] + SOFT_SUBTITLE_ARGS
+    
+    def _compile_outputs(self, plan, outputs, video_label, inputs, filters, profile=None, include_audio=True):
+        """
+        Dérive les formats de sortie de l'image composée et construit les paramètres de chaque sortie
+        
+        L'image composée est dupliquée par split (et la narration par asplit), puis chaque copie
+        est cadrée au format et reçoit ses sous-titres incrustés à sa propre résolution.
+        
+        Args:
+            plan (dict): Plan de rendu (vidéo entière)
+            outputs (list): Couples (OutputFormat, chemin de sortie)
+            video_label (str): Étiquette de l'image composée dans le graphe de filtres
+            inputs (list): Arguments d'entrée ffmpeg, complétés par cette méthode
+            filters (list): Chaînes de filtres, complétées par cette méthode
+            profile (RenderProfile, optional): Profil d'encodage, réglé pour la résolution de chaque format
+            include_audio (bool, optional): Ajouter la narration et les sous-titres en flux séparé. Par défaut True
+        
+        Returns:
+            list: Paramètres de toutes les sorties, chacune terminée par son chemin
+        """
+        fps = plan["fps"]
+        source_resolution = tuple(plan["resolution"])
+        duration = sum(segment["duration"] for segment in plan["segments"])
+        count = len(outputs)
+        
+        video_labels = [video_label]
+        if count > 1:
+            video_labels = [f"split{index}" for index in range(count)]
+            filters.append(f"[{video_label}]split={count}" + "".join(f"[{label}]" for label in video_labels))
+        
+        audio_labels = []
+        if include_audio and plan.get("audio"):
+            audio_label = self._compile_audio(plan, inputs, filters, 0.0)
+            audio_labels = [audio_label]
+            if count > 1:
+                audio_labels = [f"asplit{index}" for index in range(count)]
+                filters.append(f"[{audio_label}]asplit={count}" + "".join(f"[{label}]" for label in audio_labels))
+        audio_args = profile.ffmpeg_audio_args() if profile else DEFAULT_AUDIO_ARGS
+        
+        args = []
+        for index, (output_format, path) in enumerate(outputs):
+            resolution = output_format.resolution
+            output_duration = output_format.duration(duration)
+            
+            chain = output_format.filters(source_resolution, resolution)
+            burned_path = self._captions_file(plan, "burn", 0.0, output_duration, resolution)
+            if burned_path:
+                chain.append(f"subtitles=filename={escape_filter_value(burned_path)}")
+            filters.append(f"[{video_labels[index]}]" + ",".join(chain or ["null"]) + f"[fmt{index}]")
+            
+            if profile is None:
+                video_args = DEFAULT_VIDEO_ARGS
+            else:
+                video_args = profile.ffmpeg_video_args(fps, plan.get("visual_style"), resolution)
+                video_args = video_args + ["-threads", str(profile.threads)]
+            
+            args += ["-map", f"[fmt{index}]"]
+            if audio_labels:
+                args += ["-map", f"[{audio_labels[index]}]"] + audio_args
+            if include_audio:
+                args += self._compile_soft_captions(plan, inputs, 0.0, output_duration)
+            args += video_args + ["-r", str(fps), "-t", format_seconds(output_duration), path]
+        return args
+    
+    def build_formats_command(self, plan, outputs, profile=None):
+        """
+        Construit la ligne de commande ffmpeg qui rend un plan dans plusieurs formats en un seul passage
+        
+        Les segments sont composés une seule fois, à la résolution du plan; chaque format en est
+        dérivé par le graphe de filtres et encodé vers sa propre sortie.
+        
+        Args:
+            plan (dict): Plan de rendu
+            outputs (list): Couples (OutputFormat, chemin de sortie)
+            profile (RenderProfile, optional): Profil d'encodage (en une seule passe)
+        
+        Returns:
+            list: Arguments ffmpeg (sans l'exécutable)
+        """
+        resolution = tuple(plan["resolution"])
+        inputs = []
+        filters = []
+        labels = [self._compile_segment(segment, resolution, plan["fps"], inputs, filters, f"s{index}")
+                  for index, segment in enumerate(plan["segments"])]
+        if len(labels) > 1:
+            filters.append("".join(f"[{label}]" for label in labels) + f"concat=n={len(labels)}:v=1:a=0[vcomp]")
+        else:
+            filters.append(f"[{labels[0]}]null[vcomp]")
+        
+        args = inputs[:]
+        output_args = self._compile_outputs(plan, outputs, "vcomp", args, filters, profile)
+        return args + ["-filter_complex", ";".join(filters)] + output_args
+    
+    def render_formats(self, plan, outputs, profile=None):
+        """
+        Rend un plan dans plusieurs formats (par exemple 16:9 et Shorts 9:16) avec un seul processus ffmpeg
+        
+        Args:
+            plan (dict): Plan de rendu
+            outputs (list): Couples (OutputFormat, chemin de sortie)
+            profile (RenderProfile, optional): Profil d'encodage
+        
+        Returns:
+            list: Chemins des vidéos générées, dans l'ordre des formats
+        """
+        if profile and profile.two_pass:
+            raise ValueError("Le rendu en plusieurs formats se fait en une seule passe")
+        names = ", ".join(output_format.name for output_format, _ in outputs)
+        run_ffmpeg(self.build_formats_command(plan, outputs, profile), description=f"rendu ffmpeg des formats {names}")
+        return [path for _, path in outputs]
+    
+    def segment_starts(self, plan):
+        """
+        Calcule l'instant de départ de chaque segment dans la vidéo finale
+        
+        Args:
+            plan (dict): Plan de rendu
+        
+        Returns:
+            list: Instants de départ en secondes
+        """
+        starts = []
+        position = 0.0
+        for segment in plan["segments"]:
+            starts.append(position)
+            position += segment["duration"]
+        return starts
+    
+    def _profile_args(self, plan, profile, video_args=None, audio_args=None):
+        """
+        Détermine les paramètres d'encodage à partir du profil de rendu
+        
+        Args:
+            plan (dict): Plan de rendu
+            profile (RenderProfile): Profil de rendu, None pour les paramètres par défaut
+            video_args (list, optional): Paramètres vidéo imposés
+            audio_args (list, optional): Paramètres audio imposés
+        
+        Returns:
+            tuple: (paramètres vidéo, paramètres audio, nombre de threads ou None)
+        """
+        if profile is None:
+            return video_args or DEFAULT_VIDEO_ARGS, audio_args or DEFAULT_AUDIO_ARGS, None
+        
+        video_args = video_args or profile.ffmpeg_video_args(plan["fps"], plan.get("visual_style"),
+                                                             tuple(plan["resolution"]))
+        return video_args, audio_args or profile.ffmpeg_audio_args(), profile.threads
+    
+    def _encoding_passes(self, plan, output_path, video_args, threads=None, two_pass=False,
+                         passlog=None, **options):
+        """
+        Construit les commandes d'encodage, en une ou deux passes
+        
+        Args:
+            plan (dict): Plan de rendu
+            output_path (str): Chemin de la vidéo de sortie
+            video_args (list): Paramètres d'encodage vidéo
+            threads (int, optional): Nombre de threads d'encodage
+            two_pass (bool, optional): Encoder en deux passes. Par défaut False
+            passlog (str, optional): Préfixe des fichiers de statistiques de la première passe
+            **options: Options transmises à build_command
+        
+        Returns:
+            list: Arguments ffmpeg de chaque passe
+        """
+        if threads:
+            video_args = video_args + ["-threads", str(threads)]
+        if not two_pass:
+            return [self.build_command(plan, output_path, video_args=video_args, **options)]
+        
+        # La première passe ne produit que les statistiques de débit, sans audio
+        first_options = dict(options, include_audio=False)
+        first = self.build_command(plan, os.devnull, video_args=video_args + ["-pass", "1", "-passlogfile", passlog, "-f", "mp4"],
+                                   **first_options)
+        second = self.build_command(plan, output_path, video_args=video_args + ["-pass", "2", "-passlogfile", passlog],
+                                    **options)
+        return [first, second]
+    
+    def render(self, plan, output_path, profile=None, **options):
+        """
+        Rend un plan de rendu avec ffmpeg
+        
+        Args:
+            plan (dict): Plan de rendu
+            output_path (str): Chemin de la vidéo de sortie
+            profile (RenderProfile, optional): Profil de rendu (préréglage, qualité, threads, deux passes)
+            **options: Options transmises à build_command
+        
+        Returns:
+            str: Chemin de la vidéo générée
+        """
+        video_args, audio_args, threads = self._profile_args(plan, profile, options.pop("video_args", None),
+                                                             options.pop("audio_args", None))
+        passlog = os.path.join(self.work_dir, f"passlog_{os.getpid()}_{os.path.basename(output_path)}")
+        
+        try:
+            for args in self._encoding_passes(plan, output_path, video_args, threads,
+                                              two_pass=bool(profile and profile.two_pass), passlog=passlog,
+                                              audio_args=audio_args, **options):
+                run_ffmpeg(args, description=f"rendu ffmpeg de {os.path.basename(output_path)}")
+        finally:
+            for path in glob.glob(glob.escape(passlog) + "*"):
+                os.remove(path)
+        
+        return output_path
+    
+    def concat(self, plan, segment_paths, output_path, audio_args=None, list_dir=None):
+        """
+        Assemble des segments encodés avec les mêmes paramètres, sans réencodage, et ajoute la
+        narration et les sous-titres en flux séparé
+        
+        Args:
+            plan (dict): Plan de rendu de la vidéo complète (durée et narration)
+            segment_paths (list): Segments dans l'ordre de la vidéo
+            output_path (str): Chemin de la vidéo de sortie
+            audio_args (list, optional): Paramètres d'encodage audio
+            list_dir (str, optional): Répertoire de la liste des segments. Par défaut le répertoire de travail
+        
+        Returns:
+            str: Chemin de la vidéo générée
+        """
+        list_path = os.path.join(list_dir or self.work_dir, f"segments_{os.getpid()}_{os.path.basename(output_path)}.txt")
+        try:
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for path in segment_paths:
+                    escaped = path.replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            
+            total_duration = sum(segment["duration"] for segment in plan["segments"])
+            args = ["-f", "concat", "-safe", "0", "-i", list_path]
+            output_args = ["-map", "0:v", "-c:v", "copy"]
+            caption_args = self._compile_soft_captions(plan, args, 0.0, total_duration)
+            if plan.get("audio"):
+                filters = []
+                audio_label = self._compile_audio(plan, args, filters, 0.0)
+                args += ["-filter_complex", ";".join(filters)]
+                output_args += ["-map", f"[{audio_label}]"] + (audio_args or DEFAULT_AUDIO_ARGS)
+            output_args += caption_args
+            
+            args += output_args + ["-t", format_seconds(total_duration), output_path]
+            run_ffmpeg(args, description=f"assemblage de {os.path.basename(output_path)}")
+        finally:
+            if os.path.exists(list_path):
+                os.remove(list_path)
+        
+        return output_path
+    
+    def render_parallel(self, plan, output_path, workers=None, video_args=None, audio_args=None, profile=None):
+        """
+        Rend chaque segment dans un processus séparé puis les assemble sans réencodage
+        
+        Tous les segments sont encodés avec les mêmes paramètres, ce qui permet de les
+        joindre avec le démultiplexeur concat en copie de flux. La narration est ajoutée
+        une seule fois lors de l'assemblage. Les segments marqués "cache" dans le plan
+        (intro, outro) sont repris du cache des segments lorsqu'ils y figurent déjà.
+        
+        Args:
+            plan (dict): Plan de rendu
+            output_path (str): Chemin de la vidéo de sortie
+            workers (int, optional): Nombre de segments rendus simultanément. Par défaut le nombre de cœurs
+            video_args (list, optional): Paramètres d'encodage vidéo, communs à tous les segments
+            audio_args (list, optional): Paramètres d'encodage audio
+            profile (RenderProfile, optional): Profil de rendu; ses threads sont répartis entre les processus
+        
+        Returns:
+            str: Chemin de la vidéo générée
+        """
+        segment_dir = tempfile.mkdtemp(prefix='segments_', dir=self.work_dir)
+        cache_entries = {}
+        try:
+            resolution = tuple(plan["resolution"])
+            resolved_video_args, audio_args, threads = self._profile_args(plan, profile, video_args, audio_args)
+            workers = max(1, min(workers or os.cpu_count() or 1, len(plan["segments"])))
+            segment_threads = max(1, threads // workers) if threads else None
+            two_pass = bool(profile and profile.two_pass)
+            
+            # Les parties consécutives d'une même section (intervalles fixes isolés) sont rendues ensemble
+            groups = []
+            for index, segment in enumerate(plan["segments"]):
+                previous = plan["segments"][groups[-1][-1]] if groups else None
+                if (previous and not segment.get("cache") and not previous.get("cache")
+                        and previous["name"] == segment["name"]):
+                    groups[-1].append(index)
+                else:
+                    groups.append([index])
+            segment_paths = [None] * len(groups)
+            starts = self.segment_starts(plan)
+            
+            # Les images de texte sont générées ici, avant la répartition, pour éviter les écritures concurrentes
+            indices = []
+            commands = []
+            descriptions = []
+            for group_index, group in enumerate(groups):
+                index = group[0]
+                segment = plan["segments"][index]
+                if self.segment_cache and segment.get("cache"):
+                    # Des sous-titres incrustés font partie de l'image du segment, donc de sa clé
+                    captions = self._caption_track(plan, "burn", starts[index], starts[index] + segment["duration"])
+                    keyed_segment = dict(segment, captions=captions.cues) if captions else segment
+                    key = self.segment_cache.key(keyed_segment, resolution, plan["fps"], resolved_video_args)
+                    cached_path = self.segment_cache.get(segment["name"], key)
+                    if cached_path:
+                        print(f"Segment {segment['name']} repris du cache")
+                        segment_paths[group_index] = cached_path
+                        continue
+                    cache_entries[index] = key
+                    segment_path = self.segment_cache.temp_path(segment["name"], key)
+                else:
+                    segment_path = os.path.join(segment_dir, f"segment_{index:03d}.mp4")
+                
+                indices.append(group_index)
+                commands.append(self._encoding_passes(plan, segment_path, resolved_video_args, segment_threads,
+                                                      two_pass=two_pass,
+                                                      passlog=os.path.join(segment_dir, f"passlog_{index:03d}"),
+                                                      segments=group, include_audio=False))
+                descriptions.append(f"rendu du segment {segment['name']}")
+            
+            if commands:
+                workers = min(workers, len(commands))
+                print(f"Rendu de {len(commands)} segments avec {workers} processus")
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    for group_index, path in zip(indices, executor.map(_render_segment, commands, descriptions)):
+                        index = groups[group_index][0]
+                        if index in cache_entries:
+                            path = self.segment_cache.store(path, plan["segments"][index]["name"], cache_entries[index])
+                        segment_paths[group_index] = path
+            
+            self.concat(plan, segment_paths, output_path, audio_args, list_dir=segment_dir)
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+            for index, key in cache_entries.items():
+                temp_path = self.segment_cache.temp_path(plan["segments"][index]["name"], key)
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        
+        return output_path
@@ -0,0 +1,126 @@
+"""
+Module d'utilitaires ffmpeg pour AutoTubeCPM
+Ce module centralise l'appel aux exécutables ffmpeg et ffprobe
+"""
+
+import os
+import re
+import json
+import subprocess
+
+# Exécutables utilisés (même variable d'environnement que MoviePy pour ffmpeg)
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.environ.get("FFPROBE_BINARY", "ffprobe")
+
+
+def run_ffmpeg(args, description="ffmpeg"):
+    """
+    Exécute ffmpeg et lève une erreur explicite en cas d'échec
+    
+    Args:
+        args (list): Arguments de la ligne de commande, sans l'exécutable
+        description (str, optional): Description de l'opération pour les messages d'erreur
+    
+    Returns:
+        subprocess.CompletedProcess: Résultat de l'exécution
+    """
+    command = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y"] + list(args)
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    if result.returncode != 0:
+        error = result.stderr.decode('utf-8', errors='replace').strip()[-2000:]
+        raise RuntimeError(f"Échec de {description} (code {result.returncode}): {error}")
+    
+    return result
+
+
+def probe(path, sections=None):
+    """
+    Lit les informations d'un fichier multimédia avec ffprobe
+    
+    Args:
+        path (str): Chemin du fichier
+        sections (list, optional): Options de sélection de ffprobe. Par défaut format et flux
+    
+    Returns:
+        dict: Sortie JSON de ffprobe (format et flux)
+    """
+    sections = sections or ["-show_format", "-show_streams"]
+    command = [FFPROBE_BINARY, "-v", "error", "-print_format", "json"] + list(sections) + [path]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    if result.returncode != 0:
+        error = result.stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"Impossible d'analyser {path}: {error}")
+    
+    return json.loads(result.stdout.decode('utf-8'))
+
+
+def probe_duration(path):
+    """
+    Lit la durée d'un fichier multimédia sans le décoder
+    
+    Args:
+        path (str): Chemin du fichier
+    
+    Returns:
+        float: Durée en secondes
+    """
+    return float(probe(path)["format"]["duration"])
+
+
+def probe_packets(path):
+    """
+    Lit les paquets de la première piste vidéo (instant, position, taille, drapeaux) sans les décoder
+    
+    Args:
+        path (str): Chemin du fichier
+    
+    Returns:
+        dict: Sortie JSON de ffprobe (durée, dimensions de la piste et paquets)
+    """
+    return probe(path, ["-select_streams", "v:0", "-show_entries",
+                        "format=duration:stream=width,height:packet=pts_time,pos,size,flags"])
+
+
+def ffmpeg_color(color):
+    """
+    Convertit une couleur RGB en notation ffmpeg
+    
+    Args:
+        color (tuple): Couleur (r, g, b)
+    
+    Returns:
+        str: Couleur au format 0xRRGGBB
+    """
+    r, g, b = (int(c) for c in color[:3])
+    return f"0x{r:02x}{g:02x}{b:02x}"
+
+
+def format_seconds(seconds):
+    """
+    Formate une durée pour les options ffmpeg, sans notation scientifique
+    
+    Args:
+        seconds (float): Durée en secondes
+    
+    Returns:
+        str: Durée avec au plus 6 décimales
+    """
+    return f"{seconds:.6f}".rstrip('0').rstrip('.') or "0"
+
+
+def escape_filter_value(value):
+    """
+    Échappe une valeur d'option (chemin de fichier) pour un graphe de filtres ffmpeg
+    
+    La valeur est échappée une fois pour l'option du filtre, puis une fois pour le graphe.
+    
+    Args:
+        value (str): Valeur à échapper
+    
+    Returns:
+        str: Valeur échappée
+    """
+    value = re.sub(r"([\\':])", r"\\\1", value)
+    return re.sub(r"([\\'\[\],;])", r"\\\1", value)
@@ -0,0 +1,197 @@
+"""
+Module d'index des images clés pour AutoTubeCPM
+Ce module relève les images clés d'une vidéo rendue (instant, position dans le fichier) et en
+assemble une planche réduite, pour atteindre ou prévisualiser un instant sans décoder la vidéo
+"""
+
+import os
+import json
+import math
+from bisect import bisect_right
+
+from .ffmpeg_utils import run_ffmpeg, probe_packets
+
+# Fichiers écrits à côté de la vidéo: l'index et sa planche d'images
+KEYFRAME_INDEX_SUFFIX = ".keyframes.json"
+KEYFRAME_STRIP_SUFFIX = ".keyframes.jpg"
+
+# Planche: largeur d'une vignette, nombre de colonnes et nombre maximal de vignettes
+DEFAULT_TILE_WIDTH = 160
+DEFAULT_STRIP_COLUMNS = 10
+DEFAULT_MAX_TILES = 100
+
+
+class KeyframeIndex:
+    """Classe représentant les images clés d'une vidéo et leur planche de vignettes"""
+    
+    def __init__(self, keyframes, duration, resolution, strip=None, path=None):
+        """
+        Initialise l'index
+        
+        Args:
+            keyframes (list): Images clés {"time", "pos", "size"}: instant en secondes, position
+                et taille en octets du paquet dans le fichier
+            duration (float): Durée de la vidéo en secondes
+            resolution (tuple): Résolution de la vidéo (largeur, hauteur)
+            strip (dict, optional): Planche {"tile_width", "tile_height", "columns", "tiles"}, où tiles
+                donne l'indice de l'image clé de chaque vignette
+            path (str, optional): Chemin de l'index, qui situe la planche
+        """
+        self.keyframes = sorted(keyframes, key=lambda keyframe: keyframe["time"])
+        self.duration = duration
+        self.resolution = tuple(resolution)
+        self.strip = strip
+        self.path = path
+        self._times = [keyframe["time"] for keyframe in self.keyframes]
+    
+    @classmethod
+    def build(cls, video_path, strip=True, tile_width=DEFAULT_TILE_WIDTH, columns=DEFAULT_STRIP_COLUMNS,
+              max_tiles=DEFAULT_MAX_TILES):
+        """
+        Relève les images clés d'une vidéo et écrit l'index (et sa planche) à côté d'elle
+        
+        Les paquets sont lus par ffprobe sans décodage; la planche ne décode que les images clés.
+        
+        Args:
+            video_path (str): Chemin de la vidéo
+            strip (bool, optional): Assembler la planche de vignettes. Par défaut True
+            tile_width (int, optional): Largeur d'une vignette. Par défaut 160
+            columns (int, optional): Nombre de vignettes par ligne. Par défaut 10
+            max_tiles (int, optional): Nombre maximal de vignettes, réparties sur la vidéo. Par défaut 100
+        
+        Returns:
+            KeyframeIndex: Index sauvegardé
+        """
+        info = probe_packets(video_path)
+        stream = info["streams"][0]
+        keyframes = []
+        for packet in info.get("packets", []):
+            # Drapeaux "K__" pour une image clé; certains paquets n'ont pas d'instant ("N/A")
+            if not packet.get("flags", "").startswith("K") or packet.get("pts_time", "N/A") == "N/A":
+                continue
+            keyframes.append({
+                "time": round(float(packet["pts_time"]), 6),
+                "pos": int(packet["pos"]) if packet.get("pos", "N/A") != "N/A" else None,
+                "size": int(packet.get("size", 0))
+            })
+        
+        index = cls(keyframes, float(info["format"]["duration"]), (stream["width"], stream["height"]),
+                    path=os.path.splitext(video_path)[0] + KEYFRAME_INDEX_SUFFIX)
+        if strip and index.keyframes:
+            index.build_strip(video_path, tile_width, columns, max_tiles)
+        return index.save(index.path)
+    
+    def build_strip(self, video_path, tile_width=DEFAULT_TILE_WIDTH, columns=DEFAULT_STRIP_COLUMNS,
+                    max_tiles=DEFAULT_MAX_TILES):
+        """
+        Assemble les vignettes des images clés en une planche JPEG, en une seule lecture de la vidéo
+        
+        Args:
+            video_path (str): Chemin de la vidéo
+            tile_width (int, optional): Largeur d'une vignette. Par défaut 160
+            columns (int, optional): Nombre de vignettes par ligne. Par défaut 10
+            max_tiles (int, optional): Nombre maximal de vignettes. Par défaut 100
+        
+        Returns:
+            str: Chemin de la planche
+        """
+        width, height = self.resolution
+        tile_height = max(2, int(round(tile_width * height / width / 2)) * 2)
+        step = math.ceil(len(self.keyframes) / max_tiles)
+        tiles = list(range(0, len(self.keyframes), step))
+        columns = min(columns, len(tiles))
+        rows = math.ceil(len(tiles) / columns)
+        
+        # Le décodeur ignore tout sauf les images clés: n compte les images clés
+        filters = [f"select=not(mod(n\\,{step}))"] if step > 1 else []
+        filters += [f"scale={tile_width}:{tile_height}", "setsar=1", f"tile={columns}x{rows}"]
+        strip_path = self.strip_path()
+        run_ffmpeg(["-skip_frame", "nokey", "-i", video_path, "-an", "-sn", "-vf", ",".join(filters),
+                    "-frames:v", "1", "-q:v", "4", strip_path],
+                   description=f"planche des images clés de {os.path.basename(video_path)}")
+        
+        self.strip = {"tile_width": tile_width, "tile_height": tile_height, "columns": columns, "tiles": tiles}
+        return strip_path
+    
+    def strip_path(self):
+        """
+        Returns:
+            str: Chemin de la planche, à côté de l'index
+        """
+        return self.path[:-len(KEYFRAME_INDEX_SUFFIX)] + KEYFRAME_STRIP_SUFFIX
+    
+    def keyframe_at(self, t):
+        """
+        Renvoie l'image clé à partir de laquelle décoder pour atteindre un instant
+        
+        Args:
+            t (float): Instant en secondes
+        
+        Returns:
+            dict: Dernière image clé à l'instant t ou avant, ou None si l'index est vide
+        """
+        if not self.keyframes:
+            return None
+        return self.keyframes[max(0, bisect_right(self._times, t + 1e-6) - 1)]
+    
+    def tile_at(self, t):
+        """
+        Renvoie la zone de la planche qui représente un instant
+        
+        Args:
+            t (float): Instant en secondes
+        
+        Returns:
+            tuple: Zone (x, y, largeur, hauteur) de la vignette dans la planche, ou None sans planche
+        """
+        if not self.strip or not self.keyframes:
+            return None
+        keyframe = max(0, bisect_right(self._times, t + 1e-6) - 1)
+        tile = max(0, bisect_right(self.strip["tiles"], keyframe) - 1)
+        width, height = self.strip["tile_width"], self.strip["tile_height"]
+        columns = self.strip["columns"]
+        return ((tile % columns) * width, (tile // columns) * height, width, height)
+    
+    def to_dict(self):
+        """
+        Returns:
+            dict: Index sérialisable en JSON
+        """
+        return {
+            "duration": self.duration,
+            "resolution": list(self.resolution),
+            "keyframes": self.keyframes,
+            "strip": self.strip
+        }
+    
+    def save(self, path):
+        """
+        Écrit l'index en JSON
+        
+        Args:
+            path (str): Chemin de l'index (se terminant par .keyframes.json)
+        
+        Returns:
+            KeyframeIndex: Index sauvegardé
+        """
+        self.path = path
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(temp_path, path)
+        return self
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Lit un index sauvegardé
+        
+        Args:
+            path (str): Chemin de l'index
+        
+        Returns:
+            KeyframeIndex: Index lu
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["keyframes"], data["duration"], data["resolution"], data.get("strip"), path)
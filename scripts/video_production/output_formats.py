@@ -0,0 +1,135 @@
+"""
+Module des formats de sortie pour AutoTubeCPM
+Ce module décrit les déclinaisons d'une même vidéo (paysage 16:9, Shorts verticaux 9:16), dérivées
+de l'image composée et encodées dans le même passage ffmpeg
+"""
+
+# Cadrages possibles d'une image composée dans un format de proportions différentes
+FIT_MODES = ("crop", "pad")
+
+# Formats disponibles
+OUTPUT_FORMATS = {
+    "landscape": {
+        "description": "Vidéo YouTube 16:9",
+        "resolution": (1920, 1080),
+        "fit": "crop",
+        "max_duration": None
+    },
+    "shorts": {
+        "description": "Short vertical 9:16, centre de l'image, limité à 60 secondes",
+        "resolution": (1080, 1920),
+        "fit": "crop",
+        "max_duration": 60
+    }
+}
+
+
+class OutputFormat:
+    """Classe décrivant un format de sortie et son cadrage à partir de l'image composée"""
+    
+    def __init__(self, name, resolution, fit="crop", max_duration=None, description=""):
+        """
+        Initialise le format
+        
+        Args:
+            name (str): Nom du format, ajouté au nom du fichier de sortie
+            resolution (tuple): Résolution de sortie (largeur, hauteur)
+            fit (str, optional): "crop" (recadrage au centre) ou "pad" (bandes noires). Par défaut "crop"
+            max_duration (float, optional): Durée maximale de la sortie en secondes. Par défaut la vidéo entière
+            description (str, optional): Description du format
+        """
+        if fit not in FIT_MODES:
+            raise ValueError(f"Cadrage inconnu: {fit}. Valeurs possibles: {', '.join(FIT_MODES)}")
+        self.name = name
+        self.resolution = tuple(resolution)
+        self.fit = fit
+        self.max_duration = max_duration
+        self.description = description
+    
+    def duration(self, duration):
+        """
+        Args:
+            duration (float): Durée de la vidéo composée
+        
+        Returns:
+            float: Durée de la sortie
+        """
+        return min(duration, self.max_duration) if self.max_duration else duration
+    
+    def fit_resolution(self, source_resolution):
+        """
+        Résolution de sortie la plus grande qui n'agrandit pas l'image composée
+        
+        En recadrage, seule la zone conservée de l'image composée est utilisée (environ 608x1080
+        pour un Short tiré d'une image 1920x1080); avec des bandes, c'est l'image entière.
+        
+        Args:
+            source_resolution (tuple): Résolution de l'image composée
+        
+        Returns:
+            tuple: Résolution aux proportions du format, au plus celle du format, aux dimensions paires
+        """
+        width, height = self.resolution
+        source_width, source_height = source_resolution
+        ratios = (source_width / width, source_height / height)
+        scale = min(1.0, min(ratios) if self.fit == "crop" else max(ratios))
+        width, height = int(round(width * scale)), int(round(height * scale))
+        return (width - width % 2, height - height % 2)
+    
+    def filters(self, source_resolution, resolution=None):
+        """
+        Filtres ffmpeg qui cadrent l'image composée dans ce format
+        
+        Args:
+            source_resolution (tuple): Résolution de l'image composée
+            resolution (tuple, optional): Résolution de sortie. Par défaut celle du format
+        
+        Returns:
+            list: Filtres ffmpeg (vide si l'image composée est déjà au format)
+        """
+        width, height = resolution or self.resolution
+        if tuple(source_resolution) == (width, height):
+            return []
+        if self.fit == "crop":
+            filters = [f"scale={width}:{height}:force_original_aspect_ratio=increase", f"crop={width}:{height}"]
+        else:
+            filters = [f"scale={width}:{height}:force_original_aspect_ratio=decrease:force_divisible_by=2",
+                       f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black"]
+        return filters + ["setsar=1"]
+    
+    def to_dict(self):
+        """
+        Returns:
+            dict: Paramètres du format
+        """
+        return {
+            "name": self.name,
+            "resolution": list(self.resolution),
+            "fit": self.fit,
+            "max_duration": self.max_duration
+        }
+
+
+def get_output_format(output_format, **overrides):
+    """
+    Renvoie un format de sortie par son nom, avec d'éventuels paramètres modifiés
+    
+    Args:
+        output_format (str or OutputFormat): Nom du format ("landscape", "shorts") ou format
+        **overrides: Paramètres remplacés (ex: resolution=(720, 1280), max_duration=None)
+    
+    Returns:
+        OutputFormat: Format de sortie
+    """
+    if isinstance(output_format, OutputFormat):
+        if not overrides:
+            return output_format
+        settings = output_format.to_dict()
+        settings["description"] = output_format.description
+    elif output_format in OUTPUT_FORMATS:
+        settings = dict(OUTPUT_FORMATS[output_format], name=output_format)
+    else:
+        raise ValueError(f"Format de sortie inconnu: {output_format}. Valeurs possibles: {', '.join(OUTPUT_FORMATS)}")
+    
+    settings.update(overrides)
+    return OutputFormat(**settings)
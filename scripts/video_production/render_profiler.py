@@ -0,0 +1,186 @@
+"""
+Module de profilage du rendu pour AutoTubeCPM
+Ce module mesure le temps passé dans chaque étape de create_video et le coût de composition
+par image de chaque type de clip, puis écrit un rapport JSON et un résumé au format flamegraph
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+
+# Suffixes des rapports écrits à côté de la vidéo
+PROFILE_JSON_SUFFIX = ".profile.json"
+PROFILE_FOLDED_SUFFIX = ".profile.folded"
+
+# Préfixe des étapes mesurées image par image
+FRAME_STAGE_PREFIX = "frame:"
+
+
+class RenderProfiler:
+    """Classe pour mesurer les étapes du rendu et le coût des images par type de clip"""
+    
+    def __init__(self, enabled=True):
+        """
+        Initialise le profileur
+        
+        Args:
+            enabled (bool, optional): Activer les mesures. Désactivé, le profileur ne fait rien. Par défaut True
+        """
+        self.enabled = enabled
+        self._stack = []
+        self._calls = {}
+        self._totals = {}
+        self._children = {}
+        self._frame_max = {}
+        self._started = time.perf_counter()
+    
+    @contextmanager
+    def stage(self, name):
+        """
+        Mesure le temps d'une étape, imbriquée dans l'étape en cours
+        
+        Args:
+            name (str): Nom de l'étape
+        """
+        if not self.enabled:
+            yield
+            return
+        
+        self._stack.append(name)
+        path = ";".join(self._stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            self._calls[path] = self._calls.get(path, 0) + 1
+            self._totals[path] = self._totals.get(path, 0.0) + elapsed
+            if self._stack:
+                parent = ";".join(self._stack)
+                self._children[parent] = self._children.get(parent, 0.0) + elapsed
+            if name.startswith(FRAME_STAGE_PREFIX):
+                self._frame_max[path] = max(self._frame_max.get(path, 0.0), elapsed)
+    
+    def wrap_clip(self, clip, clip_type):
+        """
+        Instrumente un clip MoviePy pour mesurer le coût de chacune de ses images
+        
+        Les clips imbriqués (composites) étant calculés dans le même appel, le temps propre
+        de chaque type de clip est obtenu en retranchant celui de ses enfants.
+        
+        Args:
+            clip (VideoClip): Clip à instrumenter
+            clip_type (str): Type du clip dans le rapport (ex: "text", "visual:dynamic")
+        
+        Returns:
+            VideoClip: Clip instrumenté (le clip d'origine si le profileur est désactivé)
+        """
+        if not self.enabled or clip is None:
+            return clip
+        
+        def timed_frame(get_frame, t):
+            with self.stage(FRAME_STAGE_PREFIX + clip_type):
+                return get_frame(t)
+        
+        return clip.fl(timed_frame)
+    
+    def _self_time(self, path):
+        """
+        Args:
+            path (str): Chemin de l'étape (noms séparés par ";")
+        
+        Returns:
+            float: Temps passé dans l'étape hors sous-étapes, en secondes
+        """
+        return max(0.0, self._totals[path] - self._children.get(path, 0.0))
+    
+    def report(self):
+        """
+        Construit le rapport des mesures
+        
+        Returns:
+            dict: Durée totale, étapes (temps total et propre) et coût par image de chaque type de clip
+        """
+        stages = [
+            {
+                "path": path,
+                "calls": self._calls[path],
+                "total_seconds": round(self._totals[path], 6),
+                "self_seconds": round(self._self_time(path), 6)
+            }
+            for path in sorted(self._totals, key=lambda p: -self._totals[p])
+        ]
+        
+        frames = {}
+        for path, total in self._totals.items():
+            name = path.rsplit(";", 1)[-1]
+            if not name.startswith(FRAME_STAGE_PREFIX):
+                continue
+            clip_type = name[len(FRAME_STAGE_PREFIX):]
+            entry = frames.setdefault(clip_type, {"frames": 0, "total_seconds": 0.0, "self_seconds": 0.0, "max_ms": 0.0})
+            entry["frames"] += self._calls[path]
+            entry["total_seconds"] += total
+            entry["self_seconds"] += self._self_time(path)
+            entry["max_ms"] = max(entry["max_ms"], self._frame_max.get(path, 0.0) * 1000)
+        
+        for entry in frames.values():
+            entry["mean_ms"] = round(entry["total_seconds"] * 1000 / entry["frames"], 3)
+            entry["self_mean_ms"] = round(entry["self_seconds"] * 1000 / entry["frames"], 3)
+            entry["total_seconds"] = round(entry["total_seconds"], 6)
+            entry["self_seconds"] = round(entry["self_seconds"], 6)
+            entry["max_ms"] = round(entry["max_ms"], 3)
+        
+        return {
+            "wall_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": stages,
+            "frames": frames
+        }
+    
+    def folded(self):
+        """
+        Produit le résumé au format "folded stacks" (lisible par flamegraph.pl ou speedscope)
+        
+        Returns:
+            str: Une ligne par étape: chemin et temps propre en microsecondes
+        """
+        lines = []
+        for path in sorted(self._totals):
+            microseconds = int(round(self._self_time(path) * 1e6))
+            if microseconds > 0:
+                lines.append(f"{path} {microseconds}")
+        return "\n".join(lines) + "\n"
+    
+    def save(self, video_path, extra=None):
+        """
+        Écrit le rapport JSON et le résumé flamegraph à côté de la vidéo
+        
+        Args:
+            video_path (str): Chemin de la vidéo profilée
+            extra (dict, optional): Informations ajoutées au rapport (moteur, résolution, ...)
+        
+        Returns:
+            tuple: (chemin du rapport JSON, chemin du résumé flamegraph), ou None si désactivé
+        """
+        if not self.enabled:
+            return None
+        
+        report = {"video_path": video_path}
+        report.update(extra or {})
+        report.update(self.report())
+        
+        base_path = os.path.splitext(video_path)[0]
+        json_path = base_path + PROFILE_JSON_SUFFIX
+        folded_path = base_path + PROFILE_FOLDED_SUFFIX
+        
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            f.write(self.folded())
+        
+        print(f"Profil du rendu sauvegardé: {json_path}")
+        for stage in report["stages"][:8]:
+            print(f"  {stage['path']}: {stage['total_seconds']:.3f}s (propre {stage['self_seconds']:.3f}s)")
+        
+        return json_path, folded_path
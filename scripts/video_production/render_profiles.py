@@ -0,0 +1,344 @@
+"""
+Module des profils de rendu pour AutoTubeCPM
+Ce module définit les préréglages d'encodage (brouillon, standard, archive) partagés par les moteurs
+MoviePy et ffmpeg, et permet de mesurer la vitesse d'encodage de chacun
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+# Nombre de pixels de référence (1080p) des débits en deux passes, mis à l'échelle selon la résolution
+REFERENCE_PIXELS = 1920 * 1080
+
+# Durée entre deux images clés, en secondes. Un GOP fixe garantit que chaque segment commence
+# par une image clé et que les segments s'assemblent par copie de flux
+DEFAULT_GOP_SECONDS = 2
+
+# Styles visuels composés d'images fixes, pour lesquels x264 est réglé en "stillimage"
+STILL_IMAGE_STYLES = ("image_slideshow",)
+
+# Préréglages disponibles
+RENDER_PROFILES = {
+    "draft": {
+        "description": "Brouillon rapide en basse résolution, pour les aperçus de l'interface",
+        "preset": "ultrafast",
+        "crf": 30,
+        "max_height": 540,
+        "audio_bitrate": "96k",
+        "two_pass_bitrate": 1500
+    },
+    "standard": {
+        "description": "Qualité de publication, compromis entre vitesse et taille",
+        "preset": "medium",
+        "crf": 21,
+        "max_height": None,
+        "audio_bitrate": "192k",
+        "two_pass_bitrate": 6000
+    },
+    "archival": {
+        "description": "Qualité d'archive, encodage lent et CRF bas",
+        "preset": "slow",
+        "crf": 16,
+        "max_height": None,
+        "audio_bitrate": "320k",
+        "two_pass_bitrate": 12000
+    }
+}
+
+DEFAULT_RENDER_PROFILE = "standard"
+
+
+class RenderProfile:
+    """Classe décrivant un profil d'encodage et ses paramètres pour MoviePy et ffmpeg"""
+    
+    def __init__(self, name, preset, crf, max_height=None, audio_bitrate="192k", two_pass_bitrate=6000,
+                 two_pass=False, threads=None, gop_seconds=DEFAULT_GOP_SECONDS, description=""):
+        """
+        Initialise le profil
+        
+        Args:
+            name (str): Nom du profil
+            preset (str): Préréglage x264 (ultrafast ... veryslow)
+            crf (int): Facteur de qualité constante (ignoré en deux passes)
+            max_height (int, optional): Hauteur maximale de la vidéo, None pour garder la résolution demandée
+            audio_bitrate (str, optional): Débit audio AAC. Par défaut "192k"
+            two_pass_bitrate (int, optional): Débit vidéo visé en deux passes, en kbit/s pour du 1080p
+            two_pass (bool, optional): Encoder en deux passes à débit cible. Par défaut False
+            threads (int, optional): Nombre de threads d'encodage. Par défaut le nombre de cœurs
+            gop_seconds (float, optional): Intervalle fixe entre images clés, en secondes. Par défaut 2
+            description (str, optional): Description du profil
+        """
+        self.name = name
+        self.preset = preset
+        self.crf = crf
+        self.max_height = max_height
+        self.audio_bitrate = audio_bitrate
+        self.two_pass_bitrate = two_pass_bitrate
+        self.two_pass = two_pass
+        self.threads = threads or os.cpu_count() or 1
+        self.gop_seconds = gop_seconds
+        self.description = description
+    
+    def resolve_resolution(self, resolution):
+        """
+        Adapte la résolution demandée à la hauteur maximale du profil
+        
+        Args:
+            resolution (tuple): Résolution demandée (largeur, hauteur)
+        
+        Returns:
+            tuple: Résolution à utiliser, aux dimensions paires
+        """
+        width, height = resolution
+        if self.max_height and height > self.max_height:
+            width = int(round(width * self.max_height / height))
+            height = self.max_height
+        return (width - width % 2, height - height % 2)
+    
+    def bitrate_kbps(self, resolution):
+        """
+        Args:
+            resolution (tuple): Résolution de la vidéo
+        
+        Returns:
+            int: Débit vidéo visé en deux passes, proportionnel au nombre de pixels
+        """
+        pixels = resolution[0] * resolution[1]
+        return max(200, int(self.two_pass_bitrate * pixels / REFERENCE_PIXELS))
+    
+    def x264_args(self, fps, visual_style=None, resolution=None):
+        """
+        Paramètres x264 communs aux deux moteurs (hors codec, threads et passes)
+        
+        Args:
+            fps (int): Images par seconde
+            visual_style (str, optional): Style visuel, pour le réglage "stillimage"
+            resolution (tuple, optional): Résolution, nécessaire au débit en deux passes
+        
+        Returns:
+            list: Arguments ffmpeg
+        """
+        gop = max(1, int(round(self.gop_seconds * fps)))
+        args = ["-preset", self.preset]
+        if self.two_pass:
+            args += ["-b:v", f"{self.bitrate_kbps(resolution)}k"]
+        else:
+            args += ["-crf", str(self.crf)]
+        if visual_style in STILL_IMAGE_STYLES:
+            args += ["-tune", "stillimage"]
+        args += ["-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0"]
+        return args
+    
+    def ffmpeg_video_args(self, fps, visual_style=None, resolution=None):
+        """
+        Paramètres d'encodage vidéo pour le moteur ffmpeg
+        
+        Args:
+            fps (int): Images par seconde
+            visual_style (str, optional): Style visuel
+            resolution (tuple, optional): Résolution de la vidéo
+        
+        Returns:
+            list: Arguments ffmpeg (codec, format de pixels et réglages x264)
+        """
+        return ["-c:v", "libx264", "-pix_fmt", "yuv420p"] + self.x264_args(fps, visual_style, resolution)
+    
+    def ffmpeg_audio_args(self):
+        """
+        Returns:
+            list: Paramètres d'encodage audio pour le moteur ffmpeg
+        """
+        return ["-c:a", "aac", "-b:a", self.audio_bitrate]
+    
+    def moviepy_params(self, fps, visual_style=None):
+        """
+        Paramètres de write_videofile pour le moteur MoviePy (une seule passe)
+        
+        Args:
+            fps (int): Images par seconde
+            visual_style (str, optional): Style visuel
+        
+        Returns:
+            dict: Arguments nommés de write_videofile
+        """
+        if self.two_pass:
+            raise ValueError("L'encodage en deux passes nécessite le moteur ffmpeg")
+        
+        x264_args = self.x264_args(fps, visual_style)
+        # Le préréglage est transmis par l'argument dédié de MoviePy
+        return {
+            "codec": "libx264",
+            "audio_codec": "aac",
+            "audio_bitrate": self.audio_bitrate,
+            "preset": self.preset,
+            "threads": self.threads,
+            "ffmpeg_params": x264_args[2:]
+        }
+    
+    def to_dict(self):
+        """
+        Returns:
+            dict: Paramètres du profil
+        """
+        return {
+            "name": self.name,
+            "preset": self.preset,
+            "crf": self.crf,
+            "max_height": self.max_height,
+            "audio_bitrate": self.audio_bitrate,
+            "two_pass": self.two_pass,
+            "two_pass_bitrate": self.two_pass_bitrate,
+            "threads": self.threads,
+            "gop_seconds": self.gop_seconds
+        }
+
+
+def get_render_profile(profile=DEFAULT_RENDER_PROFILE, **overrides):
+    """
+    Renvoie un profil de rendu par son nom, avec d'éventuels paramètres modifiés
+    
+    Args:
+        profile (str or RenderProfile, optional): Nom du profil ("draft", "standard", "archival") ou profil
+        **overrides: Paramètres remplacés (ex: two_pass=True, threads=4)
+    
+    Returns:
+        RenderProfile: Profil de rendu
+    """
+    if isinstance(profile, RenderProfile):
+        if not overrides:
+            return profile
+        settings = profile.to_dict()
+        settings["description"] = profile.description
+    elif profile in RENDER_PROFILES:
+        settings = dict(RENDER_PROFILES[profile], name=profile)
+    else:
+        raise ValueError(f"Profil de rendu inconnu: {profile}. Valeurs possibles: {', '.join(RENDER_PROFILES)}")
+    
+    settings.update(overrides)
+    return RenderProfile(**settings)
+
+
+def _benchmark_plan(resolution, fps, duration):
+    """
+    Construit un plan de rendu représentatif (fond coloré, titre animé, sous-titre avec fondus)
+    
+    Args:
+        resolution (tuple): Résolution de la vidéo
+        fps (int): Images par seconde
+        duration (float): Durée en secondes
+    
+    Returns:
+        dict: Plan de rendu
+    """
+    width, height = resolution
+    text_style = {"font": "Arial", "fontsize": max(12, height // 18), "color": "white", "bg_color": None,
+                  "method": "label", "width": None, "align": "center"}
+    subtitle_style = dict(text_style, fontsize=max(10, height // 36), bg_color='rgba(0,0,0,0.5)',
+                          method='caption', width=width - width // 20)
+    return {
+        "resolution": [width, height],
+        "fps": fps,
+        "segments": [{
+            "name": "benchmark",
+            "duration": duration,
+            "layers": [
+                {"type": "color", "color": [40, 40, 40], "start": 0, "duration": duration},
+                {"type": "text", "text": "AutoTubeCPM", "style": text_style,
+                 "position": ["center", height // 3], "start": 0, "duration": duration,
+                 "motion": {"type": "bounce", "base_y": height // 3, "amplitude": 20, "period": 5}},
+                {"type": "text", "text": "Mesure de la vitesse d'encodage de chaque profil de rendu",
+                 "style": subtitle_style, "position": ["center", height - height // 6], "start": 0,
+                 "duration": duration,
+                 "effects": [{"name": "crossfadein", "duration": 0.5}, {"name": "crossfadeout", "duration": 0.5}]}
+            ]
+        }],
+        "audio": []
+    }
+
+
+def benchmark_render_profiles(profiles=None, resolution=(1920, 1080), fps=30, duration=10, work_dir=None):
+    """
+    Mesure la vitesse d'encodage (images par seconde) de chaque profil avec le moteur ffmpeg
+    
+    Args:
+        profiles (list, optional): Noms des profils à mesurer. Par défaut tous
+        resolution (tuple, optional): Résolution demandée. Par défaut (1920, 1080)
+        fps (int, optional): Images par seconde. Par défaut 30
+        duration (float, optional): Durée de la vidéo de test en secondes. Par défaut 10
+        work_dir (str, optional): Répertoire de travail. Par défaut un répertoire temporaire
+    
+    Returns:
+        list: Résultats par profil (profil, résolution, images, durée d'encodage, images par seconde, taille)
+    """
+    from .ffmpeg_backend import FFmpegRenderer
+    
+    temp_dir = work_dir or tempfile.mkdtemp(prefix='autotubecpm_benchmark_')
+    renderer = FFmpegRenderer(work_dir=temp_dir)
+    results = []
+    
+    try:
+        for name in profiles or list(RENDER_PROFILES):
+            profile = get_render_profile(name)
+            profile_resolution = profile.resolve_resolution(resolution)
+            plan = _benchmark_plan(profile_resolution, fps, duration)
+            output_path = os.path.join(temp_dir, f"benchmark_{name}.mp4")
+            
+            # Les images de texte sont rendues avant la mesure pour ne chronométrer que l'encodage
+            renderer.build_command(plan, output_path)
+            
+            start = time.perf_counter()
+            renderer.render(plan, output_path, profile=profile)
+            elapsed = time.perf_counter() - start
+            
+            frames = int(round(duration * fps))
+            results.append({
+                "profile": name,
+                "resolution": list(profile_resolution),
+                "frames": frames,
+                "seconds": round(elapsed, 3),
+                "encode_fps": round(frames / elapsed, 1) if elapsed > 0 else None,
+                "size_bytes": os.path.getsize(output_path)
+            })
+            print(f"Profil {name}: {results[-1]['encode_fps']} images/s "
+                  f"({profile_resolution[0]}x{profile_resolution[1]}, {results[-1]['size_bytes']} octets)")
+    finally:
+        if work_dir is None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    return results
+
+
+def main(argv=None):
+    """
+    Point d'entrée en ligne de commande: liste des profils et mesure de leur vitesse d'encodage
+    
+    Args:
+        argv (list, optional): Arguments de la ligne de commande
+    """
+    parser = argparse.ArgumentParser(description="Profils de rendu vidéo")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    subparsers.add_parser("list", help="Lister les profils")
+    
+    benchmark_parser = subparsers.add_parser("benchmark", help="Mesurer la vitesse d'encodage de chaque profil")
+    benchmark_parser.add_argument("--profiles", nargs="+", choices=list(RENDER_PROFILES), help="Profils à mesurer")
+    benchmark_parser.add_argument("--resolution", default="1920x1080", help="Résolution (ex: 1920x1080)")
+    benchmark_parser.add_argument("--fps", type=int, default=30, help="Images par seconde")
+    benchmark_parser.add_argument("--duration", type=float, default=10, help="Durée de la vidéo de test en secondes")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "list":
+        for name, settings in RENDER_PROFILES.items():
+            print(f"{name}: {settings['description']} (preset {settings['preset']}, CRF {settings['crf']})")
+    else:
+        width, height = (int(value) for value in args.resolution.lower().split("x"))
+        benchmark_render_profiles(args.profiles, (width, height), args.fps, args.duration)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,536 @@
+"""
+Module de file de rendu pour AutoTubeCPM
+Ce module répartit les rendus de create_video entre plusieurs machines: les tâches sont déposées
+dans un courtier (SQLite par défaut), réservées par des workers avec un bail renouvelé
+périodiquement, relancées après un plantage et publiées de façon atomique
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import sqlite3
+import argparse
+import threading
+from abc import ABC, abstractmethod
+
+# Durée d'un bail: sans battement de cœur pendant ce délai, la tâche est rendue à la file
+DEFAULT_LEASE_SECONDS = 120
+
+# Intervalle entre deux battements de cœur d'un worker
+DEFAULT_HEARTBEAT_SECONDS = 30
+
+# Nombre maximal de tentatives d'une tâche (plantages compris)
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Attente d'un worker lorsque la file est vide
+DEFAULT_POLL_SECONDS = 5
+
+# États d'une tâche
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+# Options de create_video acceptées dans une tâche
+RENDER_JOB_OPTIONS = ("visual_style", "resolution", "fps", "use_intro_outro", "backend", "workers",
+                      "render_profile", "resumable", "chunk_seconds", "subtitle_mode", "thumbnail_layout",
+                      "section_offsets", "snap_to_pauses")
+
+# Répertoire de préparation des rendus, dans le répertoire de publication
+STAGING_DIRNAME = ".staging"
+
+
+def render_job(audio_path, script_data, metadata, **options):
+    """
+    Construit une tâche de rendu sérialisable à partir des arguments de create_video
+    
+    Args:
+        audio_path (str): Chemin vers le fichier audio, accessible depuis tous les workers
+        script_data (dict): Données du script
+        metadata (dict): Métadonnées de la vidéo
+        **options: Options de create_video: visual_style, resolution, fps, use_intro_outro, backend,
+            workers, render_profile, resumable, chunk_seconds, subtitle_mode, thumbnail_layout,
+            section_offsets, snap_to_pauses
+    
+    Returns:
+        dict: Tâche de rendu
+    """
+    unknown = set(options) - set(RENDER_JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Options de rendu inconnues: {', '.join(sorted(unknown))}")
+    
+    job = {"audio_path": os.path.abspath(audio_path), "script_data": script_data, "metadata": metadata}
+    job.update(options)
+    if "resolution" in job:
+        job["resolution"] = list(job["resolution"])
+    return job
+
+
+class RenderBroker(ABC):
+    """Interface d'un courtier de tâches de rendu (local ou réseau)"""
+    
+    @abstractmethod
+    def submit(self, job, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Dépose une tâche dans la file
+        
+        Args:
+            job (dict): Tâche de rendu (voir render_job)
+            priority (int, optional): Priorité, les plus hautes d'abord. Par défaut 0
+            max_attempts (int, optional): Nombre maximal de tentatives. Par défaut 3
+        
+        Returns:
+            int: Identifiant de la tâche
+        """
+    
+    @abstractmethod
+    def claim(self, worker_id):
+        """
+        Réserve la prochaine tâche disponible
+        
+        Args:
+            worker_id (str): Identifiant du worker
+        
+        Returns:
+            dict: Tâche réservée (id, job, attempts), ou None si la file est vide
+        """
+    
+    @abstractmethod
+    def heartbeat(self, job_id, worker_id):
+        """
+        Prolonge le bail d'une tâche
+        
+        Args:
+            job_id (int): Identifiant de la tâche
+            worker_id (str): Identifiant du worker
+        
+        Returns:
+            bool: True si le worker détient toujours la tâche
+        """
+    
+    @abstractmethod
+    def complete(self, job_id, worker_id, output_path):
+        """
+        Marque une tâche comme terminée
+        
+        Args:
+            job_id (int): Identifiant de la tâche
+            worker_id (str): Identifiant du worker
+            output_path (str): Chemin de la vidéo publiée
+        
+        Returns:
+            bool: True si le worker détenait la tâche
+        """
+    
+    @abstractmethod
+    def fail(self, job_id, worker_id, error):
+        """
+        Signale l'échec d'une tâche, remise dans la file s'il reste des tentatives
+        
+        Args:
+            job_id (int): Identifiant de la tâche
+            worker_id (str): Identifiant du worker
+            error (str): Description de l'erreur
+        
+        Returns:
+            str: Nouvel état de la tâche ("queued" ou "failed"), ou None si le worker ne la détenait plus
+        """
+
+
+class SQLiteRenderBroker(RenderBroker):
+    """Courtier de tâches de rendu dans une base SQLite partagée entre les workers"""
+    
+    def __init__(self, db_path, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Initialise le courtier et crée la table des tâches si besoin
+        
+        Plusieurs machines peuvent partager la base si elle se trouve sur un système de fichiers
+        dont les verrous sont fiables; sinon, un courtier réseau implémentant RenderBroker prend le relais.
+        
+        Args:
+            db_path (str): Chemin de la base SQLite
+            lease_seconds (float, optional): Durée d'un bail en secondes. Par défaut 120
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        
+        with self._connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS render_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    output_path TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS render_jobs_status ON render_jobs (status, priority, id)")
+    
+    def _connect(self):
+        """
+        Ouvre une connexion en mode autocommit (les transactions sont explicites)
+        
+        Returns:
+            _Transaction: Connexion utilisable dans un bloc with, fermée à la sortie
+        """
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return _Transaction(connection)
+    
+    def submit(self, job, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """Voir RenderBroker.submit"""
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO render_jobs (job, priority, max_attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(job, ensure_ascii=False), priority, max_attempts, now, now)
+            )
+            return cursor.lastrowid
+    
+    def claim(self, worker_id):
+        """Voir RenderBroker.claim"""
+        now = time.time()
+        with self._connect() as connection:
+            # Transaction en écriture dès le départ: deux workers ne peuvent pas réserver la même tâche
+            connection.execute("BEGIN IMMEDIATE")
+            self._expire_leases(connection, now)
+            row = connection.execute(
+                "SELECT id, job, attempts FROM render_jobs WHERE status = 'queued' "
+                "ORDER BY priority DESC, id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            
+            connection.execute(
+                "UPDATE render_jobs SET status = 'running', worker = ?, lease_until = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row["id"])
+            )
+            connection.execute("COMMIT")
+            return {"id": row["id"], "job": json.loads(row["job"]), "attempts": row["attempts"] + 1}
+    
+    def _expire_leases(self, connection, now):
+        """
+        Rend à la file les tâches dont le worker a cessé de battre (plantage, machine arrêtée)
+        
+        Args:
+            connection (sqlite3.Connection): Connexion dans une transaction en écriture
+            now (float): Instant courant
+        """
+        connection.execute(
+            "UPDATE render_jobs SET status = 'failed', error = 'bail expiré', worker = NULL, "
+            "lease_until = NULL, updated_at = ? "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+            (now, now)
+        )
+        connection.execute(
+            "UPDATE render_jobs SET status = 'queued', worker = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE status = 'running' AND lease_until < ?",
+            (now, now)
+        )
+    
+    def heartbeat(self, job_id, worker_id):
+        """Voir RenderBroker.heartbeat"""
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE render_jobs SET lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + self.lease_seconds, now, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+    
+    def complete(self, job_id, worker_id, output_path):
+        """Voir RenderBroker.complete"""
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE render_jobs SET status = 'done', output_path = ?, lease_until = NULL, error = NULL, "
+                "updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (output_path, time.time(), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+    
+    def fail(self, job_id, worker_id, error):
+        """Voir RenderBroker.fail"""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM render_jobs WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            
+            status = "failed" if row["attempts"] >= row["max_attempts"] else "queued"
+            connection.execute(
+                "UPDATE render_jobs SET status = ?, worker = NULL, lease_until = NULL, error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (status, str(error)[-2000:], time.time(), job_id)
+            )
+            connection.execute("COMMIT")
+            return status
+    
+    def get(self, job_id):
+        """
+        Args:
+            job_id (int): Identifiant de la tâche
+        
+        Returns:
+            dict: État de la tâche (id, status, attempts, worker, output_path, error, job), ou None
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM render_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["job"] = json.loads(job["job"])
+        return job
+    
+    def counts(self):
+        """
+        Returns:
+            dict: Nombre de tâches par état
+        """
+        with self._connect() as connection:
+            rows = connection.execute("SELECT status, COUNT(*) AS n FROM render_jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+class _Transaction:
+    """Connexion SQLite fermée à la sortie du bloc, avec annulation de la transaction en cas d'erreur"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def __enter__(self):
+        return self.connection
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None and self.connection.in_transaction:
+            self.connection.execute("ROLLBACK")
+        self.connection.close()
+        return False
+
+
+class RenderWorker:
+    """Classe pour exécuter les tâches de la file sur une machine"""
+    
+    def __init__(self, producer, broker, publish_dir, worker_id=None,
+                 heartbeat_seconds=DEFAULT_HEARTBEAT_SECONDS, poll_seconds=DEFAULT_POLL_SECONDS):
+        """
+        Initialise le worker
+        
+        Args:
+            producer (VideoProducer): Producteur vidéo de la machine
+            broker (RenderBroker): Courtier de tâches
+            publish_dir (str): Répertoire où les vidéos terminées sont publiées
+            worker_id (str, optional): Identifiant du worker. Par défaut machine:processus
+            heartbeat_seconds (float, optional): Intervalle des battements de cœur. Par défaut 30
+            poll_seconds (float, optional): Attente lorsque la file est vide. Par défaut 5
+        """
+        self.producer = producer
+        self.broker = broker
+        self.publish_dir = publish_dir
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+        os.makedirs(self.publish_dir, exist_ok=True)
+    
+    def run(self, max_jobs=None, exit_when_idle=False):
+        """
+        Traite les tâches de la file les unes après les autres
+        
+        Args:
+            max_jobs (int, optional): Nombre maximal de tâches à traiter. Par défaut sans limite
+            exit_when_idle (bool, optional): S'arrêter dès que la file est vide. Par défaut False
+        
+        Returns:
+            int: Nombre de tâches traitées
+        """
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            claimed = self.broker.claim(self.worker_id)
+            if claimed is None:
+                if exit_when_idle:
+                    break
+                time.sleep(self.poll_seconds)
+                continue
+            
+            self.process(claimed)
+            processed += 1
+        return processed
+    
+    def process(self, claimed):
+        """
+        Rend une tâche réservée en maintenant son bail, puis publie la vidéo
+        
+        Args:
+            claimed (dict): Tâche renvoyée par claim
+        
+        Returns:
+            str: Chemin de la vidéo publiée, ou None en cas d'échec ou de bail perdu
+        """
+        job_id = claimed["id"]
+        print(f"Worker {self.worker_id}: tâche {job_id} (tentative {claimed['attempts']})")
+        
+        stop = threading.Event()
+        lease_lost = threading.Event()
+        
+        def beat():
+            while not stop.wait(self.heartbeat_seconds):
+                try:
+                    alive = self.broker.heartbeat(job_id, self.worker_id)
+                except Exception as e:
+                    # Courtier momentanément indisponible: nouvel essai au prochain battement
+                    print(f"Worker {self.worker_id}: battement de cœur impossible: {e}")
+                    continue
+                if not alive:
+                    lease_lost.set()
+                    return
+        
+        heartbeat_thread = threading.Thread(target=beat, daemon=True)
+        heartbeat_thread.start()
+        
+        staging_dir = os.path.join(self.publish_dir, STAGING_DIRNAME, f"job_{job_id}_{os.getpid()}")
+        try:
+            video_path = self._render(claimed["job"], staging_dir)
+            
+            stop.set()
+            heartbeat_thread.join()
+            # Une tâche reprise par un autre worker n'est pas publiée deux fois
+            if lease_lost.is_set() or not self.broker.heartbeat(job_id, self.worker_id):
+                print(f"Worker {self.worker_id}: bail perdu pour la tâche {job_id}, rendu abandonné")
+                return None
+            
+            output_path = self._publish(job_id, video_path, staging_dir)
+            self.broker.complete(job_id, self.worker_id, output_path)
+            print(f"Worker {self.worker_id}: tâche {job_id} publiée: {output_path}")
+            return output_path
+        except Exception as e:
+            stop.set()
+            heartbeat_thread.join()
+            status = self.broker.fail(job_id, self.worker_id, f"{type(e).__name__}: {e}")
+            print(f"Worker {self.worker_id}: échec de la tâche {job_id} ({status}): {e}")
+            return None
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    
+    def _render(self, job, staging_dir):
+        """
+        Rend la vidéo d'une tâche dans un répertoire de préparation
+        
+        Args:
+            job (dict): Tâche de rendu
+            staging_dir (str): Répertoire de préparation
+        
+        Returns:
+            str: Chemin de la vidéo rendue
+        """
+        os.makedirs(staging_dir, exist_ok=True)
+        options = {key: job[key] for key in RENDER_JOB_OPTIONS if key in job}
+        if "resolution" in options:
+            options["resolution"] = tuple(options["resolution"])
+        
+        output_dir = self.producer.output_dir
+        self.producer.output_dir = staging_dir
+        try:
+            return self.producer.create_video(job["audio_path"], job["script_data"], job["metadata"], **options)
+        finally:
+            self.producer.output_dir = output_dir
+    
+    def _publish(self, job_id, video_path, staging_dir):
+        """
+        Déplace la vidéo et ses fichiers associés dans le répertoire de publication
+        
+        Chaque fichier est renommé (opération atomique sur un même système de fichiers) et la vidéo
+        en dernier: un fichier visible dans le répertoire de publication est toujours complet.
+        
+        Args:
+            job_id (int): Identifiant de la tâche
+            video_path (str): Vidéo rendue dans le répertoire de préparation
+            staging_dir (str): Répertoire de préparation
+        
+        Returns:
+            str: Chemin de la vidéo publiée
+        """
+        prefix = f"job{job_id}_"
+        output_path = os.path.join(self.publish_dir, prefix + os.path.basename(video_path))
+        
+        # Les métadonnées désignent la vidéo et ses fichiers associés à leur emplacement final
+        metadata_path = video_path + ".json"
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                video_metadata = json.load(f)
+            video_metadata["video_path"] = output_path
+            for key in ("captions_path", "thumbnail_path", "keyframe_index_path"):
+                if video_metadata.get(key):
+                    video_metadata[key] = os.path.join(self.publish_dir, prefix + os.path.basename(video_metadata[key]))
+            with open(metadata_path, 'w', encoding='utf-8') as f:
+                json.dump(video_metadata, f, indent=2)
+        
+        for filename in sorted(os.listdir(staging_dir)):
+            path = os.path.join(staging_dir, filename)
+            if path != video_path and os.path.isfile(path):
+                os.replace(path, os.path.join(self.publish_dir, prefix + filename))
+        os.replace(video_path, output_path)
+        return output_path
+
+
+def main(argv=None):
+    """
+    Point d'entrée en ligne de commande: dépôt de tâches, worker et état de la file
+    
+    Args:
+        argv (list, optional): Arguments de la ligne de commande
+    """
+    parser = argparse.ArgumentParser(description="File de rendu vidéo")
+    parser.add_argument("--db", required=True, help="Base SQLite de la file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    submit_parser = subparsers.add_parser("submit", help="Déposer des tâches (fichiers JSON produits par render_job)")
+    submit_parser.add_argument("jobs", nargs="+", help="Fichiers JSON des tâches")
+    submit_parser.add_argument("--priority", type=int, default=0, help="Priorité des tâches")
+    submit_parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Tentatives par tâche")
+    
+    worker_parser = subparsers.add_parser("worker", help="Traiter les tâches sur cette machine")
+    worker_parser.add_argument("--publish-dir", required=True, help="Répertoire de publication des vidéos")
+    worker_parser.add_argument("--assets-dir", help="Répertoire des éléments visuels")
+    worker_parser.add_argument("--max-jobs", type=int, help="Nombre maximal de tâches")
+    worker_parser.add_argument("--exit-when-idle", action="store_true", help="S'arrêter quand la file est vide")
+    
+    subparsers.add_parser("status", help="Afficher le nombre de tâches par état")
+    
+    args = parser.parse_args(argv)
+    broker = SQLiteRenderBroker(args.db)
+    
+    if args.command == "submit":
+        for path in args.jobs:
+            with open(path, 'r', encoding='utf-8') as f:
+                job_id = broker.submit(json.load(f), priority=args.priority, max_attempts=args.max_attempts)
+            print(f"{path}: tâche {job_id}")
+    elif args.command == "worker":
+        from .video_producer import VideoProducer
+        
+        producer = VideoProducer(pexels_api_key=os.environ.get("PEXELS_API_KEY"), assets_dir=args.assets_dir)
+        worker = RenderWorker(producer, broker, args.publish_dir)
+        processed = worker.run(max_jobs=args.max_jobs, exit_when_idle=args.exit_when_idle)
+        print(f"{processed} tâches traitées")
+    else:
+        for status, count in broker.counts().items():
+            print(f"{status}: {count}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
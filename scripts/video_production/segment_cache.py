@@ -0,0 +1,131 @@
+"""
+Module de cache des segments encodés pour AutoTubeCPM
+Ce module conserve les segments qui se répètent d'une vidéo à l'autre (intro, outro) déjà encodés,
+pour qu'ils soient assemblés par copie de flux au lieu d'être rendus à nouveau
+"""
+
+import os
+import json
+import hashlib
+
+# Nombre maximal de segments conservés par défaut
+DEFAULT_MAX_SEGMENTS = 200
+
+
+class SegmentCache:
+    """Classe pour stocker et retrouver des segments vidéo encodés, indexés par leur contenu"""
+    
+    def __init__(self, cache_dir, max_segments=DEFAULT_MAX_SEGMENTS):
+        """
+        Initialise le cache des segments
+        
+        Args:
+            cache_dir (str): Répertoire des segments encodés
+            max_segments (int, optional): Nombre maximal de segments conservés. Par défaut 200
+        """
+        self.cache_dir = cache_dir
+        self.max_segments = max_segments
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def key(self, segment, resolution, fps, video_args):
+        """
+        Calcule la clé d'un segment à partir de tout ce qui influence son encodage
+        
+        Args:
+            segment (dict): Segment du plan de rendu (calques, durée, effets)
+            resolution (tuple): Résolution (largeur, hauteur)
+            fps (int): Images par seconde
+            video_args (list): Paramètres d'encodage vidéo
+        
+        Returns:
+            str: Empreinte SHA-1 hexadécimale
+        """
+        payload = json.dumps({
+            "segment": segment,
+            "resolution": list(resolution),
+            "fps": fps,
+            "video_args": list(video_args)
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def path(self, name, key):
+        """
+        Args:
+            name (str): Nom du segment (ex: "intro")
+            key (str): Clé du segment
+        
+        Returns:
+            str: Chemin du segment encodé dans le cache
+        """
+        return os.path.join(self.cache_dir, f"{name}_{key[:20]}.mp4")
+    
+    def get(self, name, key):
+        """
+        Cherche un segment déjà encodé
+        
+        Args:
+            name (str): Nom du segment
+            key (str): Clé du segment
+        
+        Returns:
+            str: Chemin du segment, ou None s'il n'est pas en cache
+        """
+        path = self.path(name, key)
+        if not os.path.exists(path):
+            return None
+        
+        # La date du fichier sert d'ordre d'utilisation pour l'éviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+    
+    def temp_path(self, name, key):
+        """
+        Args:
+            name (str): Nom du segment
+            key (str): Clé du segment
+        
+        Returns:
+            str: Chemin temporaire où encoder le segment avant de le publier dans le cache
+        """
+        return f"{self.path(name, key)[:-4]}.{os.getpid()}.tmp.mp4"
+    
+    def store(self, temp_path, name, key):
+        """
+        Publie un segment encodé dans le cache (renommage atomique)
+        
+        Args:
+            temp_path (str): Chemin du segment encodé, obtenu avec temp_path
+            name (str): Nom du segment
+            key (str): Clé du segment
+        
+        Returns:
+            str: Chemin du segment dans le cache
+        """
+        path = self.path(name, key)
+        os.replace(temp_path, path)
+        self.prune()
+        return path
+    
+    def prune(self):
+        """
+        Supprime les segments les moins récemment utilisés au-delà de la limite
+        
+        Returns:
+            int: Nombre de segments supprimés
+        """
+        segments = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".mp4") and ".tmp." not in entry.name:
+                segments.append((entry.stat().st_mtime, entry.path))
+        
+        removed = 0
+        for _, path in sorted(segments)[:max(0, len(segments) - self.max_segments)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
@@ -0,0 +1,373 @@
+"""
+Module de médiathèque de vidéos stock pour AutoTubeCPM
+Ce module met en cache les recherches Pexels, stocke les vidéos téléchargées par empreinte
+de contenu et prépare des proxys à la résolution et à la cadence du rendu
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .ffmpeg_utils import run_ffmpeg
+from .asset_normalizer import normalize_args
+
+# Adresse de l'API Pexels (modifiable, par exemple pour un serveur local de test)
+PEXELS_API_URL = "https://api.pexels.com"
+
+# Durée de validité d'une recherche en cache, en secondes
+DEFAULT_SEARCH_TTL = 7 * 24 * 3600
+
+# Taille maximale de la médiathèque locale (vidéos sources et proxys)
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024 * 1024
+
+# Nombre de téléchargements simultanés du préchargement
+DEFAULT_PREFETCH_WORKERS = 4
+
+# Taille des blocs lus pendant un téléchargement
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class StockMediaLibrary:
+    """Classe pour rechercher, télécharger et préparer les vidéos stock une seule fois"""
+    
+    def __init__(self, api_key=None, cache_dir=None, base_url=PEXELS_API_URL, max_bytes=DEFAULT_MAX_BYTES,
+                 search_ttl=DEFAULT_SEARCH_TTL, prefetch_workers=DEFAULT_PREFETCH_WORKERS, timeout=30):
+        """
+        Initialise la médiathèque
+        
+        Args:
+            api_key (str, optional): Clé API Pexels. Sans clé, aucune recherche n'est effectuée
+            cache_dir (str, optional): Répertoire de la médiathèque. Par défaut "stock" dans le répertoire courant
+            base_url (str, optional): Adresse de l'API. Par défaut l'API Pexels
+            max_bytes (int, optional): Taille maximale des fichiers conservés, en octets
+            search_ttl (int, optional): Durée de validité des recherches en cache, en secondes
+            prefetch_workers (int, optional): Nombre de téléchargements simultanés. Par défaut 4
+            timeout (float, optional): Délai maximal des requêtes HTTP, en secondes. Par défaut 30
+        """
+        self.api_key = api_key
+        self.cache_dir = cache_dir or os.path.abspath("stock")
+        self.base_url = base_url.rstrip("/")
+        self.max_bytes = max_bytes
+        self.search_ttl = search_ttl
+        self.prefetch_workers = prefetch_workers
+        self.timeout = timeout
+        
+        self.media_dir = os.path.join(self.cache_dir, "media")
+        self.proxy_dir = os.path.join(self.cache_dir, "proxies")
+        self.search_cache_path = os.path.join(self.cache_dir, "search_cache.json")
+        self.url_index_path = os.path.join(self.cache_dir, "url_index.json")
+        os.makedirs(self.media_dir, exist_ok=True)
+        os.makedirs(self.proxy_dir, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._search_cache = self._load_json(self.search_cache_path)
+        self._url_index = self._load_json(self.url_index_path)
+        self._inflight = {}
+        self._executor = None
+        self.session = requests.Session()
+    
+    def _load_json(self, path):
+        """
+        Args:
+            path (str): Chemin d'un index JSON
+        
+        Returns:
+            dict: Contenu de l'index, vide s'il est absent ou illisible
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_json(self, path, data):
+        """
+        Écrit un index JSON de façon atomique
+        
+        Args:
+            path (str): Chemin de l'index
+            data (dict): Contenu à écrire
+        """
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    
+    def search(self, keyword, per_page=5):
+        """
+        Recherche des vidéos pour un mot-clé, en réutilisant les résultats récents
+        
+        Args:
+            keyword (str): Mot-clé de recherche
+            per_page (int, optional): Nombre de résultats demandés. Par défaut 5
+        
+        Returns:
+            list: Vidéos trouvées ({"id", "duration", "files": [{"link", "width", "height", "file_type"}]})
+        """
+        cache_key = f"{keyword.strip().lower()}|{per_page}"
+        with self._lock:
+            cached = self._search_cache.get(cache_key)
+        if cached and time.time() - cached["time"] < self.search_ttl:
+            return cached["videos"]
+        
+        if not self.api_key:
+            return []
+        
+        response = self.session.get(
+            f"{self.base_url}/videos/search",
+            params={"query": keyword, "per_page": per_page},
+            headers={"Authorization": self.api_key},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        
+        videos = []
+        for video in response.json().get("videos", []):
+            videos.append({
+                "id": video.get("id"),
+                "duration": video.get("duration"),
+                "files": [
+                    {
+                        "link": video_file["link"],
+                        "width": video_file.get("width") or 0,
+                        "height": video_file.get("height") or 0,
+                        "file_type": video_file.get("file_type", "video/mp4")
+                    }
+                    for video_file in video.get("video_files", []) if video_file.get("link")
+                ]
+            })
+        
+        with self._lock:
+            self._search_cache[cache_key] = {"time": time.time(), "videos": videos}
+            self._save_json(self.search_cache_path, self._search_cache)
+        
+        return videos
+    
+    def select_file(self, video, resolution):
+        """
+        Choisit le fichier le plus léger qui couvre au moins la résolution cible
+        
+        Args:
+            video (dict): Vidéo renvoyée par search
+            resolution (tuple): Résolution cible (largeur, hauteur)
+        
+        Returns:
+            dict: Fichier choisi, ou None si la vidéo n'a aucun fichier MP4
+        """
+        files = [f for f in video["files"] if f["file_type"] == "video/mp4"]
+        if not files:
+            return None
+        
+        large_enough = [f for f in files if f["height"] >= resolution[1]]
+        if large_enough:
+            return min(large_enough, key=lambda f: f["width"] * f["height"])
+        return max(files, key=lambda f: f["width"] * f["height"])
+    
+    def download(self, url):
+        """
+        Télécharge un fichier dans le stockage adressé par contenu, s'il n'y est pas déjà
+        
+        Le fichier est écrit sous un nom temporaire unique puis renommé d'après son empreinte
+        SHA-256: deux rendus concurrents ne peuvent pas s'écraser et un même contenu n'est stocké qu'une fois.
+        
+        Args:
+            url (str): Adresse du fichier
+        
+        Returns:
+            str: Chemin du fichier local
+        """
+        with self._lock:
+            digest = self._url_index.get(url)
+        if digest:
+            path = self._media_path(digest)
+            if os.path.exists(path):
+                self._touch(path)
+                return path
+        
+        temp_path = os.path.join(self.media_dir, f"download.{os.getpid()}.{threading.get_ident()}.tmp")
+        sha256 = hashlib.sha256()
+        try:
+            with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                with open(temp_path, 'wb') as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        sha256.update(chunk)
+                        f.write(chunk)
+            
+            digest = sha256.hexdigest()
+            path = self._media_path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        with self._lock:
+            self._url_index[url] = digest
+            self._save_json(self.url_index_path, self._url_index)
+        
+        self.evict()
+        return path
+    
+    def _media_path(self, digest):
+        """
+        Args:
+            digest (str): Empreinte SHA-256 du contenu
+        
+        Returns:
+            str: Chemin du fichier dans le stockage adressé par contenu
+        """
+        return os.path.join(self.media_dir, digest[:2], f"{digest}.mp4")
+    
+    def make_proxy(self, source_path, resolution, fps):
+        """
+        Prépare une copie de la vidéo à la résolution et à la cadence du rendu
+        
+        L'image est mise à l'échelle pour couvrir le cadre puis recadrée au centre; le son est retiré.
+        
+        Args:
+            source_path (str): Vidéo source
+            resolution (tuple): Résolution cible (largeur, hauteur)
+            fps (int): Images par seconde
+        
+        Returns:
+            str: Chemin du proxy
+        """
+        width, height = resolution
+        digest = os.path.splitext(os.path.basename(source_path))[0]
+        proxy_path = os.path.join(self.proxy_dir, f"{digest}_{width}x{height}_{fps}.mp4")
+        if os.path.exists(proxy_path):
+            self._touch(proxy_path)
+            return proxy_path
+        
+        temp_path = f"{proxy_path[:-4]}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
+        try:
+            run_ffmpeg(normalize_args(source_path, temp_path, resolution, fps),
+                       description=f"préparation du proxy de {os.path.basename(source_path)}")
+            os.replace(temp_path, proxy_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        self.evict()
+        return proxy_path
+    
+    def fetch(self, keyword, resolution, fps):
+        """
+        Recherche, télécharge et prépare la vidéo d'un mot-clé
+        
+        Args:
+            keyword (str): Mot-clé de recherche
+            resolution (tuple): Résolution du rendu
+            fps (int): Images par seconde du rendu
+        
+        Returns:
+            str: Chemin du proxy, ou None si aucune vidéo n'est disponible
+        """
+        for video in self.search(keyword):
+            video_file = self.select_file(video, resolution)
+            if video_file:
+                return self.make_proxy(self.download(video_file["link"]), resolution, fps)
+        return None
+    
+    def prefetch(self, keywords, resolution, fps):
+        """
+        Lance en arrière-plan la préparation des vidéos de plusieurs mots-clés
+        
+        Les téléchargements sont parallèles; un mot-clé déjà en cours n'est pas relancé.
+        
+        Args:
+            keywords (list): Mots-clés des segments
+            resolution (tuple): Résolution du rendu
+            fps (int): Images par seconde du rendu
+        
+        Returns:
+            dict: Futures par mot-clé, dont le résultat est le chemin du proxy
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.prefetch_workers,
+                                                    thread_name_prefix="stock_prefetch")
+            futures = {}
+            for keyword in keywords:
+                key = (keyword, tuple(resolution), fps)
+                if key not in self._inflight:
+                    self._inflight[key] = self._executor.submit(self.fetch, keyword, tuple(resolution), fps)
+                futures[keyword] = self._inflight[key]
+        return futures
+    
+    def get(self, keyword, resolution, fps):
+        """
+        Renvoie la vidéo d'un mot-clé, en attendant le préchargement s'il est en cours
+        
+        Args:
+            keyword (str): Mot-clé de recherche
+            resolution (tuple): Résolution du rendu
+            fps (int): Images par seconde du rendu
+        
+        Returns:
+            str: Chemin du proxy, ou None si aucune vidéo n'est disponible
+        """
+        with self._lock:
+            future = self._inflight.pop((keyword, tuple(resolution), fps), None)
+        if future is not None:
+            return future.result()
+        return self.fetch(keyword, resolution, fps)
+    
+    def _touch(self, path):
+        """
+        Marque un fichier comme récemment utilisé (la date du fichier sert d'ordre LRU)
+        
+        Args:
+            path (str): Chemin du fichier
+        """
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def evict(self):
+        """
+        Supprime les vidéos et proxys les moins récemment utilisés au-delà de la taille maximale
+        
+        Returns:
+            int: Nombre d'octets libérés
+        """
+        files = []
+        for directory in (self.media_dir, self.proxy_dir):
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    if not filename.endswith(".mp4") or ".tmp" in filename:
+                        continue
+                    path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in files)
+        freed = 0
+        for _, size, path in sorted(files):
+            if total - freed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        return freed
+    
+    def close(self):
+        """
+        Arrête le préchargement en attendant les téléchargements en cours
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
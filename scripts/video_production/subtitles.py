@@ -0,0 +1,221 @@
+"""
+Module de sous-titres pour AutoTubeCPM
+Ce module construit la piste de sous-titres d'une vidéo à partir du script (ou de l'alignement
+mot à mot de la narration) et l'exporte en SRT ou en ASS: ffmpeg l'incruste pendant l'encodage
+ou l'ajoute comme flux séparé, sans qu'aucun texte ne soit dessiné en Python
+"""
+
+import os
+import re
+
+# Nombre maximal de caractères d'un sous-titre tiré du script (deux lignes de 42)
+DEFAULT_MAX_CUE_CHARS = 84
+
+# Formats d'export reconnus à l'extension du fichier
+SUBTITLE_FORMATS = ("srt", "ass")
+
+
+def _srt_timestamp(seconds):
+    """
+    Args:
+        seconds (float): Position en secondes
+    
+    Returns:
+        str: Horodatage SRT (HH:MM:SS,mmm)
+    """
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+
+
+def _ass_timestamp(seconds):
+    """
+    Args:
+        seconds (float): Position en secondes
+    
+    Returns:
+        str: Horodatage ASS (H:MM:SS.cc, au centième)
+    """
+    centiseconds = int(round(max(0.0, seconds) * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def _split_text(text, max_chars):
+    """
+    Découpe un texte en morceaux d'au plus max_chars caractères, sans couper les mots
+    
+    Args:
+        text (str): Texte à découper
+        max_chars (int): Longueur maximale d'un morceau
+    
+    Returns:
+        list: Morceaux du texte
+    """
+    parts = []
+    for word in text.split():
+        if parts and len(parts[-1]) + 1 + len(word) <= max_chars and not parts[-1].endswith((".", "!", "?")):
+            parts[-1] += " " + word
+        else:
+            parts.append(word)
+    return parts
+
+
+class SubtitleTrack:
+    """Classe représentant les sous-titres d'une vidéo: blocs de texte datés dans la vidéo finale"""
+    
+    def __init__(self, cues=None):
+        """
+        Initialise une piste de sous-titres
+        
+        Args:
+            cues (list, optional): Blocs {"text", "start", "end"}, en secondes dans la vidéo
+        """
+        self.cues = [dict(cue) for cue in cues or []]
+    
+    @classmethod
+    def from_script(cls, blocks, max_chars=DEFAULT_MAX_CUE_CHARS):
+        """
+        Construit les sous-titres à partir des passages du script et des sections qu'ils couvrent
+        
+        Chaque passage est découpé en blocs (une phrase au plus par bloc), dont la durée est
+        proportionnelle au nombre de caractères: sans alignement, c'est la meilleure estimation
+        du débit de la narration.
+        
+        Args:
+            blocks (list): Triplets (texte, début, fin) en secondes dans la vidéo
+            max_chars (int, optional): Nombre maximal de caractères par bloc. Par défaut 84
+        
+        Returns:
+            SubtitleTrack: Piste de sous-titres
+        """
+        cues = []
+        for text, start, end in blocks:
+            parts = _split_text(text, max_chars)
+            if not parts:
+                continue
+            total = sum(len(part) for part in parts)
+            position = start
+            for part in parts:
+                cue_end = position + (end - start) * len(part) / total
+                cues.append({"text": part, "start": round(position, 3), "end": round(cue_end, 3)})
+                position = cue_end
+            cues[-1]["end"] = round(end, 3)
+        return cls(cues)
+    
+    @classmethod
+    def from_alignment(cls, alignment, offset=0.0, **cue_options):
+        """
+        Construit les sous-titres à partir de l'alignement mot à mot de la narration
+        
+        Args:
+            alignment (AlignmentTrack): Piste d'alignement de scripts.tts (ou objet offrant to_cues)
+            offset (float, optional): Instant de la vidéo où commence la narration. Par défaut 0
+            **cue_options: Options de découpage transmises à alignment.to_cues
+        
+        Returns:
+            SubtitleTrack: Piste de sous-titres
+        """
+        return cls([
+            {"text": cue["text"], "start": round(cue["start"] + offset, 3), "end": round(cue["end"] + offset, 3)}
+            for cue in alignment.to_cues(**cue_options)
+        ])
+    
+    def between(self, start, end):
+        """
+        Renvoie les sous-titres d'un intervalle, ramenés à son début
+        
+        Args:
+            start (float): Début de l'intervalle en secondes
+            end (float): Fin de l'intervalle en secondes
+        
+        Returns:
+            SubtitleTrack: Sous-titres de l'intervalle, coupés à ses limites
+        """
+        return SubtitleTrack([
+            {"text": cue["text"], "start": round(max(cue["start"], start) - start, 3),
+             "end": round(min(cue["end"], end) - start, 3)}
+            for cue in self.cues if cue["end"] > start and cue["start"] < end
+        ])
+    
+    def to_srt(self):
+        """
+        Exporte les sous-titres au format SRT (format accepté par l'API YouTube)
+        
+        Returns:
+            str: Contenu SRT
+        """
+        blocks = []
+        for index, cue in enumerate(self.cues, start=1):
+            blocks.append(f"{index}\n{_srt_timestamp(cue['start'])} --> {_srt_timestamp(cue['end'])}\n{cue['text']}\n")
+        return "\n".join(blocks)
+    
+    def to_ass(self, resolution, font="Arial", fontsize=None, margin=None):
+        """
+        Exporte les sous-titres au format ASS, mis en forme pour l'incrustation
+        
+        Le style reprend celui des anciens sous-titres superposés: texte blanc centré en bas
+        de l'image sur un fond noir semi-transparent.
+        
+        Args:
+            resolution (tuple): Résolution de la vidéo (largeur, hauteur)
+            font (str, optional): Police. Par défaut "Arial"
+            fontsize (int, optional): Taille du texte en pixels. Par défaut proportionnelle à la hauteur
+            margin (int, optional): Marge basse en pixels. Par défaut proportionnelle à la hauteur
+        
+        Returns:
+            str: Contenu ASS
+        """
+        width, height = resolution
+        fontsize = fontsize or max(12, height // 24)
+        margin = margin if margin is not None else height // 12
+        # Couleurs ASS en &HAABBGGRR (alpha 00 = opaque); BorderStyle 3 = boîte opaque derrière le texte
+        lines = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {width}",
+            f"PlayResY: {height}",
+            "WrapStyle: 0",
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+            "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+            f"Style: Default,{font},{fontsize},&H00FFFFFF,&H00FFFFFF,&H80000000,&H80000000,"
+            f"0,0,0,0,100,100,0,0,3,{max(1, fontsize // 6)},0,2,50,50,{margin},1",
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
+        ]
+        for cue in self.cues:
+            # Les accolades ouvriraient un bloc de balises ASS
+            text = re.sub(r"\s*\n\s*", r"\\N", cue["text"].strip()).replace("{", "(").replace("}", ")")
+            lines.append(f"Dialogue: 0,{_ass_timestamp(cue['start'])},{_ass_timestamp(cue['end'])},Default,,0,0,0,,{text}")
+        return "\n".join(lines) + "\n"
+    
+    def save(self, path, resolution=None):
+        """
+        Écrit les sous-titres au format donné par l'extension du fichier (.srt ou .ass)
+        
+        Args:
+            path (str): Chemin du fichier
+            resolution (tuple, optional): Résolution de la vidéo, requise pour le format ASS
+        
+        Returns:
+            str: Chemin du fichier
+        """
+        extension = os.path.splitext(path)[1].lstrip(".").lower()
+        if extension not in SUBTITLE_FORMATS:
+            raise ValueError(f"Format de sous-titres inconnu: {extension}. Valeurs possibles: {', '.join(SUBTITLE_FORMATS)}")
+        if extension == "ass" and resolution is None:
+            raise ValueError("La résolution de la vidéo est nécessaire pour le format ASS")
+        
+        content = self.to_srt() if extension == "srt" else self.to_ass(resolution)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
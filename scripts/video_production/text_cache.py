@@ -0,0 +1,192 @@
+"""
+Module de cache des textes rendus pour AutoTubeCPM
+Ce module conserve sur disque les images des textes déjà dessinés (titres, sous-titres,
+appels à l'action) pour qu'un même texte ne soit rendu qu'une seule fois
+"""
+
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from .text_renderer import render_text_image, text_style_key
+
+# Limites par défaut du cache sur disque
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Nombre d'images gardées décodées en mémoire
+DEFAULT_MEMORY_ENTRIES = 64
+
+
+class TextBitmapCache:
+    """Classe pour rendre les textes une seule fois et les servir depuis un cache LRU sur disque"""
+    
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES):
+        """
+        Initialise le cache et indexe les images déjà présentes
+        
+        Args:
+            cache_dir (str, optional): Répertoire des images PNG. Par défaut dans le répertoire temporaire
+            max_entries (int, optional): Nombre maximal d'images sur disque
+            max_bytes (int, optional): Taille maximale du cache sur disque en octets
+            memory_entries (int, optional): Nombre d'images gardées décodées en mémoire
+        """
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'autotubecpm_text_cache')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+        # Clé -> taille du fichier, du moins au plus récemment utilisé
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._arrays = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+        self._scan()
+    
+    def _scan(self):
+        """
+        Indexe les images présentes sur disque, ordonnées par date de dernière utilisation
+        """
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+    
+    def _path(self, key):
+        """
+        Args:
+            key (str): Clé du texte
+        
+        Returns:
+            str: Chemin de l'image PNG
+        """
+        return os.path.join(self.cache_dir, key + ".png")
+    
+    def _touch(self, key):
+        """
+        Marque une image comme récemment utilisée (la date du fichier sert d'ordre LRU entre les sessions)
+        
+        Args:
+            key (str): Clé du texte
+        """
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+    
+    def _evict(self):
+        """
+        Supprime les images les moins récemment utilisées tant que les limites sont dépassées
+        """
+        # La dernière image ajoutée est toujours conservée, même si elle dépasse à elle seule la limite
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._arrays.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+    
+    def get_path(self, text, style):
+        """
+        Renvoie le PNG d'un texte, en le dessinant uniquement s'il n'est pas en cache
+        
+        Args:
+            text (str): Texte à dessiner
+            style (dict): Paramètres de render_text_image (font, fontsize, color, bg_color, method, width, align)
+        
+        Returns:
+            str: Chemin du PNG
+        """
+        key = text_style_key(text, style)
+        path = self._path(key)
+        
+        if key in self._entries and os.path.exists(path):
+            self.hits += 1
+            self._touch(key)
+            return path
+        
+        self.misses += 1
+        image = render_text_image(text, **style)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        image.save(temp_path, format="PNG")
+        os.replace(temp_path, path)
+        
+        size = os.path.getsize(path)
+        self._total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+        self._arrays[key] = np.asarray(image)
+        self._trim_memory()
+        self._evict()
+        
+        return path
+    
+    def get_array(self, text, style):
+        """
+        Renvoie l'image RGBA d'un texte sous forme de tableau NumPy
+        
+        Args:
+            text (str): Texte à dessiner
+            style (dict): Paramètres de render_text_image
+        
+        Returns:
+            numpy.ndarray: Image de forme (hauteur, largeur, 4)
+        """
+        key = text_style_key(text, style)
+        if key in self._arrays and key in self._entries:
+            self.hits += 1
+            self._arrays.move_to_end(key)
+            self._touch(key)
+            return self._arrays[key]
+        
+        path = self.get_path(text, style)
+        if key not in self._arrays:
+            with Image.open(path) as image:
+                self._arrays[key] = np.asarray(image.convert("RGBA"))
+            self._trim_memory()
+        
+        return self._arrays[key]
+    
+    def get_clip(self, text, style):
+        """
+        Renvoie un ImageClip MoviePy du texte, avec son masque de transparence
+        
+        Args:
+            text (str): Texte à dessiner
+            style (dict): Paramètres de render_text_image
+        
+        Returns:
+            ImageClip: Clip du texte, utilisable à la place d'un TextClip
+        """
+        from moviepy.editor import ImageClip
+        
+        # ImageClip sépare le canal alpha d'une image RGBA pour en faire le masque
+        return ImageClip(self.get_array(text, style))
+    
+    def _trim_memory(self):
+        """
+        Limite le nombre d'images décodées gardées en mémoire
+        """
+        while len(self._arrays) > self.memory_entries:
+            self._arrays.popitem(last=False)
+    
+    def __len__(self):
+        """
+        Returns:
+            int: Nombre d'images en cache sur disque
+        """
+        return len(self._entries)
@@ -0,0 +1,156 @@
+"""
+Module de rendu de texte pour AutoTubeCPM
+Ce module dessine les textes de la vidéo en images RGBA avec Pillow, sans passer par ImageMagick
+"""
+
+import re
+import hashlib
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+
+# Polices essayées lorsque la police demandée n'est pas installée
+FALLBACK_FONTS = ["DejaVuSans.ttf", "LiberationSans-Regular.ttf", "FreeSans.ttf"]
+
+# Marge intérieure autour du texte, en pixels
+TEXT_PADDING = 8
+
+_RGBA_PATTERN = re.compile(r"rgba\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([\d.]+)\s*\)")
+
+
+@lru_cache(maxsize=64)
+def load_font(font, fontsize):
+    """
+    Charge une police TrueType, avec repli sur les polices courantes
+    
+    Args:
+        font (str): Nom de la police (ex: "Arial")
+        fontsize (int): Taille en pixels
+    
+    Returns:
+        ImageFont.FreeTypeFont: Police chargée
+    """
+    candidates = [font, f"{font}.ttf"] + FALLBACK_FONTS
+    for candidate in candidates:
+        try:
+            return ImageFont.truetype(candidate, fontsize)
+        except OSError:
+            continue
+    
+    try:
+        return ImageFont.load_default(size=fontsize)
+    except TypeError:
+        # Pillow < 10.1 ne permet pas de choisir la taille de la police par défaut
+        return ImageFont.load_default()
+
+
+def parse_color(color):
+    """
+    Convertit une couleur (nom, #hex, rgb() ou rgba() avec alpha entre 0 et 1) en RGBA
+    
+    Args:
+        color (str or tuple): Couleur à convertir, None ou "transparent" pour aucune
+    
+    Returns:
+        tuple: Couleur (r, g, b, a), ou None pour une couleur transparente
+    """
+    if color is None or color == "transparent":
+        return None
+    if isinstance(color, (tuple, list)):
+        return tuple(color) + (255,) * (4 - len(color))
+    
+    match = _RGBA_PATTERN.fullmatch(color.strip())
+    if match:
+        r, g, b, a = match.groups()
+        alpha = float(a)
+        alpha = int(round(alpha * 255)) if alpha <= 1 else int(alpha)
+        return (int(r), int(g), int(b), alpha)
+    
+    rgb = ImageColor.getrgb(color)
+    return rgb if len(rgb) == 4 else rgb + (255,)
+
+
+def _wrap_text(text, font, max_width):
+    """
+    Découpe le texte en lignes ne dépassant pas la largeur maximale
+    
+    Args:
+        text (str): Texte à découper
+        font (ImageFont.FreeTypeFont): Police utilisée
+        max_width (int): Largeur maximale en pixels
+    
+    Returns:
+        list: Lignes de texte
+    """
+    lines = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for word in paragraph.split():
+            candidate = f"{current} {word}".strip()
+            if current and font.getlength(candidate) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return lines
+
+
+def render_text_image(text, font="Arial", fontsize=30, color="white", bg_color=None,
+                      method="label", width=None, align="center"):
+    """
+    Dessine un texte dans une image RGBA, à la manière de TextClip
+    
+    Args:
+        text (str): Texte à dessiner
+        font (str, optional): Nom de la police. Par défaut "Arial"
+        fontsize (int, optional): Taille de la police. Par défaut 30
+        color (str, optional): Couleur du texte. Par défaut "white"
+        bg_color (str, optional): Couleur de fond, None pour un fond transparent
+        method (str, optional): "label" (une ligne) ou "caption" (texte renvoyé à la ligne dans width)
+        width (int, optional): Largeur de l'image pour la méthode "caption"
+        align (str, optional): Alignement des lignes ("center", "left" ou "right"). Par défaut "center"
+    
+    Returns:
+        PIL.Image.Image: Image RGBA du texte
+    """
+    pil_font = load_font(font, fontsize)
+    text_width_limit = (width - 2 * TEXT_PADDING) if (method == "caption" and width) else None
+    lines = _wrap_text(text, pil_font, text_width_limit) if text_width_limit else text.split("\n")
+    
+    ascent, descent = pil_font.getmetrics()
+    line_height = ascent + descent
+    line_widths = [int(round(pil_font.getlength(line))) for line in lines]
+    
+    image_width = width if (method == "caption" and width) else max(line_widths + [1]) + 2 * TEXT_PADDING
+    image_height = line_height * len(lines) + 2 * TEXT_PADDING
+    
+    image = Image.new("RGBA", (image_width, image_height), parse_color(bg_color) or (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    fill = parse_color(color)
+    
+    for index, (line, line_width) in enumerate(zip(lines, line_widths)):
+        if align == "left":
+            x = TEXT_PADDING
+        elif align == "right":
+            x = image_width - TEXT_PADDING - line_width
+        else:
+            x = (image_width - line_width) // 2
+        draw.text((x, TEXT_PADDING + index * line_height), line, font=pil_font, fill=fill)
+    
+    return image
+
+
+def text_style_key(text, style):
+    """
+    Calcule la clé unique d'un texte rendu avec un style donné
+    
+    Args:
+        text (str): Texte à dessiner
+        style (dict): Paramètres de render_text_image (font, fontsize, color, bg_color, method, width, align)
+    
+    Returns:
+        str: Empreinte SHA-1 hexadécimale
+    """
+    fields = [text] + [str(style.get(name)) for name in ("font", "fontsize", "color", "bg_color", "method", "width", "align")]
+    return hashlib.sha1("\x1f".join(fields).encode('utf-8')).hexdigest()
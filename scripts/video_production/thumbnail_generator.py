@@ -0,0 +1,368 @@
+"""
+Module de génération de miniatures pour AutoTubeCPM
+Ce module compose les miniatures YouTube (1280x720, JPEG de moins de 2 Mo) avec Pillow: une image
+de la vidéo rendue en fond, le titre et les éléments de la marque (logo, nom de la chaîne, couleur)
+"""
+
+import io
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw, ImageOps
+
+from .ffmpeg_utils import run_ffmpeg, probe_duration, format_seconds
+from .text_renderer import load_font, parse_color, _wrap_text
+
+# Taille recommandée par YouTube et poids maximal accepté par l'API
+THUMBNAIL_SIZE = (1280, 720)
+MAX_THUMBNAIL_BYTES = 2 * 1024 * 1024
+
+# Qualités JPEG essayées dans l'ordre jusqu'à passer sous le poids maximal
+JPEG_QUALITIES = (90, 82, 72, 60, 45)
+
+# Position de l'image de fond dans la vidéo, en fraction de sa durée, lorsqu'aucun instant n'est donné
+DEFAULT_FRAME_POSITION = 0.3
+
+# Éléments de la marque: logo (chemin d'une image, idéalement PNG transparent), nom de la chaîne,
+# couleur d'accent et police
+DEFAULT_BRAND = {
+    "logo_path": None,
+    "channel_name": None,
+    "accent_color": "#FFD400",
+    "font": "Arial"
+}
+
+# Mises en page: zone du titre (x, y, largeur, hauteur en fractions de l'image), taille de police
+# maximale et minimale, nombre de lignes, assombrissement du fond ("bottom" = dégradé vers le bas)
+THUMBNAIL_LAYOUTS = {
+    "bold": {
+        "title_box": (0.05, 0.42, 0.9, 0.5),
+        "max_fontsize": 132,
+        "min_fontsize": 48,
+        "max_lines": 3,
+        "align": "left",
+        "uppercase": True,
+        "shade": "bottom",
+        "accent_bar": True
+    },
+    "centered": {
+        "title_box": (0.1, 0.2, 0.8, 0.6),
+        "max_fontsize": 120,
+        "min_fontsize": 44,
+        "max_lines": 3,
+        "align": "center",
+        "uppercase": False,
+        "shade": "full",
+        "accent_bar": False
+    }
+}
+DEFAULT_LAYOUT = "bold"
+
+
+class ThumbnailGenerator:
+    """Classe pour composer les miniatures d'une chaîne avec une mise en page et une marque communes"""
+    
+    def __init__(self, brand=None, size=THUMBNAIL_SIZE):
+        """
+        Initialise le générateur
+        
+        Args:
+            brand (dict, optional): Éléments de la marque (logo_path, channel_name, accent_color, font),
+                complétés par DEFAULT_BRAND
+            size (tuple, optional): Taille des miniatures. Par défaut (1280, 720)
+        """
+        self.brand = dict(DEFAULT_BRAND, **(brand or {}))
+        self.size = tuple(size)
+        # Calques de la marque par mise en page, composés une fois pour toutes les miniatures
+        self._overlays = {}
+    
+    def generate(self, output_path, title, video_path=None, timestamp=None, image_path=None, layout=DEFAULT_LAYOUT,
+                 keyframes=None):
+        """
+        Compose une miniature et l'écrit en JPEG
+        
+        Le fond est l'image de la vidéo à l'instant demandé, ou une image fixe, ou à défaut un
+        fond uni; il est recadré au centre à la taille de la miniature.
+        
+        Args:
+            output_path (str): Chemin de la miniature (.jpg)
+            title (str): Titre à afficher
+            video_path (str, optional): Vidéo rendue dont une image sert de fond
+            timestamp (float, optional): Instant de l'image en secondes. Par défaut à 30 % de la vidéo
+            image_path (str, optional): Image de fond, à la place d'une image de la vidéo
+            layout (str, optional): Mise en page ("bold" ou "centered"). Par défaut "bold"
+            keyframes (KeyframeIndex, optional): Index des images clés de la vidéo
+        
+        Returns:
+            str: Chemin de la miniature
+        """
+        if layout not in THUMBNAIL_LAYOUTS:
+            raise ValueError(f"Mise en page inconnue: {layout}. Valeurs possibles: {', '.join(THUMBNAIL_LAYOUTS)}")
+        
+        if video_path:
+            background = self.extract_frame(video_path, timestamp, keyframes)
+        elif image_path:
+            with Image.open(image_path) as image:
+                background = ImageOps.fit(image.convert("RGB"), self.size, Image.LANCZOS)
+        else:
+            background = Image.new("RGB", self.size, (24, 24, 24))
+        
+        thumbnail = Image.alpha_composite(background.convert("RGBA"), self._overlay(layout))
+        self._draw_title(thumbnail, title, THUMBNAIL_LAYOUTS[layout])
+        
+        data = self.encode(thumbnail.convert("RGB"))
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, output_path)
+        return output_path
+    
+    def extract_frame(self, video_path, timestamp=None, keyframes=None):
+        """
+        Lit une image de la vidéo, recadrée à la taille de la miniature, sans fichier intermédiaire
+        
+        Args:
+            video_path (str): Chemin de la vidéo
+            timestamp (float, optional): Instant en secondes. Par défaut à 30 % de la vidéo
+            keyframes (KeyframeIndex, optional): Index des images clés: l'instant est ramené à l'image
+                clé qui le précède, seule image à décoder
+        
+        Returns:
+            PIL.Image.Image: Image RGB
+        """
+        if timestamp is None:
+            duration = keyframes.duration if keyframes else probe_duration(video_path)
+            timestamp = duration * DEFAULT_FRAME_POSITION
+        keyframe = keyframes.keyframe_at(timestamp) if keyframes else None
+        if keyframe:
+            timestamp = keyframe["time"]
+        width, height = self.size
+        # -ss avant -i: recherche sur l'image clé la plus proche puis décodage jusqu'à l'instant demandé
+        result = run_ffmpeg(["-ss", format_seconds(timestamp), "-i", video_path, "-an", "-sn", "-frames:v", "1",
+                             "-vf", f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+                                    f"crop={width}:{height},setsar=1",
+                             "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+                            description=f"extraction de l'image de la miniature à {timestamp:.2f}s")
+        if len(result.stdout) < width * height * 3:
+            raise RuntimeError(f"Aucune image à {timestamp:.2f}s dans {os.path.basename(video_path)}")
+        return Image.frombytes("RGB", self.size, result.stdout[:width * height * 3])
+    
+    def encode(self, image):
+        """
+        Encode la miniature en JPEG, en baissant la qualité si besoin pour rester sous le poids maximal
+        
+        Args:
+            image (PIL.Image.Image): Miniature RGB
+        
+        Returns:
+            bytes: Contenu JPEG
+        """
+        for quality in JPEG_QUALITIES:
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= MAX_THUMBNAIL_BYTES:
+                return buffer.getvalue()
+        raise RuntimeError(f"Miniature de plus de {MAX_THUMBNAIL_BYTES // (1024 * 1024)} Mo même en qualité {JPEG_QUALITIES[-1]}")
+    
+    def _overlay(self, layout):
+        """
+        Calque de la marque d'une mise en page (assombrissement, barre d'accent, logo, nom de la chaîne)
+        
+        Args:
+            layout (str): Nom de la mise en page
+        
+        Returns:
+            PIL.Image.Image: Calque RGBA à la taille de la miniature
+        """
+        if layout in self._overlays:
+            return self._overlays[layout]
+        
+        settings = THUMBNAIL_LAYOUTS[layout]
+        width, height = self.size
+        accent = parse_color(self.brand["accent_color"])
+        
+        if settings["shade"] == "bottom":
+            # Dégradé vertical: transparent en haut, 80 % de noir en bas, sous le titre
+            ramp = Image.linear_gradient("L").resize((1, height)).point(lambda value: int(value * 0.8))
+            overlay = Image.new("RGBA", self.size, (0, 0, 0, 0))
+            overlay.putalpha(ramp.resize(self.size))
+        else:
+            overlay = Image.new("RGBA", self.size, (0, 0, 0, 110))
+        
+        draw = ImageDraw.Draw(overlay)
+        margin = height // 24
+        if settings["accent_bar"]:
+            x, y, _, _ = settings["title_box"]
+            bar_top = int(y * height) - margin
+            draw.rectangle([int(x * width), bar_top, int(x * width) + width // 8, bar_top + max(4, height // 90)], fill=accent)
+        
+        logo_right = margin
+        if self.brand["logo_path"] and os.path.exists(self.brand["logo_path"]):
+            with Image.open(self.brand["logo_path"]) as logo:
+                logo = logo.convert("RGBA")
+                logo.thumbnail((height // 6, height // 6), Image.LANCZOS)
+            overlay.alpha_composite(logo, (margin, margin))
+            logo_right = margin + logo.width + margin // 2
+        
+        if self.brand["channel_name"]:
+            font = load_font(self.brand["font"], max(12, height // 24))
+            draw.text((logo_right, margin), self.brand["channel_name"], font=font, fill=(255, 255, 255, 235),
+                      stroke_width=2, stroke_fill=(0, 0, 0, 200))
+        
+        self._overlays[layout] = overlay
+        return overlay
+    
+    def _fit_title(self, title, settings):
+        """
+        Cherche la plus grande taille de police pour laquelle le titre tient dans sa zone
+        
+        Args:
+            title (str): Titre à afficher
+            settings (dict): Mise en page
+        
+        Returns:
+            tuple: (police, lignes)
+        """
+        width, height = self.size
+        _, _, box_width, box_height = settings["title_box"]
+        box_width, box_height = int(box_width * width), int(box_height * height)
+        
+        # Recherche dichotomique: les polices chargées restent en cache (load_font)
+        low, high = settings["min_fontsize"], settings["max_fontsize"]
+        best = None
+        while low <= high:
+            fontsize = (low + high) // 2
+            font = load_font(self.brand["font"], fontsize)
+            lines = _wrap_text(title, font, box_width)
+            ascent, descent = font.getmetrics()
+            fits = (len(lines) <= settings["max_lines"] and (ascent + descent) * len(lines) <= box_height
+                    and all(font.getlength(line) <= box_width for line in lines))
+            if fits:
+                best = (font, lines)
+                low = fontsize + 1
+            else:
+                high = fontsize - 1
+        
+        if best is None:
+            # Titre trop long: taille minimale, lignes en trop remplacées par des points de suspension
+            font = load_font(self.brand["font"], settings["min_fontsize"])
+            lines = _wrap_text(title, font, box_width)
+            if len(lines) > settings["max_lines"]:
+                lines = lines[:settings["max_lines"]]
+                lines[-1] = lines[-1].rstrip(".,;:") + "…"
+            best = (font, lines)
+        return best
+    
+    def _draw_title(self, thumbnail, title, settings):
+        """
+        Dessine le titre dans sa zone, contouré de noir pour rester lisible sur tout fond
+        
+        Args:
+            thumbnail (PIL.Image.Image): Miniature RGBA, modifiée en place
+            title (str): Titre à afficher
+            settings (dict): Mise en page
+        """
+        if settings["uppercase"]:
+            title = title.upper()
+        font, lines = self._fit_title(title, settings)
+        
+        width, height = self.size
+        box_x, box_y, box_width, box_height = settings["title_box"]
+        box_x, box_y = int(box_x * width), int(box_y * height)
+        box_width, box_height = int(box_width * width), int(box_height * height)
+        ascent, descent = font.getmetrics()
+        line_height = ascent + descent
+        # Bloc de texte centré verticalement dans sa zone
+        y = box_y + (box_height - line_height * len(lines)) // 2
+        stroke = max(2, font.size // 18)
+        
+        draw = ImageDraw.Draw(thumbnail)
+        for line in lines:
+            line_width = font.getlength(line)
+            x = box_x if settings["align"] == "left" else box_x + (box_width - line_width) / 2
+            draw.text((x, y), line, font=font, fill=(255, 255, 255, 255), stroke_width=stroke, stroke_fill=(0, 0, 0, 255))
+            y += line_height
+    
+    def generate_batch(self, jobs, workers=None):
+        """
+        Compose plusieurs miniatures dans un pool de processus
+        
+        Chaque processus garde son propre générateur: polices et calques de la marque ne sont
+        préparés qu'une fois par processus, quel que soit le nombre de miniatures.
+        
+        Args:
+            jobs (list): Paramètres de generate pour chaque miniature (output_path, title, video_path,
+                timestamp, image_path, layout, keyframes)
+            workers (int, optional): Nombre de processus. Par défaut le nombre de processeurs
+        
+        Returns:
+            list: Chemins des miniatures, dans l'ordre des tâches
+        """
+        jobs = list(jobs)
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        if workers <= 1:
+            return [self.generate(**job) for job in jobs]
+        
+        print(f"Génération de {len(jobs)} miniatures avec {workers} processus")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.brand, self.size)) as executor:
+            return list(executor.map(_generate_in_worker, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+# Générateur du processus courant du pool, créé par _init_worker
+_worker_generator = None
+
+
+def _init_worker(brand, size):
+    """
+    Crée le générateur d'un processus du pool (fonction de module pour être sérialisable)
+    
+    Args:
+        brand (dict): Éléments de la marque
+        size (tuple): Taille des miniatures
+    """
+    global _worker_generator
+    _worker_generator = ThumbnailGenerator(brand, size)
+
+
+def _generate_in_worker(job):
+    """
+    Compose une miniature dans un processus du pool
+    
+    Args:
+        job (dict): Paramètres de ThumbnailGenerator.generate
+    
+    Returns:
+        str: Chemin de la miniature
+    """
+    return _worker_generator.generate(**job)
+
+
+def main(argv=None):
+    """
+    Point d'entrée en ligne de commande: miniature d'une vidéo rendue
+    
+    Args:
+        argv (list, optional): Arguments de la ligne de commande
+    """
+    parser = argparse.ArgumentParser(description="Génération d'une miniature YouTube")
+    parser.add_argument("video_path", help="Vidéo rendue")
+    parser.add_argument("title", help="Titre affiché sur la miniature")
+    parser.add_argument("--at", type=float, help="Instant de l'image de fond en secondes")
+    parser.add_argument("--layout", default=DEFAULT_LAYOUT, choices=sorted(THUMBNAIL_LAYOUTS), help="Mise en page")
+    parser.add_argument("--logo", help="Logo de la chaîne")
+    parser.add_argument("--channel", help="Nom de la chaîne")
+    parser.add_argument("--output", help="Chemin de la miniature. Par défaut à côté de la vidéo")
+    
+    args = parser.parse_args(argv)
+    
+    generator = ThumbnailGenerator({"logo_path": args.logo, "channel_name": args.channel})
+    output_path = args.output or os.path.splitext(args.video_path)[0] + ".jpg"
+    print(generator.generate(output_path, args.title, video_path=args.video_path, timestamp=args.at,
+                             layout=args.layout))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,498 @@
+"""
+Module de chronologie pour AutoTubeCPM
+Ce module décrit une vidéo sous forme de pistes et d'éléments datés, sans construire de clip:
+les moteurs de rendu ne matérialisent que les éléments qui figurent dans la coupe finale
+"""
+
+import json
+import copy
+import math
+from collections import OrderedDict
+
+# Pistes par défaut, de l'arrière-plan au premier plan
+VISUAL_TRACK = "visual"
+SUBTITLE_TRACK = "subtitles"
+NARRATION_TRACK = "narration"
+
+# Piste des sous-titres rendus par ffmpeg (fichier ASS ou SRT), hors de la composition des images
+CAPTION_TRACK = "captions"
+
+# Rendus possibles de la piste des sous-titres: incrustés dans l'image ou en flux séparé
+CAPTION_MODES = ("burn", "soft")
+
+# Pistes qui ne sont pas composées dans l'image
+NON_VISUAL_TRACKS = (NARRATION_TRACK, CAPTION_TRACK)
+
+# Version du format JSON, pour rejouer un rendu sauvegardé
+TIMELINE_FORMAT_VERSION = 1
+
+# Durée minimale d'un intervalle fixe rendu comme une image tenue, en secondes
+STATIC_MIN_SECONDS = 1.0
+
+
+class TimelineItem:
+    """Classe décrivant un élément daté d'une piste (couleur, texte, image, vidéo, audio ou sous-titre)"""
+    
+    def __init__(self, kind, start, duration, **fields):
+        """
+        Initialise un élément
+        
+        Args:
+            kind (str): Type de l'élément ("color", "text", "image", "video", "audio", "caption")
+            start (float): Instant de départ dans la vidéo, en secondes
+            duration (float): Durée en secondes
+            **fields: Paramètres propres au type (color, text, style, path, position, effects, motion, offset)
+        """
+        self.kind = kind
+        self.start = start
+        self.duration = duration
+        self.fields = fields
+    
+    @property
+    def end(self):
+        """
+        Returns:
+            float: Instant de fin dans la vidéo, en secondes
+        """
+        return self.start + self.duration
+    
+    def clipped(self, start, end):
+        """
+        Renvoie la partie de l'élément comprise dans un intervalle
+        
+        Un fondu d'entrée ne subsiste que si le début de l'élément est conservé, un fondu de sortie
+        que si sa fin l'est. La partie retirée au début est cumulée dans "offset", pour que les
+        vidéos et les mouvements reprennent au bon endroit.
+        
+        Args:
+            start (float): Début de l'intervalle
+            end (float): Fin de l'intervalle
+        
+        Returns:
+            TimelineItem: Partie de l'élément, ou None si l'élément est hors de l'intervalle
+        """
+        new_start = max(self.start, start)
+        new_end = min(self.end, end)
+        if new_end <= new_start:
+            return None
+        if new_start == self.start and new_end == self.end:
+            return self
+        
+        fields = copy.deepcopy(self.fields)
+        effects = fields.get("effects") or []
+        if new_start > self.start:
+            fields["offset"] = fields.get("offset", 0) + new_start - self.start
+            effects = [effect for effect in effects if not effect["name"].endswith("in")]
+        if new_end < self.end:
+            effects = [effect for effect in effects if not effect["name"].endswith("out")]
+        if "effects" in fields:
+            fields["effects"] = effects
+        
+        return TimelineItem(self.kind, new_start, new_end - new_start, **fields)
+    
+    def to_dict(self, origin=0.0):
+        """
+        Args:
+            origin (float, optional): Instant de référence soustrait au départ. Par défaut 0
+        
+        Returns:
+            dict: Élément au format des calques du plan de rendu ({"type", "start", "duration", ...})
+        """
+        # Arrondi à la microseconde pour que les calques d'un segment identique (intro, outro)
+        # donnent le même plan quelle que soit leur place dans la vidéo
+        data = {"type": self.kind, "start": float(round(self.start - origin, 6)),
+                "duration": float(round(self.duration, 6))}
+        data.update(copy.deepcopy(self.fields))
+        return data
+    
+    @classmethod
+    def from_dict(cls, data, origin=0.0):
+        """
+        Args:
+            data (dict): Élément ou calque de plan de rendu
+            origin (float, optional): Instant ajouté au départ (début du segment). Par défaut 0
+        
+        Returns:
+            TimelineItem: Élément correspondant
+        """
+        fields = {key: copy.deepcopy(value) for key, value in data.items()
+                  if key not in ("type", "start", "duration")}
+        return cls(data["type"], origin + data["start"], data["duration"], **fields)
+
+
+class Track:
+    """Classe décrivant une piste: suite d'éléments superposés dans l'ordre d'ajout"""
+    
+    def __init__(self, name, items=None):
+        """
+        Initialise une piste
+        
+        Args:
+            name (str): Nom de la piste
+            items (list, optional): Éléments de la piste
+        """
+        self.name = name
+        self.items = list(items or [])
+    
+    def add(self, kind, start, duration, **fields):
+        """
+        Ajoute un élément à la piste
+        
+        Args:
+            kind (str): Type de l'élément
+            start (float): Instant de départ en secondes
+            duration (float): Durée en secondes
+            **fields: Paramètres propres au type
+        
+        Returns:
+            TimelineItem: Élément ajouté
+        """
+        item = TimelineItem(kind, start, duration, **fields)
+        self.items.append(item)
+        return item
+    
+    def items_between(self, start, end):
+        """
+        Args:
+            start (float): Début de l'intervalle
+            end (float): Fin de l'intervalle
+        
+        Returns:
+            list: Parties des éléments comprises dans l'intervalle
+        """
+        parts = (item.clipped(start, end) for item in self.items)
+        return [part for part in parts if part is not None]
+
+
+class Timeline:
+    """Classe décrivant une vidéo: sections successives, pistes superposées et narration"""
+    
+    def __init__(self, resolution, fps, visual_style=None, caption_mode=None):
+        """
+        Initialise une chronologie vide
+        
+        Args:
+            resolution (tuple): Résolution (largeur, hauteur)
+            fps (int): Images par seconde
+            visual_style (str, optional): Style visuel, transmis aux paramètres d'encodage
+            caption_mode (str, optional): Rendu de la piste des sous-titres, "burn" ou "soft".
+                Par défaut None (piste ignorée)
+        """
+        if caption_mode is not None and caption_mode not in CAPTION_MODES:
+            raise ValueError(f"Rendu des sous-titres inconnu: {caption_mode}. Valeurs possibles: {', '.join(CAPTION_MODES)}")
+        self.resolution = tuple(resolution)
+        self.fps = fps
+        self.visual_style = visual_style
+        self.caption_mode = caption_mode
+        self.sections = []
+        self.tracks = OrderedDict()
+        for name in (VISUAL_TRACK, SUBTITLE_TRACK, NARRATION_TRACK):
+            self.track(name)
+    
+    @property
+    def duration(self):
+        """
+        Returns:
+            float: Durée totale des sections, en secondes
+        """
+        return sum(section["duration"] for section in self.sections)
+    
+    def track(self, name):
+        """
+        Renvoie une piste, créée au premier plan si elle n'existe pas encore
+        
+        Args:
+            name (str): Nom de la piste
+        
+        Returns:
+            Track: Piste
+        """
+        if name not in self.tracks:
+            self.tracks[name] = Track(name)
+        return self.tracks[name]
+    
+    def add_section(self, name, duration, cache=False, static=False):
+        """
+        Ajoute une section à la suite des précédentes
+        
+        Les sections découpent la vidéo en segments de rendu; une section marquée "cache"
+        (intro, outro) est identique d'une vidéo à l'autre et peut être reprise déjà encodée.
+        Une section marquée "static" montre la même image du début à la fin: les moteurs
+        la composent une seule fois et la tiennent pendant toute sa durée.
+        
+        Args:
+            name (str): Nom de la section
+            duration (float): Durée en secondes
+            cache (bool, optional): Section réutilisable entre les vidéos. Par défaut False
+            static (bool, optional): Section sans mouvement ni fondu. Par défaut False
+        
+        Returns:
+            float: Instant de départ de la section
+        """
+        start = self.duration
+        section = {"name": name, "start": start, "duration": duration}
+        if cache:
+            section["cache"] = True
+        if static:
+            section["static"] = True
+        self.sections.append(section)
+        return start
+    
+    def section_items(self, index):
+        """
+        Args:
+            index (int): Indice de la section
+        
+        Returns:
+            list: Couples (nom de piste, élément) des pistes visuelles dans la section, du fond au premier plan
+        """
+        section = self.sections[index]
+        end = section["start"] + section["duration"]
+        return [
+            (name, item)
+            for name, track in self.tracks.items() if name not in NON_VISUAL_TRACKS
+            for item in track.items_between(section["start"], end)
+        ]
+    
+    def audio_items(self, start=0.0, end=None):
+        """
+        Args:
+            start (float, optional): Début de l'intervalle. Par défaut 0
+            end (float, optional): Fin de l'intervalle. Par défaut la fin de la vidéo
+        
+        Returns:
+            list: Éléments de la piste de narration compris dans l'intervalle
+        """
+        return self.tracks[NARRATION_TRACK].items_between(start, self.duration if end is None else end)
+    
+    def caption_items(self, start=0.0, end=None):
+        """
+        Args:
+            start (float, optional): Début de l'intervalle. Par défaut 0
+            end (float, optional): Fin de l'intervalle. Par défaut la fin de la vidéo
+        
+        Returns:
+            list: Éléments de la piste des sous-titres compris dans l'intervalle
+        """
+        if CAPTION_TRACK not in self.tracks:
+            return []
+        return self.tracks[CAPTION_TRACK].items_between(start, self.duration if end is None else end)
+    
+    def caption_cues(self):
+        """
+        Returns:
+            list: Sous-titres {"text", "start", "end"} de la piste des sous-titres, aux temps de la vidéo
+        """
+        return [{"text": item.fields["text"], "start": item.start, "end": item.end} for item in self.caption_items()]
+    
+    def static_ranges(self, start=0.0, end=None):
+        """
+        Repère les intervalles où l'image composée ne change pas
+        
+        L'image est fixe tant que les mêmes éléments sont visibles et qu'aucun n'est une vidéo,
+        n'a de mouvement ou n'est dans un fondu. Les limites sont alignées sur les images
+        comptées depuis start, sauf la fin de l'intervalle demandé.
+        
+        Args:
+            start (float, optional): Début de l'intervalle. Par défaut 0
+            end (float, optional): Fin de l'intervalle. Par défaut la fin de la vidéo
+        
+        Returns:
+            list: Couples (début, fin) des intervalles fixes, dans l'ordre
+        """
+        end = self.duration if end is None else end
+        points = {start, end}
+        moving = []
+        for name, track in self.tracks.items():
+            if name in NON_VISUAL_TRACKS:
+                continue
+            for item in track.items_between(start, end):
+                points.update((item.start, item.end))
+                if item.kind == "video" or item.fields.get("motion"):
+                    moving.append((item.start, item.end))
+                for effect in item.fields.get("effects") or []:
+                    fade_duration = min(effect["duration"], item.duration)
+                    if effect["name"].endswith("in"):
+                        window = (item.start, item.start + fade_duration)
+                    else:
+                        window = (item.end - fade_duration, item.end)
+                    moving.append(window)
+                    points.update(window)
+        
+        ranges = []
+        points = sorted(point for point in points if start <= point <= end)
+        for range_start, range_end in zip(points, points[1:]):
+            if any(moving_start < range_end and range_start < moving_end for moving_start, moving_end in moving):
+                continue
+            range_start = start + math.ceil((range_start - start) * self.fps - 1e-6) / self.fps
+            if range_end < end:
+                range_end = start + math.floor((range_end - start) * self.fps + 1e-6) / self.fps
+            if range_end > range_start:
+                ranges.append((range_start, range_end))
+        return ranges
+    
+    def split_static(self, min_duration=STATIC_MIN_SECONDS):
+        """
+        Redécoupe les sections pour isoler leurs intervalles fixes dans des sections "static"
+        
+        Les sections réutilisables (intro, outro) sont conservées telles quelles: elles sont
+        reprises du cache des segments plutôt que recomposées.
+        
+        Args:
+            min_duration (float, optional): Durée minimale d'un intervalle fixe isolé. Par défaut 1 seconde
+        
+        Returns:
+            Timeline: Chronologie aux mêmes éléments, aux sections redécoupées
+        """
+        timeline = Timeline(self.resolution, self.fps, self.visual_style, self.caption_mode)
+        for name, track in self.tracks.items():
+            timeline.track(name).items = list(track.items)
+        
+        for section in self.sections:
+            start = section["start"]
+            end = start + section["duration"]
+            if section.get("cache"):
+                timeline.add_section(section["name"], section["duration"], True, section.get("static", False))
+                continue
+            
+            ranges = [(range_start, range_end) for range_start, range_end in self.static_ranges(start, end)
+                      if range_end - range_start >= min_duration]
+            position = start
+            for range_start, range_end in ranges + [(end, end)]:
+                if range_start > position:
+                    timeline.add_section(section["name"], range_start - position)
+                if range_end > range_start:
+                    timeline.add_section(section["name"], range_end - range_start, static=True)
+                position = range_end
+        return timeline
+    
+    def cut(self, start, end):
+        """
+        Extrait une partie de la chronologie, ramenée à l'instant zéro
+        
+        Args:
+            start (float): Début de la partie en secondes
+            end (float): Fin de la partie en secondes
+        
+        Returns:
+            Timeline: Chronologie de la partie
+        """
+        part = Timeline(self.resolution, self.fps, self.visual_style, self.caption_mode)
+        for section in self.sections:
+            section_start = max(section["start"], start)
+            section_end = min(section["start"] + section["duration"], end)
+            if section_end > section_start:
+                part.add_section(section["name"], section_end - section_start,
+                                 section.get("cache", False) and section_end - section_start == section["duration"],
+                                 section.get("static", False))
+        
+        for name, track in self.tracks.items():
+            for item in track.items_between(start, end):
+                item = TimelineItem(item.kind, item.start - start, item.duration, **item.fields)
+                part.track(name).items.append(item)
+        return part
+    
+    def to_render_plan(self):
+        """
+        Traduit la chronologie en plan de rendu (un segment par section, calques aux temps locaux)
+        
+        Returns:
+            dict: Plan de rendu (resolution, fps, visual_style, segments, audio, et captions si la
+                chronologie a des sous-titres à rendre)
+        """
+        segments = []
+        for index, section in enumerate(self.sections):
+            segment = {
+                "name": section["name"],
+                "duration": section["duration"],
+                "layers": [item.to_dict(section["start"]) for _, item in self.section_items(index)]
+            }
+            if section.get("cache"):
+                segment["cache"] = True
+            if section.get("static"):
+                segment["static"] = True
+            segments.append(segment)
+        
+        audio = [
+            {"path": item.fields["path"], "start": item.start, "duration": item.duration}
+            for item in self.audio_items()
+        ]
+        
+        plan = {
+            "resolution": list(self.resolution),
+            "fps": self.fps,
+            "visual_style": self.visual_style,
+            "segments": segments,
+            "audio": audio
+        }
+        
+        cues = self.caption_cues()
+        if self.caption_mode and cues:
+            plan["captions"] = {"mode": self.caption_mode, "cues": cues}
+        return plan
+    
+    def to_dict(self):
+        """
+        Returns:
+            dict: Chronologie sérialisable en JSON
+        """
+        data = {
+            "version": TIMELINE_FORMAT_VERSION,
+            "resolution": list(self.resolution),
+            "fps": self.fps,
+            "visual_style": self.visual_style,
+            "sections": copy.deepcopy(self.sections),
+            "tracks": [
+                {"name": name, "items": [item.to_dict() for item in track.items]}
+                for name, track in self.tracks.items()
+            ]
+        }
+        if self.caption_mode:
+            data["caption_mode"] = self.caption_mode
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Args:
+            data (dict): Chronologie produite par to_dict
+        
+        Returns:
+            Timeline: Chronologie reconstruite
+        """
+        if data.get("version") != TIMELINE_FORMAT_VERSION:
+            raise ValueError(f"Version de chronologie non prise en charge: {data.get('version')}")
+        
+        timeline = cls(data["resolution"], data["fps"], data.get("visual_style"), data.get("caption_mode"))
+        for section in data["sections"]:
+            timeline.add_section(section["name"], section["duration"], section.get("cache", False),
+                                 section.get("static", False))
+        for track in data["tracks"]:
+            timeline.track(track["name"]).items.extend(TimelineItem.from_dict(item) for item in track["items"])
+        return timeline
+    
+    def save(self, path):
+        """
+        Écrit la chronologie en JSON
+        
+        Args:
+            path (str): Chemin du fichier
+        
+        Returns:
+            str: Chemin du fichier
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Args:
+            path (str): Chemin d'une chronologie écrite par save
+        
+        Returns:
+            Timeline: Chronologie
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
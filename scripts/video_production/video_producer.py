@@ -5,13 +5,69 @@ Ce module gère la création de vidéos à partir d'audio et d'éléments visuel
 
 import os
 import json
-import time
 import random
+import zlib
+import shutil
+import tempfile
 import requests
 from datetime import datetime
+from PIL import Image
 from moviepy.editor import (
-    AudioFileClip, ImageClip, VideoFileClip, TextClip, 
-    CompositeVideoClip, concatenate_videoclips, vfx
+    AudioFileClip, ImageClip, VideoFileClip, 
+    CompositeVideoClip, vfx
+)
+
+from .ffmpeg_backend import FFmpegRenderer
+from .ffmpeg_utils import probe_duration, run_ffmpeg
+from .text_cache import TextBitmapCache
+from .segment_cache import SegmentCache
+from .render_profiler import RenderProfiler
+from .render_profiles import get_render_profile, DEFAULT_RENDER_PROFILE
+from .stock_media import StockMediaLibrary
+from .asset_normalizer import AssetNormalizer
+from .chunked_render import ChunkedRenderer, DEFAULT_CHUNK_SECONDS
+from .compositor import TimelineCompositor
+from .timeline import Timeline, TimelineItem, VISUAL_TRACK, SUBTITLE_TRACK, NARRATION_TRACK, CAPTION_TRACK, CAPTION_MODES
+from .subtitles import SubtitleTrack
+from .output_formats import get_output_format
+from .thumbnail_generator import ThumbnailGenerator, DEFAULT_LAYOUT, DEFAULT_FRAME_POSITION
+from .keyframe_index import KeyframeIndex
+from .audio_timing import detect_pauses, plan_section_starts
+from .text_renderer import render_text_image
+
+# Moteurs de rendu disponibles pour create_video
+RENDER_BACKENDS = ("moviepy", "ffmpeg")
+
+# Aperçus: vidéo proxy basse résolution ou planche d'images par segment
+PREVIEW_MODES = ("proxy", "storyboard")
+PREVIEW_RESOLUTION = (640, 360)
+PREVIEW_FPS = 12
+STORYBOARD_FPS = 2
+STORYBOARD_THUMBNAIL_WIDTH = 320
+
+# Suffixe de la chronologie sauvegardée à côté de la vidéo, pour rejouer le rendu
+TIMELINE_SUFFIX = ".timeline.json"
+
+# Sous-titres: calques de texte composés dans l'image ("overlay"), ou piste rendue par ffmpeg,
+# incrustée ("burn") ou en flux séparé ("soft")
+SUBTITLE_MODES = ("overlay",) + CAPTION_MODES
+DEFAULT_SUBTITLE_MODE = "burn"
+
+# Suffixe des sous-titres exportés à côté de la vidéo (format accepté par l'API YouTube)
+CAPTIONS_SUFFIX = ".srt"
+
+# Miniature exportée à côté de la vidéo, et logo de la chaîne qui y est apposé s'il existe
+THUMBNAIL_SUFFIX = ".jpg"
+BRAND_LOGO = os.path.join('brand', 'logo.png')
+
+# Champs du script lus dans chacune des cinq sections (introduction, trois sections, conclusion): leur
+# texte donne les sous-titres exportés sans alignement et sa longueur estime la durée des sections
+SECTION_SCRIPT_KEYS = (
+    ('hook', 'topic_intro', 'learning_points'),
+    ('section1_title', 'section1_point1', 'section1_point2', 'section1_example'),
+    ('section2_title', 'section2_point1', 'section2_point2', 'section2_example'),
+    ('section3_title', 'section3_point1', 'section3_point2', 'section3_example'),
+    ('recap', 'call_to_action', 'engagement_question')
 )
 
 class VideoProducer:
@@ -35,12 +91,79 @@ class VideoProducer:
         os.makedirs(os.path.join(self.assets_dir, 'visual'), exist_ok=True)
         os.makedirs(os.path.join(self.assets_dir, 'intros_outros'), exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
+        
+        # Cache des textes rendus (titres, sous-titres, appels à l'action), partagé entre les vidéos
+        self.text_cache = TextBitmapCache(os.path.join(self.assets_dir, 'cache', 'text'))
+        
+        # Intros et outros déjà encodées, réutilisées par copie de flux
+        self.segment_cache = SegmentCache(os.path.join(self.assets_dir, 'intros_outros'))
+        
+        # Vidéos stock téléchargées une seule fois et préparées à la résolution du rendu
+        self.stock_media = StockMediaLibrary(pexels_api_key, os.path.join(self.assets_dir, 'stock'))
+        
+        # Images et vidéos d'assets/visual, normalisées une fois à la résolution et à la cadence du rendu
+        self.visual_assets = AssetNormalizer(os.path.join(self.assets_dir, 'visual'),
+                                             os.path.join(self.assets_dir, 'cache', 'visual'))
+        
+        # Miniatures YouTube: polices et calques de la marque préparés une fois pour toutes les vidéos
+        self.thumbnails = ThumbnailGenerator({"logo_path": os.path.join(self.assets_dir, BRAND_LOGO)})
+    
+    def prefetch_stock_media(self, script_data, resolution=(1920, 1080), fps=30):
+        """
+        Lance en arrière-plan le téléchargement des vidéos stock de tous les segments
+        
+        À appeler dès que le script est prêt, par exemple avant la synthèse vocale, pour que
+        les vidéos soient disponibles au moment du rendu.
+        
+        Args:
+            script_data (dict): Données du script
+            resolution (tuple, optional): Résolution de la vidéo. Par défaut (1920, 1080)
+            fps (int, optional): Images par seconde. Par défaut 30
+        
+        Returns:
+            dict: Futures par mot-clé, dont le résultat est le chemin de la vidéo préparée
+        """
+        return self.stock_media.prefetch(self._segment_keywords(script_data), resolution, fps)
+    
+    def _segment_keywords(self, script_data):
+        """
+        Args:
+            script_data (dict): Données du script
+        
+        Returns:
+            list: Mot-clé de chacun des cinq segments (introduction, trois sections, conclusion)
+        """
+        return [
+            script_data['title'],
+            script_data['section1_title'],
+            script_data['section2_title'],
+            script_data['section3_title'],
+            "conclusion " + script_data['title']
+        ]
     
     def create_video(self, audio_path, script_data, metadata, visual_style="dynamic", 
-                    resolution=(1920, 1080), fps=30, use_intro_outro=True):
+                    resolution=(1920, 1080), fps=30, use_intro_outro=True, backend="moviepy",
+                    workers=None, instrument=False, render_profile=DEFAULT_RENDER_PROFILE,
+                    resumable=False, chunk_seconds=DEFAULT_CHUNK_SECONDS, subtitle_mode=DEFAULT_SUBTITLE_MODE,
+                    alignment=None, output_formats=None, thumbnail_layout=DEFAULT_LAYOUT,
+                    section_offsets=None, snap_to_pauses=True):
         """
         Crée une vidéo complète à partir d'un fichier audio et des données de script
         
+        La vidéo est d'abord décrite par une chronologie, sauvegardée à côté d'elle (.timeline.json)
+        pour pouvoir rejouer le rendu avec render_timeline. Sauf en mode "overlay", les sous-titres
+        sont aussi exportés à côté d'elle (.srt), pour les publier sur YouTube, de même que sa
+        miniature (.jpg), composée sur une image de la vidéo rendue, et l'index de ses images clés
+        (.keyframes.json et sa planche de vignettes .keyframes.jpg).
+        
+        Avec output_formats, les images sont composées une seule fois à la résolution demandée, puis
+        chaque format (par exemple "landscape" et "shorts") en est dérivé et encodé par le même
+        processus ffmpeg, avec ses propres sous-titres et son propre fichier de métadonnées.
+        
+        Les sections suivent la narration: elles commencent aux positions de section_offsets
+        (synthèse par sections), sinon à une estimation d'après la longueur de leur texte, recalée
+        sur les pauses de la narration.
+        
         Args:
             audio_path (str): Chemin vers le fichier audio
             script_data (dict): Données du script
@@ -49,378 +172,962 @@ class VideoProducer:
             resolution (tuple, optional): Résolution de la vidéo. Par défaut (1920, 1080)
             fps (int, optional): Images par seconde. Par défaut 30
             use_intro_outro (bool, optional): Utiliser intro/outro. Par défaut True
+            backend (str, optional): Moteur de rendu, "moviepy" ou "ffmpeg" (graphe de filtres natif). Par défaut "moviepy"
+            workers (int, optional): Avec le moteur ffmpeg, rend les segments en parallèle dans ce
+                nombre de processus puis les assemble sans réencodage. Par défaut un seul processus
+                (rendu par segments avec intro/outro, afin de les reprendre du cache d'assets/intros_outros)
+            instrument (bool, optional): Mesurer le temps de chaque étape et le coût par image de chaque
+                type de clip, puis écrire un rapport (.profile.json et .profile.folded) à côté de la vidéo. Par défaut False
+            render_profile (str or RenderProfile, optional): Profil d'encodage ("draft", "standard", "archival").
+                Le profil "draft" réduit la résolution. Par défaut "standard"
+            resumable (bool, optional): Rendre la vidéo par tronçons inscrits dans un manifeste
+                (assets/cache/chunks): relancé après une interruption, le rendu n'encode que les
+                tronçons manquants. Par défaut False
+            chunk_seconds (float, optional): Durée des tronçons d'un rendu reprenable. Par défaut 30 secondes
+            subtitle_mode (str, optional): Sous-titres "burn" (incrustés par ffmpeg), "soft" (flux séparé)
+                ou "overlay" (calques de texte composés dans l'image). Par défaut "burn"
+            alignment (AlignmentTrack, optional): Alignement mot à mot de la narration (TTSEngine.get_alignment),
+                qui date les sous-titres. Par défaut les sous-titres sont répartis sur les sections
+            output_formats (list, optional): Formats de sortie (noms ou OutputFormat) produits en un seul
+                passage, sans rendu parallèle, reprenable ni en deux passes. Par défaut une seule vidéo
+            thumbnail_layout (str, optional): Mise en page de la miniature ("bold" ou "centered"),
+                None pour ne pas en générer. Par défaut "bold"
+            section_offsets (list or dict, optional): Début de chaque section dans la narration, dans l'ordre
+                (offsets de TTSEngine.assemble_sections). Par défaut estimé
+            snap_to_pauses (bool, optional): Recaler les débuts estimés sur les pauses de la narration. Par défaut True
             
         Returns:
-            str: Chemin vers la vidéo générée
+            str: Chemin vers la vidéo générée, ou dict des chemins par nom de format avec output_formats
         """
-        print(f"Création d'une vidéo pour le script: {script_data['title']}")
-        print(f"Style visuel: {visual_style}, Résolution: {resolution}, FPS: {fps}")
+        if subtitle_mode not in SUBTITLE_MODES:
+            raise ValueError(f"Mode de sous-titres inconnu: {subtitle_mode}. Valeurs possibles: {', '.join(SUBTITLE_MODES)}")
+        profile = get_render_profile(render_profile)
+        self._check_render_options(backend, workers, profile)
+        if output_formats and (workers or resumable or profile.two_pass):
+            raise ValueError("Les formats multiples sont rendus en un seul passage, "
+                             "sans rendu parallèle, reprenable ni en deux passes")
+        resolution = profile.resolve_resolution(resolution)
         
-        # Charger le fichier audio
-        audio_clip = AudioFileClip(audio_path)
-        audio_duration = audio_clip.duration
+        print(f"Création d'une vidéo pour le script: {script_data['title']}")
+        print(f"Style visuel: {visual_style}, Résolution: {resolution}, FPS: {fps}, Moteur: {backend}, "
+              f"Profil: {profile.name}")
+        
+        profiler = RenderProfiler(enabled=instrument)
+        
+        # Télécharger les vidéos de tous les segments en parallèle (sans effet si déjà lancé)
+        if visual_style == "stock_video":
+            self.prefetch_stock_media(script_data, resolution, fps)
+        
+        # Adapter les nouveaux éléments visuels au cadre du rendu avant de les utiliser
+        if visual_style in ("image_slideshow", "stock_video"):
+            with profiler.stage("asset_normalize"):
+                self.visual_assets.normalize(resolution, fps)
+        
+        if backend == "ffmpeg":
+            # Lire la durée dans l'en-tête, sans décoder l'audio
+            with profiler.stage("audio_probe"):
+                audio_duration = probe_duration(audio_path)
+        else:
+            with profiler.stage("audio_decode"):
+                audio_clip = AudioFileClip(audio_path)
+                audio_duration = audio_clip.duration
+                audio_clip.close()
         
         print(f"Durée audio: {audio_duration} secondes")
         
-        # Obtenir des visuels pour la vidéo
-        visual_clips = self._get_visual_clips(script_data, audio_duration, visual_style, resolution)
+        with profiler.stage("section_timing"):
+            section_starts = self._section_starts(audio_path, audio_duration, script_data, section_offsets,
+                                                  snap_to_pauses)
+        
+        # Décrire la vidéo sans construire de clip: seuls les éléments de la coupe finale seront matérialisés
+        with profiler.stage("plan"):
+            timeline = self._build_timeline(audio_path, audio_duration, script_data, metadata,
+                                            visual_style, resolution, fps, use_intro_outro, subtitle_mode, alignment,
+                                            section_starts)
+        
+        output_path = self._generate_output_path(script_data)
+        outputs = None
+        if output_formats:
+            # Un fichier par format, nommé d'après la vidéo; un format n'agrandit pas la partie de l'image
+            # composée qu'il conserve, et le profil limite aussi sa résolution
+            outputs = []
+            for output_format in output_formats:
+                output_format = get_output_format(output_format)
+                output_format = get_output_format(output_format, resolution=profile.resolve_resolution(
+                    output_format.fit_resolution(timeline.resolution)))
+                outputs.append((output_format, f"{os.path.splitext(output_path)[0]}_{output_format.name}.mp4"))
+        
+        self._render_timeline(timeline, output_path, backend, workers, profiler, profile,
+                              chunk_seconds if resumable else None, outputs)
+        timeline.save(os.path.splitext(output_path)[0] + TIMELINE_SUFFIX)
+        
+        main_path = outputs[0][1] if outputs else output_path
+        with profiler.stage("keyframe_index"):
+            keyframe_indexes = {video_path: self._build_keyframe_index(video_path)
+                                for _, video_path in outputs or [(None, output_path)]}
+        
+        thumbnail_path = None
+        if thumbnail_layout:
+            # Image de fond prise dans la sortie la plus complète (la vidéo entière, au format le plus
+            # large), au milieu de la première section, sur l'image clé qui la précède: une seule image à décoder
+            sources = [(output_format.duration(timeline.duration), output_format.resolution[0] / output_format.resolution[1],
+                        video_path) for output_format, video_path in outputs or []]
+            duration, _, video_path = max(sources or [(timeline.duration, 0, output_path)])
+            with profiler.stage("thumbnail"):
+                thumbnail_path = self._generate_thumbnail(
+                    os.path.splitext(output_path)[0] + THUMBNAIL_SUFFIX,
+                    metadata.get('youtube_title') or script_data['title'], video_path,
+                    self._thumbnail_time(timeline, duration), thumbnail_layout, keyframe_indexes[video_path])
+        
+        for output_format, video_path in outputs or [(None, output_path)]:
+            captions_path = None
+            if timeline.caption_mode:
+                captions = SubtitleTrack(timeline.caption_cues())
+                if output_format:
+                    captions = captions.between(0, output_format.duration(timeline.duration))
+                captions_path = captions.save(os.path.splitext(video_path)[0] + CAPTIONS_SUFFIX)
+            
+            # Sauvegarder les métadonnées de la vidéo
+            keyframe_index = keyframe_indexes[video_path]
+            self._save_video_metadata(video_path, script_data, metadata, audio_path, visual_style, captions_path,
+                                      output_format, thumbnail_path, keyframe_index.path if keyframe_index else None)
+        
+        profiler.save(main_path, {"backend": backend, "resolution": list(resolution), "fps": fps,
+                                  "visual_style": visual_style, "workers": workers,
+                                  "render_profile": profile.to_dict(), "resumable": resumable,
+                                  "subtitle_mode": subtitle_mode,
+                                  "output_formats": [output_format.to_dict() for output_format, _ in outputs or []]})
+        
+        if outputs:
+            return {output_format.name: video_path for output_format, video_path in outputs}
+        return output_path
+    
+    def render_timeline(self, timeline, output_path=None, backend="ffmpeg", workers=None,
+                        render_profile=DEFAULT_RENDER_PROFILE, resumable=False, chunk_seconds=DEFAULT_CHUNK_SECONDS):
+        """
+        Rejoue le rendu d'une chronologie sauvegardée (par exemple sur une autre machine)
         
-        # Créer les clips de texte pour les sous-titres
-        text_clips = self._create_text_clips(script_data, audio_duration, resolution)
+        La résolution et la cadence sont celles de la chronologie; le profil ne fixe que l'encodage.
         
-        # Créer l'intro et l'outro si demandé
-        intro_clip = None
-        outro_clip = None
+        Args:
+            timeline (Timeline or str): Chronologie, ou chemin d'un fichier .timeline.json
+            output_path (str, optional): Chemin de la vidéo. Par défaut à côté de la chronologie
+                (ou dans le répertoire de sortie)
+            backend (str, optional): Moteur de rendu, "moviepy" ou "ffmpeg". Par défaut "ffmpeg"
+            workers (int, optional): Nombre de processus pour le rendu parallèle des segments (ffmpeg)
+            render_profile (str or RenderProfile, optional): Profil d'encodage. Par défaut "standard"
+            resumable (bool, optional): Rendre par tronçons reprenables. Par défaut False
+            chunk_seconds (float, optional): Durée des tronçons. Par défaut 30 secondes
         
-        if use_intro_outro:
-            intro_clip = self._create_intro_clip(script_data['title'], resolution, fps)
-            outro_clip = self._create_outro_clip(metadata, resolution, fps)
-        
-        # Assembler tous les clips
-        video_clips = []
-        
-        if intro_clip:
-            video_clips.append(intro_clip)
-        
-        # Ajouter les clips visuels avec les sous-titres
-        main_clips = []
-        for i, visual_clip in enumerate(visual_clips):
-            # Ajouter les sous-titres correspondants si disponibles
-            if i < len(text_clips):
-                composite = CompositeVideoClip([visual_clip, text_clips[i]])
-                main_clips.append(composite)
-            else:
-                main_clips.append(visual_clip)
+        Returns:
+            str: Chemin vers la vidéo générée
+        """
+        profile = get_render_profile(render_profile)
+        self._check_render_options(backend, workers, profile)
+        
+        if not isinstance(timeline, Timeline):
+            timeline_path = timeline
+            timeline = Timeline.load(timeline_path)
+            if output_path is None and timeline_path.endswith(TIMELINE_SUFFIX):
+                output_path = timeline_path[:-len(TIMELINE_SUFFIX)] + ".mp4"
+        if output_path is None:
+            output_path = os.path.join(self.output_dir, f"timeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4")
+        
+        return self._render_timeline(timeline, output_path, backend, workers, RenderProfiler(enabled=False), profile,
+                                     chunk_seconds if resumable else None)
+    
+    def _check_render_options(self, backend, workers, profile):
+        """
+        Vérifie que les options de rendu sont compatibles avec le moteur
         
-        # Concaténer les clips principaux
-        if main_clips:
-            main_video = concatenate_videoclips(main_clips)
-            
-            # Ajuster la durée pour correspondre à l'audio
-            if main_video.duration > audio_duration:
-                main_video = main_video.subclip(0, audio_duration)
+        Args:
+            backend (str): Moteur de rendu
+            workers (int): Nombre de processus demandé, ou None
+            profile (RenderProfile): Profil d'encodage
+        """
+        if backend not in RENDER_BACKENDS:
+            raise ValueError(f"Moteur de rendu inconnu: {backend}. Valeurs possibles: {', '.join(RENDER_BACKENDS)}")
+        if workers and backend != "ffmpeg":
+            raise ValueError("Le rendu parallèle des segments nécessite le moteur ffmpeg")
+        if profile.two_pass and backend != "ffmpeg":
+            raise ValueError("L'encodage en deux passes nécessite le moteur ffmpeg")
+    
+    def _render_timeline(self, timeline, output_path, backend, workers, profiler, profile, chunk_seconds=None,
+                         outputs=None):
+        """
+        Rend une chronologie avec le moteur choisi
+        
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            output_path (str): Chemin de la vidéo
+            backend (str): Moteur de rendu
+            workers (int): Nombre de processus pour le rendu parallèle des segments, ou None
+            profiler (RenderProfiler): Profileur des étapes du rendu
+            profile (RenderProfile): Profil d'encodage
+            chunk_seconds (float, optional): Durée des tronçons d'un rendu reprenable. Par défaut rendu d'un seul tenant
+            outputs (list, optional): Couples (OutputFormat, chemin) des formats produits en un seul passage,
+                à la place de output_path
+        
+        Returns:
+            str: Chemin vers la vidéo générée
+        """
+        # Les intervalles sans mouvement ni fondu sont composés une seule fois
+        timeline = timeline.split_static()
+        if chunk_seconds:
+            return self._render_timeline_chunked(timeline, output_path, backend, workers, profiler, profile,
+                                                 chunk_seconds)
+        if backend == "ffmpeg":
+            return self._render_timeline_ffmpeg(timeline, output_path, workers, profiler, profile, outputs)
+        return self._render_timeline_moviepy(timeline, output_path, profiler, profile, outputs)
+    
+    def _render_timeline_chunked(self, timeline, output_path, backend, workers, profiler, profile, chunk_seconds):
+        """
+        Rend une chronologie par tronçons reprenables, puis les assemble avec la narration
+        
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            output_path (str): Chemin de la vidéo
+            backend (str): Moteur de rendu des tronçons
+            workers (int): Nombre de tronçons encodés simultanément (ffmpeg), ou None
+            profiler (RenderProfiler): Profileur des étapes du rendu
+            profile (RenderProfile): Profil d'encodage
+            chunk_seconds (float): Durée nominale des tronçons
+        
+        Returns:
+            str: Chemin vers la vidéo générée
+        """
+        renderer = FFmpegRenderer(text_cache=self.text_cache)
+        chunked = ChunkedRenderer(os.path.join(self.assets_dir, 'cache', 'chunks'), chunk_seconds, renderer)
+        
+        print(f"Rendu reprenable de la vidéo vers: {output_path}")
+        with profiler.stage("encode"):
+            if backend == "ffmpeg":
+                return chunked.render(timeline, output_path, profile=profile, workers=workers or 1)
             
-            # Ajouter l'audio
-            main_video = main_video.set_audio(audio_clip)
-            video_clips.append(main_video)
+            # Tronçons composés en Python, mêmes paramètres pour tous afin de les joindre en copie de flux
+            render_chunk = lambda part, path: self._render_timeline_moviepy(part, path, RenderProfiler(enabled=False),
+                                                                            profile)
+            encoder = {"backend": "moviepy",
+                       "video_args": profile.ffmpeg_video_args(timeline.fps, timeline.visual_style, timeline.resolution)}
+            return chunked.render(timeline, output_path, profile=profile, render_chunk=render_chunk, encoder=encoder)
+    
+    def _render_timeline_moviepy(self, timeline, output_path, profiler, profile, outputs=None):
+        """
+        Compose la chronologie image par image et transmet les images à un unique processus ffmpeg
         
-        if outro_clip:
-            video_clips.append(outro_clip)
+        Les sections de couleurs, textes et images sont composées par l'animateur NumPy dans des
+        tampons préalloués; seules les sections avec vidéo passent par un clip composite MoviePy.
+        La narration est ajoutée par le même processus ffmpeg, qui dérive aussi les autres formats.
         
-        # Concaténer tous les clips
-        final_video = concatenate_videoclips(video_clips) if len(video_clips) > 1 else video_clips[0]
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            output_path (str): Chemin de la vidéo
+            profiler (RenderProfiler): Profileur des étapes du rendu
+            profile (RenderProfile): Profil d'encodage
+            outputs (list, optional): Couples (OutputFormat, chemin) des formats à produire
         
-        # Générer un nom de fichier
-        title_slug = script_data['title'].lower().replace(' ', '_')[:30]
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_filename = f"{title_slug}_{timestamp}.mp4"
-        output_path = os.path.join(self.output_dir, output_filename)
+        Returns:
+            str: Chemin vers la vidéo générée
+        """
+        compositor = TimelineCompositor(self.text_cache,
+                                        lambda timeline, index: self._section_clip(timeline, index, profiler))
         
-        # Écrire la vidéo sur le disque
         print(f"Rendu de la vidéo finale vers: {output_path}")
-        final_video.write_videofile(output_path, fps=fps, codec='libx264', audio_codec='aac')
-        
-        # Sauvegarder les métadonnées de la vidéo
-        self._save_video_metadata(output_path, script_data, metadata, audio_path, visual_style)
+        with profiler.stage("encode"):
+            compositor.render(timeline, output_path, profile, profiler, outputs)
         
         return output_path
     
-    def _get_visual_clips(self, script_data, audio_duration, visual_style, resolution):
+    def _section_clip(self, timeline, index, profiler):
         """
-        Obtient des clips visuels pour la vidéo
+        Matérialise une section de la chronologie en clip composite MoviePy
         
         Args:
-            script_data (dict): Données du script
-            audio_duration (float): Durée de l'audio en secondes
-            visual_style (str): Style visuel
+            timeline (Timeline): Chronologie de la vidéo
+            index (int): Indice de la section
+            profiler (RenderProfiler): Profileur du coût des images par type de clip
+        
+        Returns:
+            CompositeVideoClip: Clip de la section, aux temps locaux
+        """
+        section = timeline.sections[index]
+        clips = []
+        for track_name, item in timeline.section_items(index):
+            clip = self._materialize_item(item, section["start"], timeline.resolution)
+            clip_type = "text" if track_name == SUBTITLE_TRACK else f"visual:{timeline.visual_style}"
+            clips.append(profiler.wrap_clip(clip, clip_type))
+        return CompositeVideoClip(clips, size=timeline.resolution).set_duration(section["duration"])
+    
+    def _materialize_item(self, item, origin, resolution):
+        """
+        Crée le clip MoviePy d'un élément de la chronologie
+        
+        Args:
+            item (TimelineItem): Élément visuel
+            origin (float): Début de la section, auquel le départ du clip est rapporté
             resolution (tuple): Résolution de la vidéo
-            
+        
         Returns:
-            list: Liste de clips visuels
-        """
-        # Déterminer le nombre de segments visuels
-        num_segments = 5  # Introduction + 3 sections + conclusion
-        segment_duration = audio_duration / num_segments
-        
-        # Obtenir des mots-clés pour chaque segment
-        keywords = [
-            script_data['title'],  # Introduction
-            script_data['section1_title'],  # Section 1
-            script_data['section2_title'],  # Section 2
-            script_data['section3_title'],  # Section 3
-            "conclusion " + script_data['title']  # Conclusion
-        ]
+            VideoClip: Clip positionné, daté et avec ses effets
+        """
+        fields = item.fields
+        offset = fields.get("offset", 0)
+        
+        if item.kind == "color":
+            clip = ColorClip(resolution, color=tuple(fields["color"]), duration=item.duration)
+        elif item.kind == "text":
+            clip = self._text_clip(fields["text"], fields["style"])
+        elif item.kind == "image":
+            clip = ImageClip(fields["path"])
+        elif item.kind == "video":
+            # Vidéo déjà préparée au format du rendu: bouclée si elle est trop courte, sans mise à l'échelle
+            clip = VideoFileClip(fields["path"], audio=False)
+            if clip.duration < offset + item.duration:
+                clip = clip.fx(vfx.loop, duration=offset + item.duration)
+            clip = clip.subclip(offset, offset + item.duration)
+        else:
+            raise ValueError(f"Type d'élément non pris en charge par le rendu MoviePy: {item.kind}")
+        
+        clip = clip.set_start(item.start - origin).set_duration(item.duration)
+        
+        x, y = fields.get("position", ["center", "center"])
+        motion = fields.get("motion")
+        if motion and motion["type"] == "bounce":
+            period = motion["period"]
+            clip = clip.set_position(lambda t: (x, motion["base_y"] + motion["amplitude"]
+                                                * ((t + offset) % period - period / 2) ** 2))
+        else:
+            clip = clip.set_position((x, y))
+        
+        for effect in fields.get("effects") or []:
+            if effect["name"] == "fadein":
+                clip = clip.fx(vfx.fadein, effect["duration"])
+            elif effect["name"] == "fadeout":
+                clip = clip.fx(vfx.fadeout, effect["duration"])
+            elif effect["name"] == "crossfadein":
+                clip = clip.crossfadein(effect["duration"])
+            elif effect["name"] == "crossfadeout":
+                clip = clip.crossfadeout(effect["duration"])
+        
+        return clip
+    
+    def create_preview(self, script_data, metadata, audio_path=None, audio_duration=None, visual_style="dynamic",
+                       mode="proxy", use_intro_outro=True, resolution=PREVIEW_RESOLUTION, fps=PREVIEW_FPS,
+                       frames_per_segment=3, section_offsets=None, snap_to_pauses=True):
+        """
+        Crée un aperçu rapide de la vidéo à partir du même plan de rendu que la version finale
         
-        # Obtenir des clips visuels pour chaque segment
-        visual_clips = []
+        Args:
+            script_data (dict): Données du script
+            metadata (dict): Métadonnées de la vidéo
+            audio_path (str, optional): Chemin vers le fichier audio. Sans audio, l'aperçu est muet
+            audio_duration (float, optional): Durée de la narration, lue dans le fichier audio si absente
+            visual_style (str, optional): Style visuel. Par défaut "dynamic"
+            mode (str, optional): "proxy" (vidéo 360p à faible cadence) ou "storyboard" (planche d'images).
+                Par défaut "proxy"
+            use_intro_outro (bool, optional): Utiliser intro/outro. Par défaut True
+            resolution (tuple, optional): Résolution de l'aperçu. Par défaut (640, 360)
+            fps (int, optional): Images par seconde du proxy. Par défaut 12
+            frames_per_segment (int, optional): Images par segment dans la planche. Par défaut 3
+            section_offsets (list or dict, optional): Début de chaque section dans la narration. Par défaut estimé
+            snap_to_pauses (bool, optional): Recaler les débuts estimés sur les pauses de la narration. Par défaut True
         
-        for i, keyword in enumerate(keywords):
-            # Durée du segment
-            start_time = i * segment_duration
-            end_time = (i + 1) * segment_duration
-            duration = end_time - start_time
+        Returns:
+            str: Chemin de l'aperçu (vidéo MP4 ou image PNG)
+        """
+        if mode not in PREVIEW_MODES:
+            raise ValueError(f"Mode d'aperçu inconnu: {mode}. Valeurs possibles: {', '.join(PREVIEW_MODES)}")
+        if audio_duration is None:
+            if audio_path is None:
+                raise ValueError("La durée de la narration est nécessaire sans fichier audio")
+            audio_duration = probe_duration(audio_path)
+        
+        preview_dir = os.path.join(self.output_dir, 'previews')
+        os.makedirs(preview_dir, exist_ok=True)
+        base_path = os.path.join(preview_dir, os.path.splitext(os.path.basename(self._generate_output_path(script_data)))[0])
+        
+        plan_fps = fps if mode == "proxy" else STORYBOARD_FPS
+        section_starts = self._section_starts(audio_path, audio_duration, script_data, section_offsets, snap_to_pauses)
+        plan = self._build_render_plan(audio_path, audio_duration, script_data, metadata,
+                                       visual_style, resolution, plan_fps, use_intro_outro, section_starts)
+        
+        renderer = FFmpegRenderer(text_cache=self.text_cache)
+        profile = get_render_profile("draft")
+        
+        if mode == "proxy":
+            preview_path = base_path + "_preview.mp4"
+            print(f"Rendu de l'aperçu proxy vers: {preview_path}")
+            return renderer.render(plan, preview_path, profile=profile)
+        
+        preview_path = base_path + "_storyboard.png"
+        print(f"Création de la planche d'aperçu: {preview_path}")
+        work_dir = tempfile.mkdtemp(prefix='storyboard_', dir=renderer.work_dir)
+        try:
+            proxy_path = renderer.render(plan, os.path.join(work_dir, "storyboard.mp4"), profile=profile,
+                                         include_audio=False)
+            
+            # Instants échantillonnés régulièrement dans chaque segment
+            samples = []
+            for segment, start in zip(plan["segments"], renderer.segment_starts(plan)):
+                for k in range(frames_per_segment):
+                    t = start + segment["duration"] * (k + 0.5) / frames_per_segment
+                    samples.append((segment["name"], t, int(t * plan_fps)))
             
-            # Obtenir un clip visuel pour ce segment
-            if visual_style == "stock_video":
-                clip = self._get_stock_video_clip(keyword, duration, resolution)
-            elif visual_style == "image_slideshow":
-                clip = self._create_image_slideshow(keyword, duration, resolution)
-            else:  # "dynamic" ou autre
-                clip = self._create_dynamic_background(keyword, duration, resolution)
+            # Extraire toutes les images en une seule lecture du proxy: chaque image n'est écrite qu'une
+            # fois (des segments courts peuvent en partager), dans l'ordre de la vidéo
+            frames = sorted({frame for _, _, frame in samples})
+            selection = "+".join(f"eq(n,{frame})" for frame in frames)
+            run_ffmpeg(["-i", proxy_path, "-vf", f"select='{selection}',setpts=N/TB", "-r", "1",
+                        os.path.join(work_dir, "frame_%04d.png")], description="extraction des images de l'aperçu")
             
-            visual_clips.append(clip)
+            frame_files = {frame: os.path.join(work_dir, f"frame_{i + 1:04d}.png") for i, frame in enumerate(frames)}
+            frame_paths = [frame_files[frame] for _, _, frame in samples]
+            self._compose_storyboard(frame_paths, samples, frames_per_segment, preview_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
         
-        return visual_clips
+        return preview_path
     
-    def _get_stock_video_clip(self, keyword, duration, resolution):
+    def _compose_storyboard(self, frame_paths, samples, columns, output_path):
+        """
+        Assemble les images extraites en une planche, une ligne par segment
+        
+        Args:
+            frame_paths (list): Chemins des images extraites, dans l'ordre des échantillons
+            samples (list): Échantillons (nom du segment, instant, numéro d'image)
+            columns (int): Nombre d'images par ligne
+            output_path (str): Chemin de la planche PNG
         """
-        Obtient un clip vidéo stock via l'API Pexels
+        label_style = {"font": "Arial", "fontsize": 14, "color": "white", "bg_color": "rgba(0,0,0,0.6)",
+                       "method": "label", "width": None, "align": "left"}
+        sheet = None
+        
+        for index, ((name, t, _), frame_path) in enumerate(zip(samples, frame_paths)):
+            if not os.path.exists(frame_path):
+                continue
+            with Image.open(frame_path) as frame:
+                height = int(frame.height * STORYBOARD_THUMBNAIL_WIDTH / frame.width)
+                thumbnail = frame.convert("RGB").resize((STORYBOARD_THUMBNAIL_WIDTH, height))
+            
+            if sheet is None:
+                rows = (len(samples) + columns - 1) // columns
+                sheet = Image.new("RGB", (columns * STORYBOARD_THUMBNAIL_WIDTH, rows * height), (0, 0, 0))
+            
+            label = render_text_image(f"{name} - {t:.1f}s", **label_style)
+            thumbnail.paste(label, (0, 0), label)
+            sheet.paste(thumbnail, ((index % columns) * STORYBOARD_THUMBNAIL_WIDTH, (index // columns) * height))
         
-        Dans une implémentation réelle, cette méthode ferait appel à l'API Pexels.
-        Pour cette démonstration, nous simulons l'obtention de vidéos stock.
+        if sheet is None:
+            raise RuntimeError("Aucune image n'a pu être extraite pour la planche d'aperçu")
+        sheet.save(output_path)
+    
+    def _generate_output_path(self, script_data):
+        """
+        Génère le chemin de la vidéo de sortie à partir du titre
         
         Args:
-            keyword (str): Mot-clé pour la recherche
-            duration (float): Durée souhaitée en secondes
-            resolution (tuple): Résolution souhaitée
+            script_data (dict): Données du script
             
         Returns:
-            VideoClip: Clip vidéo
+            str: Chemin de la vidéo à générer
         """
-        print(f"Recherche de vidéo stock pour le mot-clé: {keyword}")
-        
-        # Simuler un délai de recherche
-        time.sleep(0.5)
-        
-        # Dans une implémentation réelle, nous ferions appel à l'API Pexels comme ceci:
-        # if self.pexels_api_key:
-        #     headers = {"Authorization": self.pexels_api_key}
-        #     response = requests.get(
-        #         f"https://api.pexels.com/videos/search?query={keyword}&per_page=1",
-        #         headers=headers
-        #     )
-        #     data = response.json()
-        #     if "videos" in data and data["videos"]:
-        #         video_url = data["videos"][0]["video_files"][0]["link"]
-        #         temp_path = os.path.join(self.assets_dir, "temp_video.mp4")
-        #         urllib.request.urlretrieve(video_url, temp_path)
-        #         clip = VideoFileClip(temp_path)
-        #         return clip.resize(resolution).subclip(0, min(duration, clip.duration))
+        title_slug = script_data['title'].lower().replace(' ', '_')[:30]
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_filename = f"{title_slug}_{timestamp}.mp4"
+        return os.path.join(self.output_dir, output_filename)
+    
+    def _render_timeline_ffmpeg(self, timeline, output_path, workers=None, profiler=None, profile=None, outputs=None):
+        """
+        Rend la chronologie en compilant son plan de rendu en un graphe de filtres ffmpeg
         
-        # Pour la démonstration, nous créons un clip coloré
-        color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        clip = ColorClip(resolution, color=color, duration=duration)
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            output_path (str): Chemin de la vidéo
+            workers (int, optional): Nombre de processus pour le rendu parallèle des segments
+            profiler (RenderProfiler, optional): Profileur des étapes du rendu
+            profile (RenderProfile, optional): Profil d'encodage. Par défaut le profil standard
+            outputs (list, optional): Couples (OutputFormat, chemin) des formats à produire en un seul passage
         
-        # Ajouter un texte indiquant qu'il s'agit d'une vidéo stock
-        text = TextClip(f"Stock Video: {keyword}", fontsize=30, color='white', font='Arial')
-        text = text.set_position('center').set_duration(duration)
+        Returns:
+            str: Chemin vers la vidéo générée
+        """
+        profiler = profiler or RenderProfiler(enabled=False)
+        profile = profile or get_render_profile()
+        plan = timeline.to_render_plan()
+        
+        # Rendre les textes avant l'encodage pour que leur coût apparaisse séparément
+        with profiler.stage("text_clips"):
+            for segment in plan["segments"]:
+                for layer in segment["layers"]:
+                    if layer["type"] == "text":
+                        self.text_cache.get_path(layer["text"], layer["style"])
+        
+        print(f"Rendu de la vidéo finale (ffmpeg) vers: {output_path}")
+        renderer = FFmpegRenderer(text_cache=self.text_cache, segment_cache=self.segment_cache)
+        with profiler.stage("encode"):
+            if outputs:
+                # Tous les formats dérivés des mêmes images composées, sans passer par les segments en cache
+                renderer.render_formats(plan, outputs, profile=profile)
+            elif workers or any(segment.get("cache") for segment in plan["segments"]):
+                # Le rendu par segments permet de reprendre l'intro et l'outro du cache sans les réencoder
+                renderer.render_parallel(plan, output_path, workers=workers or 1, profile=profile)
+            else:
+                renderer.render(plan, output_path, profile=profile)
         
-        return CompositeVideoClip([clip, text])
+        return output_path
     
-    def _create_image_slideshow(self, keyword, duration, resolution):
+    def _text_style(self, fontsize, color='white', bg_color=None, method='label', width=None):
         """
-        Crée un diaporama d'images
+        Construit le style d'un texte, commun au plan de rendu et aux clips MoviePy
         
         Args:
-            keyword (str): Mot-clé pour la recherche
-            duration (float): Durée souhaitée en secondes
-            resolution (tuple): Résolution souhaitée
+            fontsize (int): Taille de la police
+            color (str, optional): Couleur du texte. Par défaut "white"
+            bg_color (str, optional): Couleur de fond. Par défaut None (transparent)
+            method (str, optional): "label" ou "caption". Par défaut "label"
+            width (int, optional): Largeur du bloc pour la méthode "caption"
             
         Returns:
-            VideoClip: Clip vidéo de diaporama
+            dict: Style du texte
         """
-        print(f"Création d'un diaporama pour le mot-clé: {keyword}")
-        
-        # Nombre d'images dans le diaporama
-        num_images = max(3, int(duration / 3))  # Au moins 3 images, changement toutes les 3 secondes
+        return {
+            "font": "Arial",
+            "fontsize": fontsize,
+            "color": color,
+            "bg_color": bg_color,
+            "method": method,
+            "width": width,
+            "align": "center"
+        }
+    
+    def _text_clip(self, text, style):
+        """
+        Crée un clip de texte à partir du cache d'images, à la place d'un TextClip
         
-        # Créer des clips d'image colorés pour la démonstration
-        image_clips = []
-        for i in range(num_images):
-            color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-            img_duration = duration / num_images
-            
-            # Créer un clip coloré
-            clip = ColorClip(resolution, color=color, duration=img_duration)
-            
-            # Ajouter un texte
-            text = TextClip(f"Image {i+1}: {keyword}", fontsize=30, color='white', font='Arial')
-            text = text.set_position('center').set_duration(img_duration)
-            
-            # Combiner image et texte
-            composite = CompositeVideoClip([clip, text])
-            
-            # Ajouter des effets de transition
-            if i > 0:
-                composite = composite.fx(vfx.fadein, 0.5)
-            if i < num_images - 1:
-                composite = composite.fx(vfx.fadeout, 0.5)
-            
-            image_clips.append(composite)
+        Args:
+            text (str): Texte à afficher
+            style (dict): Style du texte (voir _text_style)
         
-        # Concaténer les clips d'image
-        return concatenate_videoclips(image_clips)
+        Returns:
+            ImageClip: Clip du texte avec son masque de transparence
+        """
+        return self.text_cache.get_clip(text, style)
     
-    def _create_dynamic_background(self, keyword, duration, resolution):
+    def _build_render_plan(self, audio_path, audio_duration, script_data, metadata, visual_style,
+                           resolution, fps, use_intro_outro, section_starts=None):
         """
-        Crée un arrière-plan dynamique
+        Décrit la vidéo sous forme de plan de rendu indépendant de MoviePy
+        
+        Les sous-titres y restent des calques de texte (mode "overlay") : le plan
+        ne porte pas de piste de légendes.
         
         Args:
-            keyword (str): Mot-clé pour le contenu
-            duration (float): Durée souhaitée en secondes
-            resolution (tuple): Résolution souhaitée
+            audio_path (str): Chemin vers le fichier audio
+            audio_duration (float): Durée de l'audio en secondes
+            script_data (dict): Données du script
+            metadata (dict): Métadonnées de la vidéo
+            visual_style (str): Style visuel
+            resolution (tuple): Résolution de la vidéo
+            fps (int): Images par seconde
+            use_intro_outro (bool): Utiliser intro/outro
+            section_starts (list, optional): Début de chaque section dans la narration
             
         Returns:
-            VideoClip: Clip vidéo avec arrière-plan dynamique
+            dict: Plan de rendu (resolution, fps, segments, audio)
         """
-        print(f"Création d'un arrière-plan dynamique pour: {keyword}")
-        
-        # Créer un clip de couleur de base
-        base_color = (40, 40, 40)  # Gris foncé
-        clip = ColorClip(resolution, color=base_color, duration=duration)
+        return self._build_timeline(audio_path, audio_duration, script_data, metadata, visual_style,
+                                    resolution, fps, use_intro_outro, subtitle_mode="overlay", section_starts=section_starts).to_render_plan()
+    
+    def _section_texts(self, script_data):
+        """
+        Args:
+            script_data (dict): Données du script
         
-        # Créer un titre animé
-        title = TextClip(keyword, fontsize=60, color='white', font='Arial', bg_color='transparent')
-        title = title.set_position('center').set_duration(duration)
-        title = title.crossfadein(0.5).crossfadeout(0.5)
+        Returns:
+            list: Texte lu dans chacune des cinq sections de la narration
+        """
+        return [" ".join(str(script_data[key]) for key in keys if script_data.get(key)) for keys in SECTION_SCRIPT_KEYS]
+    
+    def _section_starts(self, audio_path, audio_duration, script_data, section_offsets=None, snap_to_pauses=False):
+        """
+        Calcule le début de chaque section dans la narration
         
-        # Ajouter un effet de mouvement au titre
-        title = title.set_position(lambda t: ('center', 400 + 50 * (t % 5 - 2.5)**2))
+        Args:
+            audio_path (str): Chemin vers le fichier audio (None pour un aperçu muet)
+            audio_duration (float): Durée de l'audio en secondes
+            script_data (dict): Données du script
+            section_offsets (list or dict, optional): Débuts exacts des sections, dans l'ordre
+            snap_to_pauses (bool, optional): Recaler les débuts estimés sur les pauses détectées. Par défaut False
         
-        # Combiner les clips
-        return CompositeVideoClip([clip, title])
+        Returns:
+            list: Début de chaque section en secondes, le premier à 0
+        """
+        weights = [len(text) for text in self._section_texts(script_data)]
+        if section_offsets is not None:
+            if isinstance(section_offsets, dict):
+                section_offsets = list(section_offsets.values())
+            return plan_section_starts(audio_duration, weights, offsets=section_offsets)
+        
+        pauses = None
+        if snap_to_pauses and audio_path:
+            try:
+                pauses = detect_pauses(audio_path)
+            except RuntimeError as e:
+                # Sans pauses, les sections gardent leur durée estimée
+                print(f"Erreur lors de la détection des pauses: {e}")
+        return plan_section_starts(audio_duration, weights, pauses=pauses)
     
-    def _create_text_clips(self, script_data, audio_duration, resolution):
+    def _build_timeline(self, audio_path, audio_duration, script_data, metadata, visual_style,
+                        resolution, fps, use_intro_outro, subtitle_mode=DEFAULT_SUBTITLE_MODE, alignment=None,
+                        section_starts=None):
         """
-        Crée des clips de texte pour les sous-titres
+        Décrit la vidéo sous forme de chronologie, sans construire de clip
+        
+        La chronologie comprend l'intro, cinq sections avec leurs sous-titres, puis l'outro,
+        et la narration placée après l'intro. Les sous-titres sont des calques de texte en
+        mode "overlay", sinon des éléments de la piste des sous-titres rendue par ffmpeg, datés par
+        l'alignement de la narration ou, à défaut, tirés du texte lu dans chaque section.
+        Chaque section dure jusqu'au début de la suivante dans la narration (section_starts),
+        à défaut la narration est répartie également.
         
         Args:
-            script_data (dict): Données du script
+            audio_path (str): Chemin vers le fichier audio
             audio_duration (float): Durée de l'audio en secondes
+            script_data (dict): Données du script
+            metadata (dict): Métadonnées de la vidéo
+            visual_style (str): Style visuel
             resolution (tuple): Résolution de la vidéo
-            
+            fps (int): Images par seconde
+            use_intro_outro (bool): Utiliser intro/outro
+            subtitle_mode (str, optional): "burn", "soft" ou "overlay". Par défaut "burn"
+            alignment (AlignmentTrack, optional): Alignement mot à mot de la narration
+            section_starts (list, optional): Début de chaque section dans la narration (_section_starts)
+        
         Returns:
-            list: Liste de clips de texte
+            Timeline: Chronologie de la vidéo
         """
-        # Extraire les sections principales du script
-        sections = [
+        timeline = Timeline(resolution, fps, visual_style, None if subtitle_mode == "overlay" else subtitle_mode)
+        visual_track = timeline.track(VISUAL_TRACK)
+        subtitle_track = timeline.track(SUBTITLE_TRACK)
+        
+        if use_intro_outro:
+            self._add_segment(timeline, self._plan_intro(script_data['title'], resolution))
+        
+        narration_start = timeline.duration
+        
+        keywords = self._segment_keywords(script_data)
+        subtitles = [
             script_data['topic_intro'],
             script_data['section1_point1'] + " " + script_data['section1_point2'],
             script_data['section2_point1'] + " " + script_data['section2_point2'],
             script_data['section3_point1'] + " " + script_data['section3_point2'],
             script_data['recap']
         ]
+        if section_starts is None:
+            section_starts = [audio_duration * i / len(keywords) for i in range(len(keywords))]
+        section_durations = [end - start for start, end in zip(section_starts, list(section_starts[1:]) + [audio_duration])]
+        
+        script_blocks = []
+        section_texts = self._section_texts(script_data)
+        for i, (keyword, subtitle, segment_duration) in enumerate(zip(keywords, subtitles, section_durations)):
+            start = timeline.add_section(f"section_{i}", segment_duration)
+            for layer in self._plan_visual_layers(keyword, segment_duration, visual_style, resolution, fps):
+                visual_track.items.append(TimelineItem.from_dict(layer, start))
+            if subtitle_mode == "overlay":
+                subtitle_track.items.append(TimelineItem.from_dict(
+                    self._plan_subtitle_layer(subtitle, segment_duration, resolution), start))
+            script_blocks.append((section_texts[i], start, start + segment_duration))
         
-        # Durée par section
-        section_duration = audio_duration / len(sections)
+        if use_intro_outro:
+            self._add_segment(timeline, self._plan_outro(metadata, resolution))
         
-        # Créer un clip de texte pour chaque section
-        text_clips = []
-        for i, section_text in enumerate(sections):
-            # Limiter la longueur du texte
-            if len(section_text) > 100:
-                section_text = section_text[:97] + "..."
-            
-            # Créer le clip de texte
-            text = TextClip(section_text, fontsize=30, color='white', font='Arial', 
-                           bg_color='rgba(0,0,0,0.5)', method='caption', align='center', 
-                           size=(resolution[0] - 100, None))
-            
-            # Positionner en bas de l'écran
-            text = text.set_position(('center', resolution[1] - 150))
-            
-            # Définir la durée et le timing
-            start_time = i * section_duration
-            text = text.set_start(start_time).set_duration(section_duration)
-            
-            # Ajouter des effets de fondu
-            text = text.crossfadein(0.5).crossfadeout(0.5)
-            
-            text_clips.append(text)
+        if audio_path:
+            timeline.track(NARRATION_TRACK).add("audio", narration_start, audio_duration, path=audio_path)
+        
+        if timeline.caption_mode:
+            # Les horodatages de l'alignement sont ceux de la narration, qui commence après l'intro
+            if alignment is not None:
+                captions = SubtitleTrack.from_alignment(alignment, narration_start)
+            else:
+                captions = SubtitleTrack.from_script(script_blocks)
+            caption_track = timeline.track(CAPTION_TRACK)
+            for cue in captions.cues:
+                caption_track.add("caption", cue["start"], cue["end"] - cue["start"], text=cue["text"])
         
-        return text_clips
+        return timeline
     
-    def _create_intro_clip(self, title, resolution, fps, duration=5):
+    def _add_segment(self, timeline, segment):
         """
-        Crée un clip d'introduction
+        Ajoute un segment décrit par ses calques (intro, outro) comme section de la chronologie
         
         Args:
-            title (str): Titre de la vidéo
+            timeline (Timeline): Chronologie à compléter
+            segment (dict): Segment (name, duration, cache, layers aux temps locaux)
+        """
+        start = timeline.add_section(segment["name"], segment["duration"], segment.get("cache", False))
+        for layer in segment["layers"]:
+            timeline.track(VISUAL_TRACK).items.append(TimelineItem.from_dict(layer, start))
+    
+    def _plan_visual_layers(self, keyword, duration, visual_style, resolution, fps=30):
+        """
+        Décrit les calques visuels d'un segment selon le style
+        
+        Args:
+            keyword (str): Mot-clé du segment
+            duration (float): Durée du segment en secondes
+            visual_style (str): Style visuel
             resolution (tuple): Résolution de la vidéo
-            fps (int): Images par seconde
-            duration (float, optional): Durée de l'intro en secondes. Par défaut 5
+            fps (int, optional): Images par seconde. Par défaut 30
             
         Returns:
-            VideoClip: Clip d'introduction
+            list: Calques du segment
         """
-        print(f"Création d'une intro pour: {title}")
+        if visual_style == "image_slideshow":
+            layers = []
+            num_images = max(3, int(duration / 3))
+            img_duration = duration / num_images
+            for i in range(num_images):
+                effects = []
+                if i > 0:
+                    effects.append({"name": "fadein", "duration": 0.5})
+                if i < num_images - 1:
+                    effects.append({"name": "fadeout", "duration": 0.5})
+                image_path = self._local_visual("image", keyword, i, resolution, fps)
+                if image_path:
+                    layers.append({"type": "image", "path": image_path, "position": [0, 0],
+                                   "start": i * img_duration, "duration": img_duration, "effects": effects})
+                    continue
+                
+                color = self._placeholder_color(keyword, i)
+                layers.append({"type": "color", "color": color, "start": i * img_duration,
+                               "duration": img_duration, "effects": effects})
+                layers.append({"type": "text", "text": f"Image {i+1}: {keyword}", "style": self._text_style(30),
+                               "position": ["center", "center"], "start": i * img_duration,
+                               "duration": img_duration, "effects": effects})
+            return layers
+        
+        if visual_style == "stock_video":
+            stock_path = self._stock_video_path(keyword, resolution, fps)
+            if stock_path:
+                return [{"type": "video", "path": stock_path, "start": 0, "duration": duration}]
+            
+            color = self._placeholder_color(keyword)
+            return [
+                {"type": "color", "color": color, "start": 0, "duration": duration},
+                {"type": "text", "text": f"Stock Video: {keyword}", "style": self._text_style(30),
+                 "position": ["center", "center"], "start": 0, "duration": duration}
+            ]
+        
+        # "dynamic" ou autre
+        return [
+            {"type": "color", "color": [40, 40, 40], "start": 0, "duration": duration},
+            {"type": "text", "text": keyword, "style": self._text_style(60),
+             "position": ["center", 400], "start": 0, "duration": duration,
+             "effects": [{"name": "crossfadein", "duration": 0.5}, {"name": "crossfadeout", "duration": 0.5}],
+             "motion": {"type": "bounce", "base_y": 400, "amplitude": 50, "period": 5}}
+        ]
+    
+    def _placeholder_color(self, keyword, index=0):
+        """
+        Choisit la couleur de fond d'un visuel de remplacement
         
-        # Créer un arrière-plan
-        background = ColorClip(resolution, color=(20, 20, 20), duration=duration)
+        La couleur est aléatoire mais fixée par le mot-clé, pour que la chronologie d'un même
+        script soit identique d'un rendu à l'autre (reprise d'un rendu par tronçons).
         
-        # Créer le texte du titre
-        title_clip = TextClip(title, fontsize=70, color='white', font='Arial', 
-                             bg_color=None, method='caption', align='center', 
-                             size=(resolution[0] - 200, None))
-        title_clip = title_clip.set_position('center').set_duration(duration)
+        Args:
+            keyword (str): Mot-clé du segment
+            index (int, optional): Rang du visuel dans le segment. Par défaut 0
         
-        # Animer le titre
-        title_clip = title_clip.set_start(1)  # Commencer après 1 seconde
-        title_clip = title_clip.crossfadein(1)
+        Returns:
+            list: Couleur [r, g, b]
+        """
+        rng = random.Random(f"{keyword}:{index}")
+        return [rng.randint(0, 255) for _ in range(3)]
+    
+    def _plan_subtitle_layer(self, text, duration, resolution):
+        """
+        Décrit le calque de sous-titre d'un segment
         
-        # Créer un sous-titre
-        subtitle = TextClip("Une vidéo AutoTubeCPM", fontsize=30, color='lightgrey', 
-                           font='Arial', method='caption')
-        subtitle = subtitle.set_position(('center', resolution[1] // 2 + 100))
-        subtitle = subtitle.set_start(2).set_duration(duration - 2)  # Commencer après 2 secondes
-        subtitle = subtitle.crossfadein(0.5)
+        Args:
+            text (str): Texte du sous-titre
+            duration (float): Durée du segment en secondes
+            resolution (tuple): Résolution de la vidéo
+            
+        Returns:
+            dict: Calque de texte
+        """
+        if len(text) > 100:
+            text = text[:97] + "..."
+        
+        return {
+            "type": "text",
+            "text": text,
+            "style": self._text_style(30, bg_color='rgba(0,0,0,0.5)', method='caption', width=resolution[0] - 100),
+            "position": ["center", resolution[1] - 150],
+            "start": 0,
+            "duration": duration,
+            "effects": [{"name": "crossfadein", "duration": 0.5}, {"name": "crossfadeout", "duration": 0.5}]
+        }
+    
+    def _plan_intro(self, title, resolution, duration=5):
+        """
+        Décrit le segment d'introduction
         
-        # Combiner les clips
-        return CompositeVideoClip([background, title_clip, subtitle])
+        Args:
+            title (str): Titre de la vidéo
+            resolution (tuple): Résolution de la vidéo
+            duration (float, optional): Durée de l'intro en secondes. Par défaut 5
+            
+        Returns:
+            dict: Segment d'introduction
+        """
+        return {
+            "name": "intro",
+            "duration": duration,
+            "cache": True,
+            "layers": [
+                {"type": "color", "color": [20, 20, 20], "start": 0, "duration": duration},
+                {"type": "text", "text": title,
+                 "style": self._text_style(70, method='caption', width=resolution[0] - 200),
+                 "position": ["center", "center"], "start": 1, "duration": duration - 1,
+                 "effects": [{"name": "crossfadein", "duration": 1}]},
+                {"type": "text", "text": "Une vidéo AutoTubeCPM", "style": self._text_style(30, color='lightgrey'),
+                 "position": ["center", resolution[1] // 2 + 100], "start": 2, "duration": duration - 2,
+                 "effects": [{"name": "crossfadein", "duration": 0.5}]}
+            ]
+        }
     
-    def _create_outro_clip(self, metadata, resolution, fps, duration=8):
+    def _plan_outro(self, metadata, resolution, duration=8):
         """
-        Crée un clip de conclusion
+        Décrit le segment de conclusion
         
         Args:
             metadata (dict): Métadonnées de la vidéo
             resolution (tuple): Résolution de la vidéo
-            fps (int): Images par seconde
             duration (float, optional): Durée de l'outro en secondes. Par défaut 8
             
         Returns:
-            VideoClip: Clip de conclusion
+            dict: Segment de conclusion
+        """
+        return {
+            "name": "outro",
+            "duration": duration,
+            "cache": True,
+            "layers": [
+                {"type": "color", "color": [20, 20, 20], "start": 0, "duration": duration},
+                {"type": "text", "text": "Merci d'avoir regardé !", "style": self._text_style(60),
+                 "position": ["center", resolution[1] // 2 - 100], "start": 0, "duration": duration,
+                 "effects": [{"name": "crossfadein", "duration": 0.5}]},
+                {"type": "text", "text": "N'oubliez pas de vous abonner et de laisser un commentaire",
+                 "style": self._text_style(30, color='lightgrey'),
+                 "position": ["center", resolution[1] // 2], "start": 1, "duration": duration - 1,
+                 "effects": [{"name": "crossfadein", "duration": 0.5}]},
+                {"type": "text", "text": "Retrouvez-nous sur les réseaux sociaux",
+                 "style": self._text_style(25, color='lightblue'),
+                 "position": ["center", resolution[1] // 2 + 100], "start": 2, "duration": duration - 2,
+                 "effects": [{"name": "crossfadein", "duration": 0.5}]}
+            ]
+        }
+    
+    def _stock_video_path(self, keyword, resolution, fps):
         """
-        print("Création d'un outro")
+        Obtient la vidéo stock d'un mot-clé depuis la médiathèque locale
         
-        # Créer un arrière-plan
-        background = ColorClip(resolution, color=(20, 20, 20), duration=duration)
+        Args:
+            keyword (str): Mot-clé pour la recherche
+            resolution (tuple): Résolution souhaitée
+            fps (int): Images par seconde
+        
+        Returns:
+            str: Chemin de la vidéo préparée, ou None si elle n'est pas disponible
+        """
+        print(f"Recherche de vidéo stock pour le mot-clé: {keyword}")
+        try:
+            stock_path = self.stock_media.get(keyword, resolution, fps)
+        except (requests.RequestException, RuntimeError, OSError, ValueError) as e:
+            print(f"Vidéo stock indisponible pour '{keyword}': {e}")
+            stock_path = None
+        
+        # À défaut, une vidéo locale d'assets/visual déjà normalisée
+        return stock_path or self._local_visual("video", keyword, 0, resolution, fps)
+    
+    def _local_visual(self, kind, keyword, index, resolution, fps):
+        """
+        Choisit un élément normalisé d'assets/visual pour un segment
+        
+        Le choix dépend uniquement du mot-clé et du rang, pour qu'un même script donne la même vidéo.
+        
+        Args:
+            kind (str): "image" ou "video"
+            keyword (str): Mot-clé du segment
+            index (int): Rang de l'élément dans le segment
+            resolution (tuple): Résolution de la vidéo
+            fps (int): Images par seconde
+        
+        Returns:
+            str: Chemin de l'élément normalisé, ou None si aucun n'est disponible
+        """
+        variants = self.visual_assets.variants(resolution, fps, kind)
+        if not variants:
+            return None
+        return variants[(zlib.crc32(keyword.encode('utf-8')) + index) % len(variants)]
+    
+    def _build_keyframe_index(self, video_path):
+        """
+        Relève les images clés d'une vidéo rendue, sans faire échouer la production si ffprobe échoue
+        
+        Args:
+            video_path (str): Chemin de la vidéo
         
-        # Créer le texte de remerciement
-        thanks = TextClip("Merci d'avoir regardé !", fontsize=60, color='white', 
-                         font='Arial', method='caption')
-        thanks = thanks.set_position(('center', resolution[1] // 2 - 100))
-        thanks = thanks.set_duration(duration)
-        thanks = thanks.crossfadein(0.5)
+        Returns:
+            KeyframeIndex: Index sauvegardé à côté de la vidéo, ou None s'il n'a pas pu être construit
+        """
+        try:
+            return KeyframeIndex.build(video_path)
+        except (RuntimeError, OSError, ValueError, KeyError) as e:
+            print(f"Index des images clés indisponible pour {os.path.basename(video_path)}: {e}")
+            return None
+    
+    def _generate_thumbnail(self, output_path, title, video_path, timestamp, layout, keyframes=None):
+        """
+        Génère la miniature, sans faire échouer la production si l'image ne peut pas être extraite
         
-        # Créer un appel à l'action
-        cta = TextClip("N'oubliez pas de vous abonner et de laisser un commentaire", 
-                      fontsize=30, color='lightgrey', font='Arial', method='caption')
-        cta = cta.set_position(('center', resolution[1] // 2))
-        cta = cta.set_start(1).set_duration(duration - 1)  # Commencer après 1 seconde
-        cta = cta.crossfadein(0.5)
+        Args:
+            output_path (str): Chemin de la miniature
+            title (str): Titre affiché
+            video_path (str): Chemin de la vidéo rendue
+            timestamp (float): Instant de l'image de fond en secondes
+            layout (str): Mise en page
+            keyframes (KeyframeIndex, optional): Index des images clés de la vidéo
         
-        # Créer des liens sociaux
-        social = TextClip("Retrouvez-nous sur les réseaux sociaux", 
-                         fontsize=25, color='lightblue', font='Arial', method='caption')
-        social = social.set_position(('center', resolution[1] // 2 + 100))
-        social = social.set_start(2).set_duration(duration - 2)  # Commencer après 2 secondes
-        social = social.crossfadein(0.5)
+        Returns:
+            str: Chemin de la miniature, ou None si elle n'a pas pu être générée
+        """
+        try:
+            return self.thumbnails.generate(output_path, title, video_path=video_path, timestamp=timestamp,
+                                            layout=layout, keyframes=keyframes)
+        except (RuntimeError, OSError, ValueError) as e:
+            print(f"Erreur lors de la génération de la miniature de {os.path.basename(video_path)}: {e}")
+            return None
+    
+    def _thumbnail_time(self, timeline, duration=None):
+        """
+        Args:
+            timeline (Timeline): Chronologie de la vidéo
+            duration (float, optional): Durée de la vidéo dont l'image est extraite. Par défaut celle de la chronologie
         
-        # Combiner les clips
-        return CompositeVideoClip([background, thanks, cta, social])
+        Returns:
+            float: Instant de l'image de fond de la miniature: milieu de la première section du
+                développement, ou à défaut (section absente ou au-delà de la vidéo) 30 % de la vidéo
+        """
+        duration = timeline.duration if duration is None else duration
+        for section in timeline.sections:
+            if section["name"] == "section_1" and section["start"] + section["duration"] / 2 < duration:
+                return section["start"] + section["duration"] / 2
+        return duration * DEFAULT_FRAME_POSITION
     
-    def _save_video_metadata(self, video_path, script_data, metadata, audio_path, visual_style):
+    def _save_video_metadata(self, video_path, script_data, metadata, audio_path, visual_style, captions_path=None,
+                             output_format=None, thumbnail_path=None, keyframe_index_path=None):
         """
         Sauvegarde les métadonnées de la vidéo
         
@@ -430,12 +1137,20 @@ class VideoProducer:
             metadata (dict): Métadonnées YouTube
             audio_path (str): Chemin vers le fichier audio utilisé
             visual_style (str): Style visuel utilisé
+            captions_path (str, optional): Chemin des sous-titres exportés (.srt)
+            output_format (OutputFormat, optional): Format de la vidéo, lorsqu'elle en décline plusieurs
+            thumbnail_path (str, optional): Chemin de la miniature (.jpg)
+            keyframe_index_path (str, optional): Chemin de l'index des images clés (.keyframes.json)
         """
         video_metadata = {
             "video_path": video_path,
             "title": script_data['title'],
             "audio_path": audio_path,
             "visual_style": visual_style,
+            "captions_path": captions_path,
+            "thumbnail_path": thumbnail_path,
+            "keyframe_index_path": keyframe_index_path,
+            "output_format": output_format.to_dict() if output_format else None,
             "youtube_metadata": metadata,
             "generation_timestamp": datetime.now().isoformat(),
             "file_size_mb": os.path.getsize(video_path) / (1024 * 1024)
@@ -36,7 +36,7 @@ class YouTubePublisher:
     
     def upload_video(self, video_file, title, description, tags, category_id=22, 
                      privacy_status="private", notify_subscribers=True, 
-                     thumbnail_file=None, language="en"):
+                     thumbnail_file=None, language="en", captions_file=None):
         """
         Télécharge une vidéo sur YouTube
         
@@ -50,6 +50,7 @@ class YouTubePublisher:
             notify_subscribers (bool, optional): Notifier les abonnés. Par défaut True
             thumbnail_file (str, optional): Chemin vers l'image de miniature
             language (str, optional): Code de langue. Par défaut "en"
+            captions_file (str, optional): Chemin vers les sous-titres exportés avec la vidéo (.srt)
             
         Returns:
             dict: Informations sur la vidéo téléchargée ou None en cas d'échec
@@ -106,6 +107,10 @@ class YouTubePublisher:
             if thumbnail_file and os.path.exists(thumbnail_file):
                 self.set_thumbnail(video_id, thumbnail_file)
             
+            # Publier les sous-titres si fournis
+            if captions_file and os.path.exists(captions_file):
+                self.upload_captions(video_id, captions_file, language)
+            
             return response
             
         except HttpError as e:
@@ -146,6 +151,51 @@ class YouTubePublisher:
             print(f"Erreur lors de la définition de la miniature: {e}")
             return False
     
+    def upload_captions(self, video_id, captions_file, language="en", name="", is_draft=False):
+        """
+        Ajoute une piste de sous-titres à une vidéo
+        
+        Args:
+            video_id (str): ID de la vidéo YouTube
+            captions_file (str): Chemin vers le fichier de sous-titres (.srt)
+            language (str, optional): Code de langue des sous-titres. Par défaut "en"
+            name (str, optional): Nom de la piste affiché aux spectateurs. Par défaut aucun
+            is_draft (bool, optional): Garder la piste en brouillon. Par défaut False
+            
+        Returns:
+            dict: Informations sur la piste ajoutée ou None en cas d'échec
+        """
+        try:
+            youtube = self._get_service()
+            
+            # Préparer le fichier média
+            media = MediaFileUpload(
+                captions_file,
+                mimetype='application/octet-stream',
+                resumable=True
+            )
+            
+            # Ajouter la piste de sous-titres
+            response = youtube.captions().insert(
+                part='snippet',
+                body={
+                    'snippet': {
+                        'videoId': video_id,
+                        'language': language,
+                        'name': name,
+                        'isDraft': is_draft
+                    }
+                },
+                media_body=media
+            ).execute()
+            
+            print(f"Sous-titres ajoutés avec succès à la vidéo {video_id}")
+            return response
+            
+        except HttpError as e:
+            print(f"Erreur lors de l'ajout des sous-titres: {e}")
+            return None
+    
     def update_video_metadata(self, video_id, title=None, description=None, 
                              tags=None, category_id=None, privacy_status=None, 
                              language=None):
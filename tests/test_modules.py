@@ -2,6 +2,8 @@ import unittest
 import os
 import sys
 import json
+import shutil
+import tempfile
 from datetime import datetime
 
 # Ajouter le répertoire parent au chemin pour importer les modules du projet
@@ -10,8 +12,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Importer les modules du projet
 from scripts.niche_discovery import NicheDiscovery
 from scripts.content_generation import ContentGenerator
-from scripts.tts import TTSEngine
-from scripts.video_production import VideoProducer
+from scripts.tts import TTSEngine, DurationEstimator, AlignmentTrack, SpeechMetadataLog, VoiceRegistry, AudioPostProcessor
+from scripts.tts.audio_postprocess import WavReader, WavWriter
+from scripts.video_production import VideoProducer, FFmpegRenderer, TextBitmapCache, SegmentCache, RenderProfiler, get_render_profile, StockMediaLibrary, AssetNormalizer, Timeline
+from scripts.video_production import RenderBroker, SQLiteRenderBroker, RenderWorker, render_job, ChunkedRenderer, SectionAnimator
+from scripts.video_production import FrameWriter, TimelineCompositor, SubtitleTrack, get_output_format, ThumbnailGenerator, KeyframeIndex
+from scripts.video_production import detect_pauses, plan_section_starts
+from scripts.video_production.ffmpeg_utils import FFMPEG_BINARY, FFPROBE_BINARY
 from scripts.youtube_publishing import YouTubeAuth, YouTubePublisher
 from scripts.analytics import PerformanceAnalyzer
 
@@ -92,6 +99,11 @@ class TestContentGenerator(unittest.TestCase):
         self.assertIsInstance(tts_text, str)
         self.assertIn('This is a hook', tts_text)
         self.assertIn('This is an intro', tts_text)
+        
+        sections = self.content_generator.format_script_sections_for_tts(script_data)
+        self.assertEqual(list(sections), ['introduction', 'section1', 'section2', 'section3', 'conclusion'])
+        self.assertEqual(sections['section2'], "Now, let's move on to Section 2. Point 2.1 Point 2.2 Example 2")
+        self.assertEqual(" ".join(sections.values()), tts_text)
 
 class TestTTSEngine(unittest.TestCase):
     """Tests pour le module de synthèse vocale"""
@@ -112,6 +124,23 @@ class TestTTSEngine(unittest.TestCase):
             voice_id="male_professional"
         )
         self.assertTrue(os.path.exists(audio_path))
+        
+        # L'audio de démonstration est silencieux: aucune pause n'est posée avant le premier mot
+        track = self.tts_engine.get_alignment(audio_path)
+        self.assertEqual(track.words[0]['s'], 0.0)
+    
+    def test_import_sidecars_on_first_use(self):
+        """Teste la reprise des anciens fichiers de métadonnées quand le journal n'existe pas encore"""
+        output_dir = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(output_dir, 'old.wav.json'), 'w', encoding='utf-8') as f:
+                json.dump({'audio_path': 'old.wav', 'voice_id': 'male_casual'}, f)
+            
+            tts_engine = TTSEngine(output_dir=output_dir)
+            self.assertEqual(tts_engine.metadata_log.get('old.wav')['voice_id'], 'male_casual')
+            self.assertTrue(os.path.exists(tts_engine.metadata_log.log_path))
+        finally:
+            shutil.rmtree(output_dir)
     
     def test_get_voice_recommendations(self):
         """Teste les recommandations de voix"""
@@ -119,6 +148,264 @@ class TestTTSEngine(unittest.TestCase):
         self.assertIsInstance(recommendations, list)
         self.assertIn('male_professional', recommendations)
 
+class TestDurationEstimator(unittest.TestCase):
+    """Tests pour l'estimateur de durée de parole"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.estimator = DurationEstimator({
+            'slow_voice': {'words_per_minute': 120},
+            'fast_voice': {'words_per_minute': 180}
+        })
+    
+    def test_estimate_duration(self):
+        """Teste que la durée dépend du texte, du débit et des pauses"""
+        text = "This is a short sentence about investing."
+        short_duration = self.estimator.estimate(text, 'slow_voice')
+        self.assertGreater(short_duration, 0)
+        self.assertGreater(self.estimator.estimate(text + " " + text, 'slow_voice'), short_duration)
+        self.assertLess(self.estimator.estimate(text, 'fast_voice'), short_duration)
+        
+        # Une balise <break> ajoute exactement sa durée
+        with_break = self.estimator.estimate(text + " <break time='1s'/>", 'slow_voice')
+        self.assertAlmostEqual(with_break - short_duration, 1.0)
+    
+    def test_estimate_sentences_and_sections(self):
+        """Teste le découpage par phrase et par section"""
+        sentences = self.estimator.estimate_sentences("First sentence here. Second one!")
+        self.assertEqual(len(sentences), 2)
+        self.assertLessEqual(sentences[0]['end'], sentences[1]['start'])
+        
+        sections = self.estimator.estimate_sections({'intro': 'Hello there.', 'body': 'More words follow here.'})
+        self.assertEqual(sections['offsets']['intro'], 0.0)
+        self.assertAlmostEqual(sections['offsets']['body'], sections['durations']['intro'])
+        self.assertAlmostEqual(sections['total'], sum(sections['durations'].values()))
+    
+    def test_calibrate(self):
+        """Teste la calibration à partir de métadonnées passées"""
+        text = "Calibration makes the estimates match the real voice."
+        estimated = self.estimator.estimate(text, 'slow_voice')
+        factors = self.estimator.calibrate([
+            {'voice_id': 'slow_voice', 'estimated_duration_seconds': estimated, 'duration_seconds': estimated * 1.2}
+        ])
+        self.assertAlmostEqual(factors['slow_voice'], 1.2)
+        self.assertGreater(self.estimator.estimate(text, 'slow_voice'), estimated)
+
+class TestAlignmentTrack(unittest.TestCase):
+    """Tests pour la synchronisation mot à mot"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.track = AlignmentTrack.from_text(
+            "First sentence here. Then a second, longer sentence follows!",
+            DurationEstimator(),
+            audio_duration=10.0
+        )
+    
+    def test_from_text(self):
+        """Teste que les mots sont ordonnés et recalés sur la durée de l'audio"""
+        self.assertEqual(len(self.track.words), 9)
+        self.assertEqual(self.track.words[2]['w'], 'here.')
+        self.assertEqual(self.track.words[3]['sent'], 1)
+        for previous, word in zip(self.track.words, self.track.words[1:]):
+            self.assertLessEqual(previous['e'], word['s'])
+        self.assertLessEqual(self.track.words[-1]['e'], 10.0)
+        self.assertGreater(self.track.words[-1]['e'], 9.0)
+    
+    def test_from_text_pauses(self):
+        """Teste que les mots sont recalés sur la parole, entre les silences ajoutés par le post-traitement"""
+        padded = AlignmentTrack.from_text(
+            "First sentence here. Then a second, longer sentence follows!",
+            DurationEstimator(),
+            audio_duration=10.75,
+            lead_pause=0.25,
+            trail_pause=0.5
+        )
+        self.assertEqual(padded.duration, 10.75)
+        for word, reference in zip(padded.words, self.track.words):
+            self.assertAlmostEqual(word['s'], reference['s'] + 0.25, delta=0.002)
+            self.assertAlmostEqual(word['e'], reference['e'] + 0.25, delta=0.002)
+    
+    def test_save_and_load(self):
+        """Teste l'aller-retour au format JSON Lines"""
+        path = os.path.join(os.path.dirname(__file__), 'test_alignment.align.jsonl')
+        try:
+            self.track.save(path)
+            loaded = AlignmentTrack.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(loaded.words, self.track.words)
+        self.assertEqual(loaded.duration, 10.0)
+    
+    def test_subtitle_export(self):
+        """Teste l'export SRT et WebVTT"""
+        cues = self.track.to_cues(max_chars=20)
+        self.assertGreaterEqual(len(cues), 3)
+        self.assertTrue(all(len(cue['text']) <= 20 for cue in cues))
+        
+        srt = self.track.to_srt()
+        self.assertTrue(srt.startswith("1\n00:00:00,000 --> "))
+        self.assertIn("First sentence here.", srt)
+        self.assertTrue(self.track.to_vtt().startswith("WEBVTT"))
+
+class TestSpeechMetadataLog(unittest.TestCase):
+    """Tests pour le journal des métadonnées de synthèse vocale"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.temp_dir, 'speech_metadata.jsonl')
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_append_index_and_reload(self):
+        """Teste l'écriture tamponnée et les index par chemin et par texte"""
+        log = SpeechMetadataLog(self.log_path, buffer_size=2)
+        log.append({'audio_path': 'a.wav', 'text_hash': 'h1', 'voice_id': 'male_professional'})
+        self.assertFalse(os.path.exists(self.log_path))
+        log.append({'audio_path': 'b.wav', 'text_hash': 'h1', 'voice_id': 'female_casual'})
+        self.assertTrue(os.path.exists(self.log_path))
+        
+        self.assertEqual(log.get('a.wav')['voice_id'], 'male_professional')
+        self.assertEqual([r['audio_path'] for r in log.find_by_text(text_hash='h1')], ['a.wav', 'b.wav'])
+        
+        reloaded = SpeechMetadataLog(self.log_path)
+        self.assertEqual(len(reloaded), 2)
+    
+    def test_compact_and_import_sidecars(self):
+        """Teste la compaction et la migration des anciens fichiers JSON"""
+        with open(os.path.join(self.temp_dir, 'old.wav.json'), 'w', encoding='utf-8') as f:
+            json.dump({'audio_path': 'old.wav', 'voice_id': 'male_casual'}, f)
+        
+        log = SpeechMetadataLog(self.log_path)
+        self.assertEqual(log.import_sidecars(self.temp_dir, remove=True), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, 'old.wav.json')))
+        
+        log.append({'audio_path': 'old.wav', 'voice_id': 'female_casual'})
+        stats = log.compact()
+        self.assertEqual(stats, {'lines_before': 2, 'lines_after': 1})
+        self.assertEqual(SpeechMetadataLog(self.log_path).get('old.wav')['voice_id'], 'female_casual')
+    
+    def test_concurrent_writers(self):
+        """Teste que la compaction garde les lignes d'un autre processus et que le tampon est écrit à la libération"""
+        import gc
+        first = SpeechMetadataLog(self.log_path)
+        first.append({'audio_path': 'a.wav', 'voice_id': 'male_casual'})
+        first.flush()
+        
+        other = SpeechMetadataLog(self.log_path)
+        other.append({'audio_path': 'b.wav', 'voice_id': 'female_casual'})
+        del other
+        gc.collect()
+        
+        self.assertEqual(first.compact(), {'lines_before': 2, 'lines_after': 2})
+        self.assertEqual(SpeechMetadataLog(self.log_path).get('b.wav')['voice_id'], 'female_casual')
+
+class TestVoiceRegistry(unittest.TestCase):
+    """Tests pour le catalogue des voix"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.models_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.models_dir)
+    
+    def _write_manifest(self, voice_id, manifest):
+        """Crée le manifeste d'une voix dans le répertoire des modèles"""
+        os.makedirs(os.path.join(self.models_dir, voice_id), exist_ok=True)
+        with open(os.path.join(self.models_dir, voice_id, 'voice.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+    
+    def test_default_recommendations(self):
+        """Teste les recommandations des voix livrées avec le projet"""
+        registry = VoiceRegistry(self.models_dir)
+        self.assertEqual(registry.recommend('finance', 'investing'), ['male_professional', 'female_professional'])
+        self.assertEqual(registry.recommend('unknown'), ['male_professional', 'female_casual'])
+    
+    def test_discovery_and_cache(self):
+        """Teste la découverte des manifestes et l'invalidation du cache"""
+        self._write_manifest('narrator_fr', {'name': 'Narrateur', 'categories': {'finance': 2.0}, 'embedding': [1.0, 0.0]})
+        self._write_manifest('narrator_en', {'name': 'Narrator', 'embedding': [0.9, 0.1]})
+        registry = VoiceRegistry(self.models_dir)
+        self.assertIn('narrator_fr', registry.get_voices())
+        self.assertEqual(registry.recommend('finance')[0], 'narrator_fr')
+        self.assertEqual(registry.similar_voices('narrator_fr'), ['narrator_en'])
+        
+        # Un second chargement doit utiliser le cache sans rescanner
+        cached = VoiceRegistry(self.models_dir)
+        self.assertTrue(cached._load_cache())
+        self.assertEqual(cached.get_voices(), registry.get_voices())
+        
+        # Modifier un manifeste invalide le cache
+        manifest_path = os.path.join(self.models_dir, 'narrator_fr', 'voice.json')
+        self._write_manifest('narrator_fr', {'name': 'Narrateur 2'})
+        os.utime(manifest_path, (1, 1))
+        self.assertEqual(VoiceRegistry(self.models_dir).get_voices()['narrator_fr']['name'], 'Narrateur 2')
+        
+        # Un manifeste ajouté dans un sous-répertoire existant invalide aussi le cache
+        voice_dir = os.path.join(self.models_dir, 'narrator_de')
+        os.makedirs(voice_dir)
+        os.utime(voice_dir, (1, 1))
+        self.assertNotIn('narrator_de', VoiceRegistry(self.models_dir).get_voices())
+        self._write_manifest('narrator_de', {'name': 'Erzähler'})
+        self.assertIn('narrator_de', VoiceRegistry(self.models_dir).get_voices())
+
+class TestAudioPostProcessor(unittest.TestCase):
+    """Tests pour le post-traitement audio"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.sample_rate = 24000
+        self.audio_path = os.path.join(self.temp_dir, 'speech.wav')
+        
+        # 1 s de silence, 2 s de signal faible, 1 s de silence
+        import numpy as np
+        t = np.arange(2 * self.sample_rate) / self.sample_rate
+        tone = (0.05 * np.sin(2 * np.pi * 220 * t)).astype(np.float32).reshape(-1, 1)
+        with WavWriter(self.audio_path, self.sample_rate, 1) as writer:
+            writer.write_silence(self.sample_rate)
+            writer.write(tone)
+            writer.write_silence(self.sample_rate)
+        
+        self.processor = AudioPostProcessor(target_db=-20.0, lead_pause=0.25, trail_pause=0.5, chunk_frames=4096)
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_process_file(self):
+        """Teste la normalisation et la suppression des silences"""
+        stats = self.processor.process_file(self.audio_path)
+        self.assertAlmostEqual(stats['duration_before'], 4.0)
+        self.assertAlmostEqual(stats['duration_after'], 2.75, places=1)
+        self.assertGreater(stats['gain_db'], 0)
+        self.assertEqual((stats['lead_pause'], stats['trail_pause']), (0.25, 0.5))
+        
+        analysis = self.processor.analyze(self.audio_path)
+        self.assertAlmostEqual(analysis['loudness_db'], -20.0, delta=0.5)
+        self.assertAlmostEqual(analysis['start_frame'] / self.sample_rate, 0.25, delta=0.03)
+    
+    def test_process_silent_file(self):
+        """Teste qu'un fichier entièrement silencieux est laissé tel quel, sans pauses ajoutées"""
+        silent_path = os.path.join(self.temp_dir, 'silent.wav')
+        with WavWriter(silent_path, self.sample_rate, 1) as writer:
+            writer.write_silence(2 * self.sample_rate)
+        stats = self.processor.process_file(silent_path)
+        self.assertAlmostEqual(stats['duration_after'], 2.0)
+        self.assertEqual((stats['lead_pause'], stats['trail_pause']), (0.0, 0.0))
+    
+    def test_concatenate_with_exact_pauses(self):
+        """Teste l'assemblage avec des pauses de durée exacte"""
+        output_path = os.path.join(self.temp_dir, 'joined.wav')
+        offsets = self.processor.concatenate([self.audio_path, self.audio_path], output_path, pause_seconds=0.5)
+        self.assertEqual(offsets, [0.0, 4.5])
+        self.assertAlmostEqual(WavReader(output_path).duration, 8.5)
+
 class TestVideoProducer(unittest.TestCase):
     """Tests pour le module d'assemblage vidéo"""
     
@@ -179,6 +466,847 @@ class TestVideoProducer(unittest.TestCase):
             use_intro_outro=True
         )
         self.assertTrue(os.path.exists(video_path))
+    
+    def test_build_render_plan(self):
+        """Teste la description de la vidéo sous forme de plan de rendu"""
+        plan = self.video_producer._build_render_plan(
+            self.audio_path, 10.0, self.script_data, self.metadata,
+            "dynamic", (640, 360), 24, True
+        )
+        self.assertEqual([segment['name'] for segment in plan['segments']],
+                         ['intro', 'section_0', 'section_1', 'section_2', 'section_3', 'section_4', 'outro'])
+        self.assertAlmostEqual(sum(segment['duration'] for segment in plan['segments']), 10.0 + 5 + 8)
+        self.assertEqual(plan['audio'][0]['start'], 5)
+        
+        renderer = FFmpegRenderer(work_dir=tempfile.mkdtemp())
+        try:
+            command = renderer.build_command(plan, 'out.mp4')
+        finally:
+            shutil.rmtree(renderer.work_dir, ignore_errors=True)
+        self.assertIn('-filter_complex', command)
+        self.assertIn('concat=n=7:v=1:a=0[vout]', command[command.index('-filter_complex') + 1])
+    
+    def test_script_captions(self):
+        """Teste les sous-titres exportés sans alignement, tirés du texte lu dans chaque section"""
+        timeline = self.video_producer._build_timeline(None, 10.0, self.script_data, self.metadata,
+                                                       "dynamic", (640, 360), 24, False)
+        cues = timeline.caption_cues()
+        self.assertEqual(cues[0]['text'], 'This is a hook This is an intro These are learning points')
+        self.assertIn('Section 2 Point 2.1 Point 2.2 Example 2', [cue['text'] for cue in cues])
+        self.assertAlmostEqual(cues[-1]['end'], 10.0)
+    
+    def test_create_video_ffmpeg_backend(self):
+        """Teste la création d'une vidéo avec le graphe de filtres ffmpeg"""
+        video_path = self.video_producer.create_video(
+            audio_path=self.audio_path,
+            script_data=self.script_data,
+            metadata=self.metadata,
+            visual_style="image_slideshow",
+            resolution=(640, 360),
+            fps=24,
+            backend="ffmpeg"
+        )
+        self.assertTrue(os.path.exists(video_path))
+    
+    def test_create_video_parallel_segments(self):
+        """Teste le rendu des segments en parallèle puis leur assemblage sans réencodage"""
+        video_path = self.video_producer.create_video(
+            audio_path=self.audio_path,
+            script_data=self.script_data,
+            metadata=self.metadata,
+            visual_style="image_slideshow",
+            resolution=(640, 360),
+            fps=24,
+            backend="ffmpeg",
+            workers=2
+        )
+        self.assertTrue(os.path.exists(video_path))
+        
+        with self.assertRaises(ValueError):
+            self.video_producer.create_video(self.audio_path, self.script_data, self.metadata, workers=2)
+    
+    def test_create_preview(self):
+        """Teste les aperçus proxy et planche d'images"""
+        proxy_path = self.video_producer.create_preview(
+            self.script_data, self.metadata, audio_path=self.audio_path, mode="proxy"
+        )
+        self.assertTrue(proxy_path.endswith('_preview.mp4'))
+        self.assertTrue(os.path.exists(proxy_path))
+        
+        storyboard_path = self.video_producer.create_preview(
+            self.script_data, self.metadata, audio_duration=30, mode="storyboard", frames_per_segment=2
+        )
+        self.assertTrue(storyboard_path.endswith('_storyboard.png'))
+        self.assertTrue(os.path.exists(storyboard_path))
+
+class TestTextBitmapCache(unittest.TestCase):
+    """Tests pour le cache des textes rendus"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.style = {"font": "Arial", "fontsize": 30, "color": "white", "bg_color": None,
+                      "method": "label", "width": None, "align": "center"}
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_render_once(self):
+        """Teste qu'un texte n'est rendu qu'une seule fois, y compris entre deux sessions"""
+        cache = TextBitmapCache(self.cache_dir)
+        path = cache.get_path("Abonnez-vous", self.style)
+        self.assertEqual(cache.get_path("Abonnez-vous", self.style), path)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        
+        image = cache.get_array("Abonnez-vous", self.style)
+        self.assertEqual(image.shape[2], 4)
+        
+        reopened = TextBitmapCache(self.cache_dir)
+        self.assertEqual(reopened.get_path("Abonnez-vous", self.style), path)
+        self.assertEqual(reopened.misses, 0)
+    
+    def test_lru_eviction(self):
+        """Teste la suppression des textes les moins récemment utilisés"""
+        cache = TextBitmapCache(self.cache_dir, max_entries=2)
+        first = cache.get_path("Premier", self.style)
+        cache.get_path("Deuxième", self.style)
+        cache.get_path("Premier", self.style)
+        cache.get_path("Troisième", self.style)
+        
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(os.path.exists(first))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+class TestSegmentCache(unittest.TestCase):
+    """Tests pour le cache des segments encodés"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = SegmentCache(self.cache_dir, max_segments=1)
+        self.segment = {"name": "intro", "duration": 5, "cache": True, "layers": []}
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_key_depends_on_encoding(self):
+        """Teste que la clé change avec les paramètres d'encodage"""
+        key = self.cache.key(self.segment, (1920, 1080), 30, ["-c:v", "libx264"])
+        self.assertEqual(key, self.cache.key(dict(self.segment), (1920, 1080), 30, ["-c:v", "libx264"]))
+        self.assertNotEqual(key, self.cache.key(self.segment, (1920, 1080), 25, ["-c:v", "libx264"]))
+    
+    def test_store_and_prune(self):
+        """Teste la publication d'un segment et l'éviction des plus anciens"""
+        keys = [self.cache.key(self.segment, (640, 360), fps, []) for fps in (24, 30)]
+        self.assertIsNone(self.cache.get("intro", keys[0]))
+        
+        for key in keys:
+            temp_path = self.cache.temp_path("intro", key)
+            with open(temp_path, 'wb') as f:
+                f.write(b"segment")
+            self.cache.store(temp_path, "intro", key)
+        
+        self.assertIsNone(self.cache.get("intro", keys[0]))
+        self.assertEqual(self.cache.get("intro", keys[1]), self.cache.path("intro", keys[1]))
+
+class TestRenderProfiler(unittest.TestCase):
+    """Tests pour le profileur du rendu"""
+    
+    def test_nested_stages(self):
+        """Teste la mesure des étapes imbriquées et des images par type de clip"""
+        profiler = RenderProfiler()
+        with profiler.stage("encode"):
+            for _ in range(3):
+                with profiler.stage("frame:composite"):
+                    with profiler.stage("frame:text"):
+                        pass
+        
+        report = profiler.report()
+        paths = [stage['path'] for stage in report['stages']]
+        self.assertEqual(paths[0], "encode")
+        self.assertIn("encode;frame:composite;frame:text", paths)
+        self.assertEqual(report['frames']['text']['frames'], 3)
+        self.assertEqual(report['frames']['composite']['frames'], 3)
+        
+        for line in profiler.folded().splitlines():
+            path, microseconds = line.rsplit(" ", 1)
+            self.assertTrue(path.startswith("encode"))
+            self.assertGreaterEqual(int(microseconds), 0)
+    
+    def test_save_report(self):
+        """Teste l'écriture du rapport à côté de la vidéo"""
+        output_dir = tempfile.mkdtemp()
+        try:
+            self.assertIsNone(RenderProfiler(enabled=False).save(os.path.join(output_dir, 'video.mp4')))
+            
+            profiler = RenderProfiler()
+            with profiler.stage("visual_acquisition"):
+                pass
+            json_path, folded_path = profiler.save(os.path.join(output_dir, 'video.mp4'), {"backend": "moviepy"})
+            
+            with open(json_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            self.assertEqual(report['backend'], "moviepy")
+            self.assertEqual(report['stages'][0]['path'], "visual_acquisition")
+            self.assertTrue(folded_path.endswith('video.profile.folded'))
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+class TestRenderProfiles(unittest.TestCase):
+    """Tests pour les profils de rendu"""
+    
+    def test_profile_settings(self):
+        """Teste la résolution et les paramètres x264 des profils"""
+        draft = get_render_profile("draft")
+        self.assertEqual(draft.resolve_resolution((1920, 1080)), (960, 540))
+        self.assertEqual(get_render_profile("archival").resolve_resolution((1920, 1080)), (1920, 1080))
+        
+        args = get_render_profile("standard").ffmpeg_video_args(30, "image_slideshow", (1920, 1080))
+        self.assertEqual(args[args.index("-tune") + 1], "stillimage")
+        self.assertEqual(args[args.index("-g") + 1], "60")
+        self.assertIn("-crf", args)
+        
+        params = draft.moviepy_params(30, "dynamic")
+        self.assertEqual(params['preset'], "ultrafast")
+        self.assertNotIn("-tune", params['ffmpeg_params'])
+    
+    def test_two_pass(self):
+        """Teste l'encodage en deux passes à débit cible"""
+        profile = get_render_profile("archival", two_pass=True)
+        args = profile.ffmpeg_video_args(30, None, (1920, 1080))
+        self.assertIn("-b:v", args)
+        self.assertNotIn("-crf", args)
+        
+        with self.assertRaises(ValueError):
+            profile.moviepy_params(30)
+        with self.assertRaises(ValueError):
+            get_render_profile("unknown")
+
+class TestStockMediaLibrary(unittest.TestCase):
+    """Tests pour la médiathèque de vidéos stock"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test: serveur HTTP local à la place de l'API Pexels"""
+        import threading
+        from http.server import HTTPServer, BaseHTTPRequestHandler
+        
+        requests_seen = self.requests_seen = []
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests_seen.append(self.path)
+                if self.path.startswith("/videos/search"):
+                    port = self.server.server_address[1]
+                    body = json.dumps({"videos": [{"id": 1, "duration": 10, "video_files": [
+                        {"link": f"http://127.0.0.1:{port}/files/sd.mp4", "width": 640, "height": 360, "file_type": "video/mp4"},
+                        {"link": f"http://127.0.0.1:{port}/files/hd.mp4", "width": 1920, "height": 1080, "file_type": "video/mp4"}
+                    ]}]}).encode('utf-8')
+                else:
+                    body = b"video" * 200
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.cache_dir = tempfile.mkdtemp()
+        self.library = StockMediaLibrary("test-key", self.cache_dir,
+                                         base_url=f"http://127.0.0.1:{self.server.server_address[1]}")
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.library.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_search_cache(self):
+        """Teste la mise en cache des recherches et le choix du fichier"""
+        videos = self.library.search("finance")
+        self.assertEqual(self.library.search("Finance "), videos)
+        self.assertEqual(len([path for path in self.requests_seen if path.startswith("/videos/search")]), 1)
+        
+        self.assertTrue(self.library.select_file(videos[0], (1280, 720))["link"].endswith("hd.mp4"))
+        self.assertTrue(self.library.select_file(videos[0], (640, 360))["link"].endswith("sd.mp4"))
+        
+        reloaded = StockMediaLibrary("test-key", self.cache_dir, base_url="http://127.0.0.1:9")
+        self.assertEqual(reloaded.search("finance"), videos)
+    
+    def test_content_addressed_store(self):
+        """Teste le stockage par empreinte et l'éviction des fichiers les moins récents"""
+        files = [file["link"] for file in self.library.search("finance")[0]["files"]]
+        first = self.library.download(files[0])
+        # Même contenu servi par une autre adresse: un seul fichier stocké
+        self.assertEqual(self.library.download(files[1]), first)
+        self.assertEqual(self.library.download(files[0]), first)
+        self.assertEqual(len([path for path in self.requests_seen if path.startswith("/files")]), 2)
+        
+        size = os.path.getsize(first)
+        self.library.max_bytes = 0
+        self.assertEqual(self.library.evict(), size)
+        self.assertFalse(os.path.exists(first))
+
+class TestAssetNormalizer(unittest.TestCase):
+    """Tests pour la normalisation des éléments visuels"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        from PIL import Image
+        
+        self.source_dir = tempfile.mkdtemp()
+        Image.new("RGB", (200, 50), (200, 30, 30)).save(os.path.join(self.source_dir, "banner.png"))
+        with open(os.path.join(self.source_dir, "notes.txt"), 'w') as f:
+            f.write("ignoré")
+        self.normalizer = AssetNormalizer(self.source_dir, workers=2)
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.source_dir, ignore_errors=True)
+    
+    def test_normalize_once(self):
+        """Teste la normalisation au cadre cible et la réutilisation de l'index"""
+        from PIL import Image
+        
+        self.assertEqual(self.normalizer.list_sources(), ["banner.png"])
+        normalized = self.normalizer.normalize((64, 36), 30)
+        with Image.open(normalized["banner.png"]) as image:
+            self.assertEqual(image.size, (64, 36))
+        
+        reloaded = AssetNormalizer(self.source_dir)
+        self.assertEqual(reloaded.normalize((64, 36), 30), {})
+        self.assertEqual(reloaded.variants((64, 36), 24, "image"), [normalized["banner.png"]])
+        self.assertEqual(reloaded.variants((64, 36), 30, "video"), [])
+        self.assertIsNone(reloaded.get("banner.png", (32, 18), 30))
+        
+        os.remove(os.path.join(self.source_dir, "banner.png"))
+        reloaded.normalize((64, 36), 30)
+        self.assertEqual(reloaded.index, {})
+        self.assertFalse(os.path.exists(normalized["banner.png"]))
+    
+    def test_skip_unreadable(self):
+        """Teste qu'un élément illisible est ignoré sans perdre les autres conversions"""
+        with open(os.path.join(self.source_dir, "broken.jpg"), 'wb') as f:
+            f.write(b"not an image")
+        normalized = self.normalizer.normalize((64, 36), 30)
+        self.assertEqual(list(normalized), ["banner.png"])
+        self.assertEqual(AssetNormalizer(self.source_dir).get("banner.png", (64, 36), 30), normalized["banner.png"])
+        self.assertIsNone(self.normalizer.get("broken.jpg", (64, 36), 30))
+
+class TestTimeline(unittest.TestCase):
+    """Tests pour la chronologie déclarative"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.timeline = Timeline((640, 360), 24, "dynamic")
+        self.timeline.add_section("intro", 2, cache=True)
+        start = self.timeline.add_section("section_0", 4)
+        self.timeline.track("visual").add("color", 0, 2, color=[20, 20, 20])
+        self.timeline.track("visual").add("color", start, 4, color=[40, 40, 40])
+        self.timeline.track("subtitles").add("text", start, 4, text="Bonjour", style={"fontsize": 30},
+                                             effects=[{"name": "crossfadein", "duration": 0.5},
+                                                      {"name": "crossfadeout", "duration": 0.5}])
+        self.timeline.track("narration").add("audio", start, 4, path="narration.wav")
+    
+    def test_render_plan(self):
+        """Teste la traduction en plan de rendu, avec des temps locaux à chaque segment"""
+        plan = self.timeline.to_render_plan()
+        self.assertEqual([segment['name'] for segment in plan['segments']], ['intro', 'section_0'])
+        self.assertTrue(plan['segments'][0]['cache'])
+        self.assertEqual([layer['type'] for layer in plan['segments'][1]['layers']], ['color', 'text'])
+        self.assertEqual(plan['segments'][1]['layers'][1]['start'], 0)
+        self.assertEqual(plan['audio'], [{"path": "narration.wav", "start": 2, "duration": 4}])
+    
+    def test_cut_and_json(self):
+        """Teste l'extraction d'une partie et l'aller-retour JSON"""
+        part = self.timeline.cut(3, 6)
+        self.assertEqual(part.duration, 3)
+        text = part.track("subtitles").items[0]
+        self.assertEqual((text.start, text.duration, text.fields['offset']), (0, 3, 1))
+        self.assertEqual([effect['name'] for effect in text.fields['effects']], ['crossfadeout'])
+        self.assertNotIn('cache', part.sections[0])
+        
+        path = tempfile.mktemp(suffix='.timeline.json')
+        try:
+            self.timeline.save(path)
+            self.assertEqual(Timeline.load(path).to_render_plan(), self.timeline.to_render_plan())
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def test_split_static(self):
+        """Teste l'isolement des intervalles sans mouvement ni fondu"""
+        self.assertEqual(self.timeline.static_ranges(2, 6), [(2.5, 5.5)])
+        split = self.timeline.split_static()
+        self.assertEqual([(section['duration'], section.get('static', False)) for section in split.sections],
+                         [(2, False), (0.5, False), (3, True), (0.5, False)])
+        self.assertTrue(split.sections[0]['cache'])
+        
+        plan = split.to_render_plan()
+        self.assertTrue(plan['segments'][2]['static'])
+        renderer = FFmpegRenderer(work_dir=tempfile.mkdtemp())
+        try:
+            command = " ".join(renderer.build_command(plan, 'out.mp4', segments=[2], include_audio=False))
+        finally:
+            shutil.rmtree(renderer.work_dir, ignore_errors=True)
+        self.assertIn("loop=loop=71:size=1", command)
+
+class TestRenderQueue(unittest.TestCase):
+    """Tests pour la file de rendu"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.work_dir = tempfile.mkdtemp()
+        self.broker = SQLiteRenderBroker(os.path.join(self.work_dir, 'queue.db'), lease_seconds=60)
+        self.job = render_job('audio.wav', {'title': 'Test'}, {}, visual_style="dynamic", resolution=(640, 360))
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    def test_claim_and_retry(self):
+        """Teste la réservation exclusive, l'expiration du bail et les tentatives"""
+        job_id = self.broker.submit(self.job, max_attempts=2)
+        claimed = self.broker.claim("node-a")
+        self.assertEqual((claimed['id'], claimed['attempts']), (job_id, 1))
+        self.assertEqual(claimed['job']['resolution'], [640, 360])
+        self.assertIsNone(self.broker.claim("node-b"))
+        self.assertTrue(self.broker.heartbeat(job_id, "node-a"))
+        
+        # Plantage simulé de node-a: son bail expire et la tâche est reprise
+        self.broker.lease_seconds = -1
+        self.broker.heartbeat(job_id, "node-a")
+        self.broker.lease_seconds = 60
+        claimed = self.broker.claim("node-b")
+        self.assertEqual((claimed['id'], claimed['attempts']), (job_id, 2))
+        self.assertFalse(self.broker.heartbeat(job_id, "node-a"))
+        self.assertFalse(self.broker.complete(job_id, "node-a", "video.mp4"))
+        
+        self.assertEqual(self.broker.fail(job_id, "node-b", "erreur"), "failed")
+        self.assertEqual(self.broker.counts()['failed'], 1)
+        
+        with self.assertRaises(ValueError):
+            render_job('audio.wav', {}, {}, quality="max")
+    
+    def test_broker_interface(self):
+        """Teste qu'un courtier incomplet est refusé dès sa création"""
+        class PartialBroker(RenderBroker):
+            def submit(self, job, priority=0, max_attempts=3):
+                return 1
+        with self.assertRaises(TypeError):
+            PartialBroker()
+    
+    def test_worker_publishes(self):
+        """Teste le traitement d'une tâche et sa publication atomique"""
+        class StagingProducer:
+            """Producteur simulé qui écrit une vidéo fictive et ses métadonnées"""
+            output_dir = None
+            
+            def create_video(self, audio_path, script_data, metadata, **options):
+                video_path = os.path.join(self.output_dir, 'test.mp4')
+                with open(video_path, 'wb') as f:
+                    f.write(b"video")
+                with open(video_path + '.json', 'w') as f:
+                    json.dump({"video_path": video_path}, f)
+                return video_path
+        
+        publish_dir = os.path.join(self.work_dir, 'published')
+        job_id = self.broker.submit(self.job)
+        worker = RenderWorker(StagingProducer(), self.broker, publish_dir, worker_id="node-a")
+        self.assertEqual(worker.run(exit_when_idle=True), 1)
+        
+        job = self.broker.get(job_id)
+        self.assertEqual(job['status'], "done")
+        self.assertTrue(os.path.exists(job['output_path']))
+        with open(job['output_path'] + '.json') as f:
+            self.assertEqual(json.load(f)['video_path'], job['output_path'])
+        self.assertEqual(os.listdir(os.path.join(publish_dir, '.staging')), [])
+
+class TestChunkedRenderer(unittest.TestCase):
+    """Tests pour le rendu par tronçons reprenables"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.work_dir = tempfile.mkdtemp()
+        self.timeline = Timeline((64, 36), 10, "dynamic")
+        start = self.timeline.add_section("section_0", 25)
+        self.timeline.track("visual").add("color", start, 25, color=[40, 40, 40])
+        self.timeline.track("visual").add("color", start, 12, color=[90, 90, 90],
+                                          effects=[{"name": "fadeout", "duration": 3}])
+        self.timeline.track("narration").add("audio", start, 25, path="narration.wav")
+        
+        class ConcatRenderer:
+            """Moteur simulé qui joint les tronçons bout à bout"""
+            text_cache = None
+            
+            def _profile_args(self, plan, profile):
+                return [], [], None
+            
+            def concat(self, plan, segment_paths, output_path, audio_args=None, list_dir=None):
+                with open(output_path, 'wb') as output:
+                    for path in segment_paths:
+                        with open(path, 'rb') as f:
+                            output.write(f.read())
+                return output_path
+        
+        self.renderer = ChunkedRenderer(os.path.join(self.work_dir, 'chunks'), chunk_seconds=10,
+                                        renderer=ConcatRenderer())
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    def test_boundaries(self):
+        """Teste le découpage hors des fondus, aligné sur les images"""
+        self.assertEqual(self.renderer.boundaries(self.timeline), [0.0, 12.0, 22.0, 25])
+        chunks = self.renderer.chunks(self.timeline, encoder="test")
+        self.assertEqual(chunks[1]['timeline'].track("narration").items, [])
+        self.assertEqual(chunks[0]['timeline'].track("visual").items[1].fields['effects'][0]['name'], "fadeout")
+    
+    def test_resume(self):
+        """Teste la reprise d'un rendu interrompu: seuls les tronçons manquants sont encodés"""
+        rendered = []
+        
+        def render_chunk(part, path):
+            if len(rendered) == 1 and fail:
+                raise RuntimeError("interruption")
+            rendered.append(part.duration)
+            with open(path, 'wb') as f:
+                f.write(json.dumps(part.to_dict()).encode('utf-8'))
+        
+        output_path = os.path.join(self.work_dir, 'video.mp4')
+        fail = True
+        with self.assertRaises(RuntimeError):
+            self.renderer.render(self.timeline, output_path, render_chunk=render_chunk, encoder="test")
+        render_dir = self.renderer.render_dir(self.timeline, "test")
+        self.assertEqual(list(self.renderer.load_manifest(render_dir)['chunks']), ['0'])
+        
+        fail = False
+        self.renderer.render(self.timeline, output_path, render_chunk=render_chunk, encoder="test")
+        self.assertEqual(rendered, [12.0, 10.0, 3.0])
+        self.assertTrue(os.path.getsize(output_path) > 0)
+        self.assertFalse(os.path.exists(render_dir))
+
+class TestSectionAnimator(unittest.TestCase):
+    """Tests pour l'animateur vectorisé"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.text_cache = TextBitmapCache(self.cache_dir)
+        self.style = {"font": "Arial", "fontsize": 20, "color": "white", "bg_color": None,
+                      "method": "label", "width": None, "align": "center"}
+        timeline = Timeline((160, 90), 10, "dynamic")
+        timeline.add_section("section_0", 5)
+        timeline.track("visual").add("color", 0, 5, color=[40, 40, 40])
+        timeline.track("visual").add("text", 0, 5, text="Titre", style=self.style, position=["center", 10],
+                                     effects=[{"name": "crossfadein", "duration": 1}],
+                                     motion={"type": "bounce", "base_y": 10, "amplitude": 2, "period": 5})
+        self.items = [item for _, item in timeline.section_items(0)]
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_curves(self):
+        """Teste les courbes précalculées de position et d'opacité"""
+        animator = SectionAnimator(self.items, 0, 5, (160, 90), 10, self.text_cache)
+        self.assertEqual(animator.frame_count, 50)
+        text = animator.layers[1]
+        self.assertEqual(len(text.opacity), 50)
+        self.assertAlmostEqual(text.opacity[5], 0.5)
+        self.assertEqual(text.opacity[10], 1)
+        self.assertEqual(text.dst_y0[0], int(10 + 2 * 2.5 ** 2))
+        self.assertEqual(text.dst_y0[25], 10)
+    
+    def test_render_frame(self):
+        """Teste la composition dans un tampon réutilisé"""
+        animator = SectionAnimator(self.items, 0, 5, (160, 90), 10, self.text_cache)
+        first = animator.render_frame(0)
+        self.assertEqual(first.shape, (90, 160, 3))
+        self.assertTrue((first == 40).all())
+        
+        frame = animator.make_frame(2.5)
+        self.assertIs(frame, first)
+        bitmap = self.text_cache.get_array("Titre", self.style)
+        x = (160 - bitmap.shape[1]) // 2
+        region = frame[10:10 + bitmap.shape[0], x:x + bitmap.shape[1]]
+        opaque = bitmap[..., 3] == 255
+        self.assertTrue((region[opaque] == bitmap[..., :3][opaque]).all())
+
+class TestTimelineCompositor(unittest.TestCase):
+    """Tests pour la composition image par image vers un seul processus ffmpeg"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        if not shutil.which(FFMPEG_BINARY):
+            self.skipTest("ffmpeg indisponible")
+        self.work_dir = tempfile.mkdtemp()
+        self.text_cache = TextBitmapCache(os.path.join(self.work_dir, 'text'))
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    def test_frame_writer(self):
+        """Teste l'encodage d'images brutes et la remontée des erreurs de ffmpeg"""
+        import numpy as np
+        frame = np.zeros((36, 64, 3), dtype=np.uint8)
+        output_path = os.path.join(self.work_dir, 'frames.mp4')
+        with FrameWriter(["-c:v", "libx264", "-pix_fmt", "yuv420p", output_path], (64, 36), 10) as writer:
+            for _ in range(5):
+                writer.write(frame)
+        self.assertEqual(writer.frames, 5)
+        self.assertTrue(os.path.getsize(output_path) > 0)
+        
+        with self.assertRaises(RuntimeError):
+            with FrameWriter([os.path.join(self.work_dir, 'absent', 'frames.mp4')], (64, 36), 10) as writer:
+                writer.write(frame)
+    
+    def test_render(self):
+        """Teste le rendu d'une chronologie avec une section fixe"""
+        timeline = Timeline((64, 36), 10, "dynamic")
+        start = timeline.add_section("section_0", 2, static=True)
+        timeline.track("visual").add("color", start, 2, color=[40, 40, 40])
+        start = timeline.add_section("section_1", 2)
+        timeline.track("visual").add("color", start, 2, color=[90, 90, 90],
+                                     effects=[{"name": "fadein", "duration": 1}])
+        output_path = os.path.join(self.work_dir, 'video.mp4')
+        self.assertEqual(TimelineCompositor(self.text_cache).render(timeline, output_path), output_path)
+        self.assertTrue(os.path.getsize(output_path) > 0)
+
+class TestSubtitleTrack(unittest.TestCase):
+    """Tests pour les sous-titres rendus par ffmpeg"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.track = SubtitleTrack.from_script([("Premier point. Second point plus long.", 2, 8)])
+    
+    def test_from_script(self):
+        """Teste le découpage par phrase et la répartition du temps selon la longueur"""
+        self.assertEqual([cue['text'] for cue in self.track.cues], ["Premier point.", "Second point plus long."])
+        self.assertEqual(self.track.cues[0]['start'], 2)
+        self.assertAlmostEqual(self.track.cues[0]['end'], 2 + 6 * 14 / 37, places=3)
+        self.assertEqual(self.track.cues[1]['end'], 8)
+        self.assertIn("00:00:02,000 --> 00:00:04,270\nPremier point.", self.track.to_srt())
+        
+        part = self.track.between(3, 5)
+        self.assertEqual([(cue['start'], cue['end']) for cue in part.cues], [(0, 1.27), (1.27, 2)])
+        ass = self.track.to_ass((640, 360))
+        self.assertIn("PlayResY: 360", ass)
+        self.assertIn("Dialogue: 0,0:00:02.00,0:00:04.27,Default,,0,0,0,,Premier point.", ass)
+    
+    def test_render_commands(self):
+        """Teste l'incrustation dans le graphe de filtres et l'ajout en flux séparé"""
+        timeline = Timeline((640, 360), 24, "dynamic", caption_mode="burn")
+        start = timeline.add_section("section_0", 10)
+        timeline.track("visual").add("color", start, 10, color=[40, 40, 40])
+        for cue in self.track.cues:
+            timeline.track("captions").add("caption", cue['start'], cue['end'] - cue['start'], text=cue['text'])
+        self.assertEqual(timeline.section_items(0)[0][1].kind, "color")
+        self.assertEqual(len(timeline.split_static().to_render_plan()['segments']), 1)
+        
+        renderer = FFmpegRenderer(work_dir=tempfile.mkdtemp())
+        try:
+            command = renderer.build_command(timeline.to_render_plan(), 'out.mp4')
+            self.assertIn("[vcat]subtitles=filename=", " ".join(command))
+            
+            timeline.caption_mode = "soft"
+            command = renderer.build_command(timeline.to_render_plan(), 'out.mp4')
+            self.assertNotIn("subtitles=", " ".join(command))
+            self.assertTrue(command[command.index("-map", command.index("[vout]")) + 1].endswith(":s"))
+            self.assertEqual(Timeline.from_dict(timeline.to_dict()).caption_mode, "soft")
+        finally:
+            shutil.rmtree(renderer.work_dir, ignore_errors=True)
+
+class TestOutputFormat(unittest.TestCase):
+    """Tests pour les formats de sortie dérivés d'un même rendu"""
+    
+    def test_filters(self):
+        """Teste le cadrage de l'image composée dans chaque format"""
+        shorts = get_output_format("shorts")
+        self.assertEqual((shorts.resolution, shorts.duration(90), shorts.duration(30)), ((1080, 1920), 60, 30))
+        self.assertEqual(shorts.filters((1920, 1080)),
+                         ["scale=1080:1920:force_original_aspect_ratio=increase", "crop=1080:1920", "setsar=1"])
+        self.assertEqual(get_output_format("landscape").filters((1920, 1080)), [])
+        self.assertIn("pad=1080:1920", get_output_format("shorts", fit="pad").filters((1920, 1080))[1])
+        with self.assertRaises(ValueError):
+            get_output_format("square")
+    
+    def test_fit_resolution(self):
+        """Teste qu'un format n'agrandit pas la partie conservée de l'image composée"""
+        shorts = get_output_format("shorts")
+        self.assertEqual(shorts.fit_resolution((1920, 1080)), (608, 1080))
+        self.assertEqual(shorts.fit_resolution((3840, 2160)), (1080, 1920))
+        self.assertEqual(get_output_format("shorts", fit="pad").fit_resolution((1920, 1080)), (1080, 1920))
+        self.assertEqual(get_output_format("landscape").fit_resolution((640, 360)), (640, 360))
+        self.assertEqual(get_output_format("landscape").fit_resolution((1920, 1080)), (1920, 1080))
+    
+    def test_formats_command(self):
+        """Teste le rendu de tous les formats par un seul processus ffmpeg"""
+        timeline = Timeline((640, 360), 24, "dynamic")
+        start = timeline.add_section("section_0", 90)
+        timeline.track("visual").add("color", start, 90, color=[40, 40, 40])
+        timeline.track("narration").add("audio", start, 90, path="narration.wav")
+        outputs = [(get_output_format("landscape", resolution=(640, 360)), 'landscape.mp4'),
+                   (get_output_format("shorts", resolution=(360, 640)), 'shorts.mp4')]
+        renderer = FFmpegRenderer(work_dir=tempfile.mkdtemp())
+        try:
+            command = renderer.build_formats_command(timeline.to_render_plan(), outputs)
+        finally:
+            shutil.rmtree(renderer.work_dir, ignore_errors=True)
+        graph = command[command.index("-filter_complex") + 1]
+        self.assertIn("[vcomp]split=2[split0][split1]", graph)
+        self.assertIn("[split0]null[fmt0]", graph)
+        self.assertIn("asplit=2", graph)
+        self.assertEqual(command[-1], 'shorts.mp4')
+        self.assertEqual(command[command.index('landscape.mp4') - 1], "90")
+        self.assertEqual(command[-2], "60")
+
+class TestThumbnailGenerator(unittest.TestCase):
+    """Tests pour le générateur de miniatures"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        from PIL import Image
+        self.temp_dir = tempfile.mkdtemp()
+        self.logo_path = os.path.join(self.temp_dir, 'logo.png')
+        Image.new("RGBA", (200, 200), (255, 0, 0, 255)).save(self.logo_path)
+        self.image_path = os.path.join(self.temp_dir, 'background.png')
+        Image.new("RGB", (1920, 1080), (20, 80, 160)).save(self.image_path)
+        self.generator = ThumbnailGenerator({"logo_path": self.logo_path, "channel_name": "AutoTube"})
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_generate(self):
+        """Teste la miniature composée sur une image de fond"""
+        from PIL import Image
+        title = "How to invest your first thousand dollars without losing sleep over market crashes"
+        for layout in ("bold", "centered"):
+            path = self.generator.generate(os.path.join(self.temp_dir, f'{layout}.jpg'), title,
+                                           image_path=self.image_path, layout=layout)
+            with Image.open(path) as thumbnail:
+                self.assertEqual((thumbnail.format, thumbnail.size), ("JPEG", (1280, 720)))
+            self.assertLess(os.path.getsize(path), 2 * 1024 * 1024)
+        # Un calque de marque par mise en page, réutilisé d'une miniature à l'autre
+        self.assertEqual(sorted(self.generator._overlays), ["bold", "centered"])
+        
+        font, lines = self.generator._fit_title(title * 3, {"title_box": (0, 0, 0.5, 0.3), "max_fontsize": 100,
+                                                            "min_fontsize": 40, "max_lines": 2})
+        self.assertEqual((font.size, len(lines)), (40, 2))
+        self.assertTrue(lines[-1].endswith("…"))
+        with self.assertRaises(ValueError):
+            self.generator.generate(os.path.join(self.temp_dir, 'x.jpg'), title, layout="unknown")
+    
+    @unittest.skipUnless(shutil.which(FFMPEG_BINARY), "ffmpeg requis")
+    def test_batch_from_video(self):
+        """Teste la génération en lot à partir d'images de la vidéo rendue"""
+        from scripts.video_production.ffmpeg_utils import run_ffmpeg
+        video_path = os.path.join(self.temp_dir, 'video.mp4')
+        run_ffmpeg(["-f", "lavfi", "-i", "testsrc=size=640x360:rate=10:duration=4", "-pix_fmt", "yuv420p", video_path])
+        
+        jobs = [{"output_path": os.path.join(self.temp_dir, f'thumb_{index}.jpg'), "title": f"Video {index}",
+                 "video_path": video_path, "timestamp": index} for index in range(4)]
+        paths = self.generator.generate_batch(jobs, workers=2)
+        self.assertEqual(paths, [job["output_path"] for job in jobs])
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+class TestKeyframeIndex(unittest.TestCase):
+    """Tests pour l'index des images clés"""
+    
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_lookup(self):
+        """Teste la recherche de l'image clé et de la vignette d'un instant"""
+        keyframes = [{"time": 2.0 * index, "pos": 48 + 5000 * index, "size": 4000} for index in range(8)]
+        strip = {"tile_width": 160, "tile_height": 90, "columns": 2, "tiles": [0, 3, 6]}
+        index = KeyframeIndex(keyframes, 16.0, (1280, 720), strip)
+        self.assertEqual(index.keyframe_at(5.9)["pos"], 48 + 5000 * 2)
+        self.assertEqual(index.keyframe_at(6.0)["time"], 6.0)
+        self.assertEqual(index.tile_at(5.9), (0, 0, 160, 90))
+        self.assertEqual(index.tile_at(12.5), (0, 90, 160, 90))
+        
+        path = os.path.join(self.temp_dir, 'video.keyframes.json')
+        loaded = KeyframeIndex.load(index.save(path).path)
+        self.assertEqual((loaded.tile_at(7.0), loaded.strip_path()), ((160, 0, 160, 90), os.path.join(self.temp_dir, 'video.keyframes.jpg')))
+    
+    @unittest.skipUnless(shutil.which(FFMPEG_BINARY) and shutil.which(FFPROBE_BINARY), "ffmpeg et ffprobe requis")
+    def test_build(self):
+        """Teste le relevé des images clés et la planche d'une vidéo rendue"""
+        from PIL import Image
+        from scripts.video_production.ffmpeg_utils import run_ffmpeg
+        video_path = os.path.join(self.temp_dir, 'video.mp4')
+        run_ffmpeg(["-f", "lavfi", "-i", "testsrc=size=640x360:rate=10:duration=9", "-g", "20", "-keyint_min", "20",
+                    "-sc_threshold", "0", "-pix_fmt", "yuv420p", video_path])
+        
+        index = KeyframeIndex.build(video_path, columns=2, max_tiles=3)
+        self.assertEqual([keyframe["time"] for keyframe in index.keyframes], [0.0, 2.0, 4.0, 6.0, 8.0])
+        self.assertEqual(index.strip["tiles"], [0, 2, 4])
+        with Image.open(index.strip_path()) as strip:
+            self.assertEqual(strip.size, (320, 180))
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, 'video.keyframes.json')))
+
+class TestAudioTiming(unittest.TestCase):
+    """Tests pour le minutage des sections sur la narration"""
+    
+    def test_plan_section_starts(self):
+        """Teste l'estimation des débuts de sections, recalée sur les pauses"""
+        weights = [100, 200, 200, 200, 100]
+        self.assertEqual(plan_section_starts(80.0, weights), [0.0, 10.0, 30.0, 50.0, 70.0])
+        
+        # La pause la plus longue l'emporte sur une pause plus proche
+        pauses = [(9.0, 9.2), (11.5, 12.5), (29.6, 30.0), (48.0, 49.0), (70.5, 71.5)]
+        self.assertEqual(plan_section_starts(80.0, weights, pauses=pauses), [0.0, 12.0, 29.8, 48.5, 71.0])
+        
+        # Positions exactes prioritaires, la première ramenée au début de la narration
+        self.assertEqual(plan_section_starts(80.0, weights, offsets=[0.25, 8.0, 31.0, 52.0, 69.0], pauses=pauses),
+                         [0.0, 8.0, 31.0, 52.0, 69.0])
+        with self.assertRaises(ValueError):
+            plan_section_starts(80.0, weights, offsets=[0.0, 8.0, 31.0, 52.0])
+        with self.assertRaises(ValueError):
+            plan_section_starts(60.0, weights, offsets=[0.0, 8.0, 31.0, 52.0, 69.0])
+    
+    def test_short_narration(self):
+        """Teste l'abandon du recalage qui laisserait une section trop courte"""
+        weights = [1, 1, 1, 1, 1]
+        self.assertEqual(plan_section_starts(3.0, weights, pauses=[(0.5, 0.8), (1.0, 1.4)]), [0.0, 0.6, 1.2, 1.8, 2.4])
+    
+    @unittest.skipUnless(shutil.which(FFMPEG_BINARY), "ffmpeg requis")
+    def test_detect_pauses(self):
+        """Teste la détection des pauses d'une narration"""
+        import numpy as np
+        temp_dir = tempfile.mkdtemp()
+        try:
+            audio_path = os.path.join(temp_dir, 'narration.wav')
+            sample_rate = 22050
+            t = np.arange(sample_rate) / sample_rate
+            tone = (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32).reshape(-1, 1)
+            with WavWriter(audio_path, sample_rate, 1) as writer:
+                writer.write(tone)
+                writer.write_silence(sample_rate // 2)
+                writer.write(tone)
+                writer.write_silence(sample_rate // 10)
+                writer.write(tone)
+            
+            pauses = detect_pauses(audio_path)
+            self.assertEqual(len(pauses), 1)
+            self.assertAlmostEqual(pauses[0][0], 1.0, delta=0.03)
+            self.assertAlmostEqual(pauses[0][1], 1.5, delta=0.03)
+        finally:
+            shutil.rmtree(temp_dir)
 
 class TestYouTubePublisher(unittest.TestCase):
     """Tests pour le module de publication YouTube"""
@@ -16,7 +16,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Importer les modules du projet
 from scripts.niche_discovery import NicheDiscovery
 from scripts.content_generation import ContentGenerator
-from scripts.tts import TTSEngine
+from scripts.tts import TTSEngine, DurationEstimator
 from scripts.video_production import VideoProducer
 from scripts.youtube_publishing import YouTubeAuth, YouTubePublisher
 from scripts.analytics import PerformanceAnalyzer
@@ -117,6 +117,8 @@ def init_session_state():
         st.session_state.uploaded_videos = []
     if 'performance_data' not in st.session_state:
         st.session_state.performance_data = {}
+    if 'preview_path' not in st.session_state:
+        st.session_state.preview_path = None
 
 # Initialiser les variables de session
 init_session_state()
@@ -706,8 +708,42 @@ elif st.session_state.current_page == "production":
     
     selected_video = st.selectbox("Sélectionner une vidéo", [video['title'] for video in videos])
     
-    # Simuler un aperçu vidéo
-    st.image("https://via.placeholder.com/800x450.png?text=Aperçu+Vidéo", use_column_width=True)
+    # Aperçu basse résolution construit à partir du même plan de rendu que la vidéo finale
+    preview_col1, preview_col2 = st.columns([3, 1])
+    
+    with preview_col1:
+        preview_mode = st.radio("Type d'aperçu", ["Vidéo proxy (360p)", "Planche d'images"], horizontal=True)
+    
+    with preview_col2:
+        if st.button("Générer un aperçu", key="generate_preview"):
+            with st.spinner("Génération de l'aperçu en cours..."):
+                try:
+                    script_info = next(script for script in scripts if script['title'] == selected_video)
+                    generated = ContentGenerator().generate_script_with_manus(
+                        selected_video, script_info['category'], script_info['subcategory']
+                    )
+                    narration = ContentGenerator().format_script_for_tts(generated['script'])
+                    styles = {"Dynamique": "dynamic", "Diaporama d'images": "image_slideshow", "Vidéo stock": "stock_video"}
+                    
+                    st.session_state.preview_path = VideoProducer().create_preview(
+                        generated['script'],
+                        generated['metadata'],
+                        audio_duration=DurationEstimator().estimate(narration),
+                        visual_style=styles[visual_style],
+                        mode="proxy" if preview_mode.startswith("Vidéo") else "storyboard",
+                        use_intro_outro=use_intro and use_outro
+                    )
+                except Exception as e:
+                    st.error(f"Impossible de générer l'aperçu: {e}")
+    
+    preview_path = st.session_state.preview_path
+    if preview_path and os.path.exists(preview_path):
+        if preview_path.endswith(".mp4"):
+            st.video(preview_path)
+        else:
+            st.image(preview_path, use_column_width=True)
+    else:
+        st.image("https://via.placeholder.com/800x450.png?text=Aperçu+Vidéo", use_column_width=True)
     
     col1, col2, col3 = st.columns(3)
     
@@ -736,7 +772,7 @@ elif st.session_state.current_page == "analytics":
     
     # Paramètres d'analyse
     st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.markdown('<div class="sub-header">Paramètres d'analyse</div>', unsafe_allow_html=True)
+    st.markdown('<div class="sub-header">Paramètres d\'analyse</div>', unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns(3)
     